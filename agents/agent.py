@@ -1,46 +1,42 @@
 import datetime
 import operator
-import os
 from typing import Annotated, TypedDict
 from dotenv import load_dotenv
 from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage, ToolMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 
 from loguru import logger
 from config import AgentConfig, TOOLS
+from agents import clients
+from agents.blobstore import BLOB_STORE
+from agents.log import cap, sampled
+from agents.outbox import email_queue
+from agents.packages import PACKAGE_TOOLS, packages_from_results, result_from_json
+from agents.prefetch import Prefetcher
+from agents.prompt import (
+    PROMPT_STATS,
+    session_prompt,
+    static_prefix_tokens,
+    system_messages,
+)
+from agents.tools.deep_refresh import DEEP_REFRESHER
+from agents.tools.models import tool_json
+from agents.warmer import CACHE_WARMER, SEARCH_HISTORY
 
 # 📌 Chargement des variables d'environnement
 _ = load_dotenv()
 
-# 🗓️ Obtention de l'année courante pour le contexte
-CURRENT_YEAR = datetime.datetime.now().year
-MONTH = datetime.datetime.now().month
-
 
 # 🏗️ Définition de la structure d'état de l'agent
 class AgentState(TypedDict):
     # Liste des messages avec annotation pour l'opérateur d'addition
     messages: Annotated[list[AnyMessage], operator.add]
+    # Expéditeur, destinataires et sujet de l'email (renseignés avant l'envoi)
+    email: dict
 
 
-# 🤖 Prompt système pour la recherche de vols et hôtels
-TOOLS_SYSTEM_PROMPT = f"""You are a smart travel agency. Use the tools to look up information.
-    You are allowed to make multiple calls (either together or in sequence).
-    Only look up information when you are sure of what you want.
-    The current date is year {CURRENT_YEAR} month {MONTH} , but be carefull if someone wants informations for january and we are on december maybe its for the next year
-    If you need to look up some information before asking a follow up question, you are allowed to do that!
-    I want to have in your output links to hotels websites and flights websites (if possible).
-    I want to have as well the logo of the hotel and the logo of the airline company (if possible).
-    In your output always include the price of the flight and the price of the hotel and the currency as well (if possible).
-    for example for hotels-
-    Rate: $581 per night
-    Total: $3,488
-    """
-
 # 🛠️ Liste des outils disponibles
 
 
@@ -128,12 +124,19 @@ class Agent:
     def __init__(self, config: AgentConfig = None):
         # 🔧 Initialisation des outils
         self.config = config if config is not None else AgentConfig()
-        self._tools = {t.name: t for t in TOOLS}
-        # 🧠 Configuration du modèle LLM avec les outils
-        self._tools_llm = ChatOpenAI(
-            model=self.config.model, temperature=self.config.temperature
-        ).bind_tools(TOOLS)
-        self._system_prompt = self._build_system_prompt()
+        self._tools = TOOLS
+        # 🧠 Modèle LLM avec les outils, créé au premier appel
+        self._tools_llm = None
+        # 🔮 Préchargement spéculatif des recherches complémentaires
+        self._prefetcher = Prefetcher(self._tools, self._prepare_tool_args)
+        # 🔥 Préchauffage des recherches populaires (partagé par le processus)
+        if self.config.cache_warmer:
+            CACHE_WARMER.start(self._tools)
+        # 🔭 Rafraîchissements deep_search en attente, par thread de conversation
+        self._pending_refreshes = {}
+        # ⏳ Threads inactifs libérés par le balayage périodique des blobs
+        BLOB_STORE.on_expire(self._forget_thread)
+        BLOB_STORE.start(self.config.thread_ttl_seconds)
         # 📊 Construction du graphe d'état
         builder = StateGraph(AgentState)
 
@@ -155,30 +158,39 @@ class Agent:
         builder.add_edge("email_sender", END)
 
         # 💾 Configuration de la sauvegarde mémoire
-        memory = MemorySaver()
+        self._memory = MemorySaver()
         self.graph = builder.compile(
-            checkpointer=memory, interrupt_before=["email_sender"]
+            checkpointer=self._memory, interrupt_before=["email_sender"]
         )
 
         # 📝 Journalisation du graphe en format Mermaid
         logger.info(self.graph.get_graph().draw_mermaid())
 
-    def _build_system_prompt(self) -> str:
-        """Construit le prompt système en incluant les préférences"""
-        base_prompt = TOOLS_SYSTEM_PROMPT
-
-        # Ajout des préférences au prompt
-        if self.config.preferences:
-            preferences_str = ", ".join(self.config.preferences)
-            base_prompt += f"\nTravel preferences: {preferences_str}"
-
-        # Ajout de la devise préférée
-        base_prompt += f"\nPreferred currency: {self.config.currency}"
-
-        # Ajout des limites de recherche
-        base_prompt += f"\nSearch limits: up to {self.config.max_hotels} hotels and {self.config.max_flights} flights"
-
-        return base_prompt
+    @property
+    def tools_llm(self):
+        """🧠 LLM lié aux schémas des outils (créé au premier usage)"""
+        if self._tools_llm is None:
+            schemas = self._tools.schemas()
+            self._tools_llm = clients.chat_model(
+                self.config.model, self.config.temperature
+            ).bind_tools(schemas)
+            logger.info(
+                "🧱 Static prompt prefix: {}",
+                static_prefix_tokens(schemas, self.config.model),
+            )
+        return self._tools_llm
+
+    def _session_prompt(self) -> str:
+        """🧑‍💼 Bloc de session (date du jour, devise, limites, préférences)"""
+        return session_prompt(
+            datetime.date.today(),
+            self.config.currency,
+            self.config.max_hotels,
+            self.config.max_flights,
+            tuple(self.config.preferences or ()),
+            self.config.session_prompt_tokens,
+            self.config.model,
+        )
 
     @staticmethod
     def exists_action(state: AgentState):
@@ -191,15 +203,18 @@ class Agent:
             return "email_sender"
         return "more_tools"
 
-    def email_sender(self, state: AgentState):
+    def email_sender(self, state: AgentState, config: RunnableConfig):
         """
-        📨 Gère la génération et l'envoi d'emails
-        Utilise GPT-4 pour générer le contenu HTML et SendGrid pour l'envoi
+        📨 Gère la génération et la mise en file des emails
+        Utilise GPT-4 pour générer le contenu HTML ; l'envoi (avec reprises)
+        est confié à la file persistante, avec les destinataires de l'état
         """
-        logger.info("Sending email")
-        # Configuration du LLM pour la génération d'email
-        email_llm = ChatOpenAI(model="gpt-4o", temperature=0.1)
+        email = state.get("email") or {}
+        missing = [key for key in ("from", "to", "subject") if not email.get(key)]
+        if missing:
+            raise ValueError(f"Missing email fields in thread state: {', '.join(missing)}")
 
+        logger.info("Sending email")
         # Préparation du message pour la génération
         email_message = [
             SystemMessage(content=EMAILS_SYSTEM_PROMPT),
@@ -207,100 +222,274 @@ class Agent:
         ]
 
         # Génération du contenu de l'email
-        email_response = email_llm.invoke(email_message)
-        logger.info("Email content:", email_response.content)
-
-        # Configuration et envoi de l'email via SendGrid
-        message = Mail(
-            from_email=os.environ["FROM_EMAIL"],
-            to_emails=os.environ["TO_EMAIL"],
-            subject=os.environ["EMAIL_SUBJECT"],
-            html_content=email_response.content,
+        email_response = clients.email_llm().invoke(email_message)
+        logger.opt(lazy=True).debug(
+            "Email content: {}", lambda: cap(email_response.content)
+        )
+
+        # Mise en file : les workers envoient et reprennent en cas d'échec
+        queue = email_queue()
+        email_id = queue.submit(
+            email["from"],
+            email["to"],
+            email["subject"],
+            email_response.content,
+            thread_id=config["configurable"].get("thread_id"),
         )
-        try:
-            sg = SendGridAPIClient(os.environ.get("SENDGRID_API_KEY"))
-            response = sg.send(message)
-            logger.info(response.status_code)
-            logger.info(response.body)
-            logger.info(response.headers)
-        except Exception as e:
-            logger.error(str(e))
-
-    def call_tools_llm(self, state: AgentState):
+        logger.info(f"📬 Email {email_id} queued for {email['to']}")
+        if sampled("email_stats"):
+            logger.opt(lazy=True).info("📬 Email queue stats: {}", queue.stats)
+        return {"email": {**email, "outbox_id": email_id, "status": "queued"}}
+
+    def price_updates(self, thread_id: str, timeout: float = 0.0) -> list:
+        """
+        📉 Récupère les écarts de prix des recherches deep_search terminées
+
+        Appelé par le LLM au tour suivant du thread, ou par l'interface, qui
+        démarre un thread par requête et n'a donc pas de tour suivant (en
+        attendant au besoin jusqu'à `timeout` s). Chaque écart n'est
+        retourné qu'une fois.
+        """
+        refresh_ids = self._pending_refreshes.get(thread_id, [])
+        if not refresh_ids:
+            return []
+        if timeout:
+            DEEP_REFRESHER.wait(refresh_ids, timeout)
+        updates = DEEP_REFRESHER.collect(refresh_ids)
+        self._pending_refreshes[thread_id] = DEEP_REFRESHER.pending(refresh_ids)
+        if updates and sampled("flight_phase_timings"):
+            logger.opt(lazy=True).info(
+                "📊 Flight phase timings: {}", DEEP_REFRESHER.stats
+            )
+        return [u for u in updates if u["status"] == "done"]
+
+    def _forget_thread(self, thread_id: str):
+        """Oublie les checkpoints et les suivis d'un thread"""
+        self._memory.storage.pop(thread_id, None)
+        for key in [k for k in self._memory.writes if k[0] == thread_id]:
+            del self._memory.writes[key]
+        self._pending_refreshes.pop(thread_id, None)
+
+    def release_thread(self, thread_id: str):
+        """
+        🧹 Libère un thread : checkpoints, blobs de résultats et suivis associés
+        """
+        self._forget_thread(thread_id)
+        BLOB_STORE.release(thread_id)
+
+    def expire_threads(self):
+        """
+        ⏳ Libère les threads inactifs depuis plus de `thread_ttl_seconds`
+
+        Le balayage tourne aussi périodiquement en tâche de fond.
+        """
+        BLOB_STORE.sweep(self.config.thread_ttl_seconds)
+
+    @staticmethod
+    def _hydrate(message: AnyMessage) -> AnyMessage:
+        """Remplace une référence de blob par le contenu du résultat d'outil"""
+        if isinstance(message, ToolMessage) and isinstance(message.content, str):
+            content = BLOB_STORE.get(message.content)
+            if content is not message.content:
+                return message.copy(update={"content": content})
+        return message
+
+    def call_tools_llm(self, state: AgentState, config: RunnableConfig):
         """
         🤖 Appelle le LLM avec le contexte système et les messages
         Retourne la réponse du LLM
         """
-        messages = state["messages"]
-        messages = [SystemMessage(content=TOOLS_SYSTEM_PROMPT)] + messages
-        message = self._tools_llm.invoke(messages)
-        return {"messages": [message]}
+        # Préfixe statique (mis en cache par le fournisseur), puis la session
+        messages = system_messages(self._session_prompt()) + [
+            self._hydrate(m) for m in state["messages"]
+        ]
+
+        # Mises à jour de prix issues des recherches approfondies
+        thread_id = config.get("configurable", {}).get("thread_id", "default")
+        BLOB_STORE.touch(thread_id)
+        updates = [
+            SystemMessage(
+                content=f"Flight prices refined by deep search (search {u['refresh_id']}): "
+                f"lowest {u['lowest_before']} -> {u['lowest_after']} {u['currency']}, "
+                f"{len(u['changed'])} price changes, {u['new_options']} new options"
+            )
+            for u in self.price_updates(thread_id)
+        ]
+
+        message = self.tools_llm.invoke(messages + updates)
+        usage = PROMPT_STATS.record(message)
+        if usage:
+            logger.info(
+                "🧮 Prompt tokens: {prompt_tokens} ({cached_tokens} from prefix cache)",
+                **usage,
+            )
+            if sampled("prompt_stats"):
+                logger.opt(lazy=True).info(
+                    "📊 Prompt cache stats: {}", PROMPT_STATS.stats
+                )
+        return {"messages": updates + [message]}
+
+    def _prepare_tool_args(self, t: dict):
+        """
+        🎛️ Injecte la configuration de l'agent dans les arguments d'un appel d'outil
+        """
+        if t["name"] == "flights_finder":
+            if "params" not in t["args"]:
+                t["args"]["params"] = {}
+
+            # Log avant modification
+            logger.opt(lazy=True).debug(
+                "🛫 Flight finder params before update: {}",
+                lambda: cap(t["args"]["params"]),
+            )
+
+            # Mettre à jour les paramètres de vol
+            t["args"]["params"].update(
+                {
+                    "max_results": self.config.max_flights,
+                    "currency": self.config.currency,
+                    "preferences": self.config.preferences,
+                    "sort_by": "price",
+                    "search_mode": self.config.flight_search_mode,
+                    "return_top_k": self.config.return_legs_top_k,
+                    "return_call_budget": self.config.return_legs_budget,
+                }
+            )
 
-    def invoke_tools(self, state: AgentState):
+            # Log après modification
+            logger.opt(lazy=True).debug(
+                "✈️ Flight finder params after update: {}",
+                lambda: cap(t["args"]["params"]),
+            )
+
+        elif t["name"] == "hotels_finder":
+            if "params" not in t["args"]:
+                t["args"]["params"] = {}
+
+            t["args"]["params"].update(
+                {
+                    "max_results": self.config.max_hotels,
+                    "currency": self.config.currency,
+                    "preferences": self.config.preferences,
+                }
+            )
+
+        elif t["name"] in ("hotel_details", "trains_finder"):
+            if "params" not in t["args"]:
+                t["args"]["params"] = {}
+
+            t["args"]["params"].update({"currency": self.config.currency})
+
+    def _attach_packages(self, history: list, results: list):
+        """
+        🧳 Forfaits combinés à partir de tous les résultats du thread (vols
+        d'un tour, hôtels du suivant...), joints au dernier résultat du tour
+        """
+        current = [
+            (t["name"], result)
+            for t, result in results
+            if t["name"] in PACKAGE_TOOLS
+            and isinstance(result, dict)
+            and result.get("status") == "success"
+        ]
+        if not current:
+            return
+        earlier = [
+            (message.name, result_from_json(self._hydrate(message).content))
+            for message in history
+            if isinstance(message, ToolMessage) and message.name in PACKAGE_TOOLS
+        ]
+        packages = packages_from_results(
+            earlier + current, top_n=self.config.max_packages
+        )
+        if packages:
+            current[-1][1]["packages"] = packages
+
+    def invoke_tools(self, state: AgentState, config: RunnableConfig):
         """
         🛠️ Exécute les outils demandés par le LLM
         """
         tool_calls = state["messages"][-1].tool_calls
         results = []
+        thread_id = config.get("configurable", {}).get("thread_id", "default")
+        BLOB_STORE.touch(thread_id)
 
         for t in tool_calls:
-            logger.info(f"✨ Starting tool execution: {t['name']}")
-            logger.info(f"📝 Original arguments: {t['args']}")
+            logger.info("✨ Starting tool execution: {}", t["name"])
+            logger.opt(lazy=True).debug(
+                "📝 Original arguments: {}", lambda: cap(t["args"])
+            )
 
             try:
                 if t["name"] not in self._tools:
-                    logger.error(f"❌ Unknown tool: {t['name']}")
+                    logger.error("❌ Unknown tool: {}", t["name"])
                     result = "bad tool name, retry"
                 else:
                     # Préparation des arguments selon le type d'outil
-                    if t["name"] == "flights_finder":
-                        if "params" not in t["args"]:
-                            t["args"]["params"] = {}
-
-                        # Log avant modification
-                        logger.info(
-                            f"🛫 Flight finder params before update: {t['args']['params']}"
-                        )
-
-                        # Mettre à jour les paramètres de vol
-                        t["args"]["params"].update(
-                            {
-                                "max_results": self.config.max_flights,
-                                "currency": self.config.currency,
-                                "preferences": self.config.preferences,
-                                "sort_by": "price",
-                            }
-                        )
-
-                        # Log après modification
-                        logger.info(
-                            f"✈️ Flight finder params after update: {t['args']['params']}"
-                        )
-
-                    elif t["name"] == "hotels_finder":
-                        if "params" not in t["args"]:
-                            t["args"]["params"] = {}
-
-                        t["args"]["params"].update(
-                            {
-                                "max_results": self.config.max_hotels,
-                                "currency": self.config.currency,
-                                "preferences": self.config.preferences,
-                            }
-                        )
+                    self._prepare_tool_args(t)
 
                     # Exécution de l'outil
-                    logger.info(f"🚀 Executing {t['name']} with args: {t['args']}")
+                    logger.opt(lazy=True).debug(
+                        "🚀 Executing {} with args: {}",
+                        lambda: t["name"],
+                        lambda: cap(t["args"]),
+                    )
                     result = self._tools[t["name"]].invoke(t["args"])
-                    logger.info(f"✅ Tool execution completed: {t['name']}")
+                    logger.info("✅ Tool execution completed: {}", t["name"])
 
             except Exception as e:
-                logger.error(f"❌ Error executing {t['name']}: {str(e)}")
+                logger.error("❌ Error executing {}: {}", t["name"], e)
                 result = f"Error: {str(e)}"
 
-            results.append(
-                ToolMessage(tool_call_id=t["id"], name=t["name"], content=str(result))
+            # Historique des recherches abouties (pour le préchauffage)
+            if isinstance(result, dict) and result.get("status") == "success":
+                SEARCH_HISTORY.record(t["name"], t["args"])
+
+            # Suivi de la recherche approfondie lancée en arrière-plan
+            if isinstance(result, dict) and result.get("refinement"):
+                self._pending_refreshes.setdefault(thread_id, []).append(
+                    result["refinement"]["refresh_id"]
+                )
+
+            results.append((t, result))
+
+        # 🧳 Forfaits combinés dès que le thread contient transport et hébergement
+        if self.config.max_packages:
+            try:
+                self._attach_packages(state["messages"], results)
+            except Exception as e:
+                logger.warning(f"⚠️ Package building failed: {e}")
+
+        # 🗄️ Résultats encodés en JSON compact ; les gros sont stockés une fois et
+        # l'état (donc les checkpoints) ne garde que la référence
+        messages = [
+            ToolMessage(
+                tool_call_id=t["id"],
+                name=t["name"],
+                content=BLOB_STORE.put(
+                    result if isinstance(result, str) else tool_json(result),
+                    owner=thread_id,
+                ),
             )
+            for t, result in results
+        ]
+        if sampled("blob_store_stats"):
+            logger.opt(lazy=True).info("🗄️ Tool payload store: {}", BLOB_STORE.stats)
+
+        # 🔮 Préchargement des recherches probables pendant que le LLM réfléchit
+        if self.config.prefetch:
+            try:
+                self._prefetcher.schedule(tool_calls)
+            except Exception as e:
+                # Le préchargement est spéculatif : il ne doit jamais faire
+                # échouer le tour de l'utilisateur
+                logger.warning(f"⚠️ Prefetch scheduling failed: {e}")
+            if sampled("prefetch_stats"):
+                logger.opt(lazy=True).info(
+                    "📊 Prefetch stats: {}", self._prefetcher.stats
+                )
+        if self.config.cache_warmer and sampled("warmer_stats"):
+            logger.opt(lazy=True).info("🔥 Cache warmer stats: {}", CACHE_WARMER.stats)
 
         logger.info("➡️ Returning results to model")
-        return {"messages": results}
+        return {"messages": messages}
@@ -0,0 +1,271 @@
+import hashlib
+import inspect
+import os
+import threading
+import time
+import weakref
+import zlib
+from typing import Callable, Optional
+from loguru import logger
+
+try:
+    import zstandard
+except ImportError:  # zstd est optionnel, zlib sert de repli
+    zstandard = None
+
+
+# 🔗 Préfixe des références stockées à la place des contenus volumineux
+BLOB_PREFIX = "blob:sha256:"
+
+# 🏷️ Marqueurs de codec en tête de chaque blob compressé
+_ZSTD = b"Z"
+_ZLIB = b"D"
+
+
+def _compress(data: bytes) -> bytes:
+    if zstandard is not None:
+        return _ZSTD + zstandard.ZstdCompressor(level=6).compress(data)
+    return _ZLIB + zlib.compress(data, 6)
+
+
+def _decompress(blob: bytes) -> bytes:
+    codec, body = blob[:1], blob[1:]
+    if codec == _ZSTD:
+        return zstandard.ZstdDecompressor().decompress(body)
+    return zlib.decompress(body)
+
+
+class BlobStore:
+    """
+    🗄️ Stockage adressé par contenu des gros résultats d'outils
+
+    Chaque contenu est stocké une seule fois, compressé, sous son empreinte
+    SHA-256. Les messages d'état ne gardent que la référence. Chaque blob
+    connaît les threads qui le référencent : il est supprimé quand le
+    dernier thread est libéré. Le stockage suit la dernière activité de
+    chaque thread et libère les threads inactifs (`sweep`, périodiquement
+    une fois `start` appelé) ; sur disque, les fichiers qu'aucun thread du
+    processus ne référence (laissés par un processus précédent) sont
+    supprimés après la même durée d'inactivité.
+    """
+
+    def __init__(self, root: Optional[str] = None, min_size: int = 512):
+        self.root = root
+        self.min_size = min_size
+        self._blobs = {}
+        self._owners = {}
+        self._last_seen = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "puts": 0,
+            "writes": 0,
+            "logical_bytes": 0,
+            "written_bytes": 0,
+            "stored_bytes": 0,
+        }
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _write(self, digest: str, blob: bytes):
+        if self.root is None:
+            self._blobs[digest] = blob
+            return
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(blob)
+
+    def _read(self, digest: str) -> bytes:
+        if self.root is None:
+            return self._blobs[digest]
+        path = self._path(digest)
+        with open(path, "rb") as f:
+            blob = f.read()
+        # Fichier encore utilisé : pas orphelin pour les autres processus
+        os.utime(path)
+        return blob
+
+    def _delete(self, digest: str):
+        if self.root is None:
+            blob = self._blobs.pop(digest, b"")
+            self._stats["stored_bytes"] -= len(blob)
+            return
+        path = self._path(digest)
+        if os.path.exists(path):
+            self._stats["stored_bytes"] -= os.path.getsize(path)
+            os.remove(path)
+
+    def put(self, content: str, owner: str) -> str:
+        """📥 Stocke un contenu et retourne sa référence (ou le contenu s'il est petit)"""
+        data = content.encode("utf-8")
+        if len(data) < self.min_size:
+            return content
+
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._stats["puts"] += 1
+            self._stats["logical_bytes"] += len(data)
+            if digest not in self._owners:
+                blob = _compress(data)
+                self._write(digest, blob)
+                self._owners[digest] = set()
+                self._stats["writes"] += 1
+                self._stats["written_bytes"] += len(blob)
+                self._stats["stored_bytes"] += len(blob)
+            elif self.root is not None:
+                os.utime(self._path(digest))
+            self._owners[digest].add(owner)
+            self._last_seen[owner] = time.time()
+        return BLOB_PREFIX + digest
+
+    def get(self, ref: str) -> str:
+        """📤 Retourne le contenu d'une référence (ou la valeur telle quelle)"""
+        if not isinstance(ref, str) or not ref.startswith(BLOB_PREFIX):
+            return ref
+        digest = ref[len(BLOB_PREFIX) :]
+        try:
+            return _decompress(self._read(digest)).decode("utf-8")
+        except (KeyError, FileNotFoundError):
+            logger.warning(f"⚠️ Missing blob {digest[:12]}")
+            return "Error: tool result expired, please search again"
+
+    def touch(self, owner: str):
+        """⏳ Note l'activité d'un thread (repousse son expiration)"""
+        with self._lock:
+            self._last_seen[owner] = time.time()
+
+    def on_expire(self, callback: Callable[[str], None]):
+        """
+        🔔 Appelle `callback(owner)` pour chaque thread expiré par `sweep`
+
+        Les méthodes liées sont gardées par référence faible : l'abonnement
+        disparaît avec leur objet.
+        """
+        ref = (
+            weakref.WeakMethod(callback)
+            if inspect.ismethod(callback)
+            else lambda: callback
+        )
+        with self._lock:
+            self._listeners.append(ref)
+
+    def release(self, owner: str) -> int:
+        """🧹 Libère les références d'un thread et supprime les blobs orphelins"""
+        removed = 0
+        with self._lock:
+            self._last_seen.pop(owner, None)
+            for digest in list(self._owners):
+                owners = self._owners[digest]
+                owners.discard(owner)
+                if not owners:
+                    del self._owners[digest]
+                    self._delete(digest)
+                    removed += 1
+        if removed:
+            logger.info(f"🧹 Removed {removed} blobs released by thread {owner}")
+        return removed
+
+    def _collect_files(self, deadline: float) -> int:
+        """🗑️ Fichiers sans thread connu, inchangés depuis `deadline`"""
+        removed = 0
+        with self._lock:
+            for folder in os.scandir(self.root):
+                if not folder.is_dir():
+                    continue
+                for entry in os.scandir(folder.path):
+                    if entry.name in self._owners:
+                        continue
+                    try:
+                        if entry.stat().st_mtime < deadline:
+                            os.remove(entry.path)
+                            removed += 1
+                    except FileNotFoundError:
+                        pass  # supprimé entre-temps par un autre processus
+        return removed
+
+    def sweep(self, ttl_seconds: float) -> int:
+        """
+        ⏳ Libère les threads inactifs depuis plus de `ttl_seconds` et, sur
+        disque, les fichiers orphelins aussi anciens ; retourne le nombre de
+        blobs supprimés
+        """
+        deadline = time.time() - ttl_seconds
+        with self._lock:
+            expired = [o for o, seen in self._last_seen.items() if seen < deadline]
+            listeners = list(self._listeners)
+        removed = 0
+        for owner in expired:
+            logger.info(f"⏳ Expiring thread {owner}")
+            removed += self.release(owner)
+            for ref in listeners:
+                callback = ref()
+                if callback is None:
+                    continue
+                try:
+                    callback(owner)
+                except Exception as e:
+                    logger.warning(f"⚠️ Expiry callback failed for {owner}: {e}")
+        if self.root is not None:
+            orphans = self._collect_files(deadline)
+            if orphans:
+                logger.info(f"🧹 Removed {orphans} orphan blob files")
+            removed += orphans
+        return removed
+
+    def _loop(self, ttl_seconds: float, interval_seconds: float):
+        while not self._stop.is_set():
+            try:
+                self.sweep(ttl_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Blob sweep failed: {e}")
+            self._stop.wait(interval_seconds)
+
+    def start(self, ttl_seconds: float, interval_seconds: Optional[float] = None):
+        """
+        🚀 Balayage immédiat puis périodique (une seule fois par processus),
+        toutes les `interval_seconds` (par défaut un quart du TTL, 10 min max)
+        """
+        if interval_seconds is None:
+            interval_seconds = max(1.0, min(ttl_seconds / 4, 600.0))
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop,
+                args=(ttl_seconds, interval_seconds),
+                name="blob-sweeper",
+                daemon=True,
+            )
+            self._thread.start()
+        logger.info("🧹 Blob sweeper started")
+
+    def stop(self):
+        """🛑 Arrête le balayage périodique"""
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict:
+        """📊 Ratio de déduplication et octets économisés"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["blobs"] = len(self._owners)
+            stats["threads"] = len(self._last_seen)
+        stats["dedup_ratio"] = (
+            round(stats["puts"] / stats["writes"], 2) if stats["writes"] else 0.0
+        )
+        stats["bytes_saved"] = stats["logical_bytes"] - stats["written_bytes"]
+        return stats
+
+
+# 🌍 Stockage partagé par toutes les sessions (TOOL_BLOB_DIR pour le persister)
+BLOB_STORE = BlobStore(os.environ.get("TOOL_BLOB_DIR"))
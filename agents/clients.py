@@ -0,0 +1,98 @@
+import os
+from functools import lru_cache
+from typing import Optional
+
+from agents.quota import UPSTREAM_QUOTAS
+
+
+# 🔌 Clients amont créés au premier usage puis réutilisés (connexions HTTP
+# persistantes). Les bibliothèques lourdes ne sont importées qu'à ce moment :
+# le démarrage d'un worker ne paie pas leur coût.
+# Les URL de base sont surchargeables (SERPAPI_BASE_URL, SNCF_API_URL,
+# SENDGRID_HOST, OPENAI_BASE_URL, SNCF_CONNECT_URL), par exemple vers des
+# bouchons locaux.
+
+# 🔢 Connexions conservées par hôte (appels concurrents des outils)
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "32"))
+
+
+def _pooled(session):
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@lru_cache(maxsize=None)
+def serpapi_client():
+    """🔎 Client SerpAPI partagé"""
+    import serpapi
+
+    client = serpapi.Client()
+    client.BASE_DOMAIN = os.environ.get("SERPAPI_BASE_URL", client.BASE_DOMAIN)
+    _pooled(client.session)
+    return client
+
+
+def serpapi_search(params: dict) -> dict:
+    """🔎 Recherche SerpAPI (sous quota partagé), retourne les données JSON"""
+    UPSTREAM_QUOTAS["serpapi"].acquire()
+    return serpapi_client().search(params=dict(params)).data
+
+
+@lru_cache(maxsize=None)
+def http_session():
+    """🌐 Session HTTP partagée (API SNCF)"""
+    import requests
+
+    return _pooled(requests.Session())
+
+
+def sncf_get(url: str, **kwargs):
+    """🚆 Requête GET vers l'API SNCF (sous quota partagé)"""
+    UPSTREAM_QUOTAS["sncf"].acquire()
+    return http_session().get(url, **kwargs)
+
+
+def sncf_connect_search(searches: list) -> Optional[list]:
+    """
+    🚄 Recherches groupées sur le pool de navigateurs sncf-connect
+
+    Retourne None si le service n'est pas configuré (SNCF_CONNECT_URL).
+    """
+    base_url = os.environ.get("SNCF_CONNECT_URL")
+    if not base_url:
+        return None
+    response = http_session().post(
+        f"{base_url.rstrip('/')}/search",
+        json={"searches": searches},
+        timeout=float(os.environ.get("SNCF_CONNECT_TIMEOUT", "60")),
+    )
+    response.raise_for_status()
+    return response.json()["results"]
+
+
+@lru_cache(maxsize=None)
+def sendgrid_client():
+    """📧 Client SendGrid partagé"""
+    from sendgrid import SendGridAPIClient
+
+    return SendGridAPIClient(
+        os.environ.get("SENDGRID_API_KEY"),
+        host=os.environ.get("SENDGRID_HOST", "https://api.sendgrid.com"),
+    )
+
+
+@lru_cache(maxsize=None)
+def chat_model(model: str = "gpt-4o", temperature: float = 0.1):
+    """🧠 Modèle de chat OpenAI partagé, par couple (modèle, température)"""
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=model, temperature=temperature)
+
+
+def email_llm():
+    """✉️ Modèle utilisé pour la mise en forme des emails"""
+    return chat_model("gpt-4o", 0.1)
@@ -0,0 +1,130 @@
+import itertools
+import os
+import re
+import sys
+import threading
+from typing import Any, Dict, Optional
+from loguru import logger
+
+
+# 🔐 Clés de paramètres dont la valeur n'est jamais journalisée
+SECRET_PARAMS = {"api_key", "password", "authorization"}
+_SECRET_PATTERN = re.compile(
+    r"""(\b\w*(?:api_key|password|authorization)['"]?\s*[:=]\s*)(['"]?)(?:bearer\s+)?[^'",}&\s]+""",
+    re.IGNORECASE,
+)
+_BEARER_PATTERN = re.compile(r"\b(bearer\s+)[\w.~+/=-]+", re.IGNORECASE)
+
+# ⚙️ Réglages courants (modifiés par setup_logging)
+_settings = {
+    "mode": "plain",
+    "payload_limit": int(os.environ.get("LOG_PAYLOAD_LIMIT", "2000")),
+    "sample_every": 1,
+}
+_counters: Dict[str, itertools.count] = {}
+_counters_lock = threading.Lock()
+_secrets = []
+
+# 📊 Niveaux par sous-système du mode structuré (surchargés par LOG_LEVELS)
+DEFAULT_LEVELS = {
+    "": "INFO",
+    "agents.tools": "INFO",
+    "agents.tools.cache": "WARNING",
+    "agents.prefetch": "INFO",
+}
+
+
+def redact(params: Any) -> Any:
+    """🔐 Copie d'un dictionnaire de paramètres sans les valeurs secrètes"""
+    if isinstance(params, dict):
+        return {
+            k: "***" if str(k).lower() in SECRET_PARAMS else redact(v)
+            for k, v in params.items()
+        }
+    return params
+
+
+def cap(payload: Any, limit: Optional[int] = None) -> str:
+    """✂️ Représentation tronquée d'une charge utile volumineuse"""
+    limit = limit or _settings["payload_limit"]
+    text = payload if isinstance(payload, str) else repr(payload)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}… [{len(text) - limit} more chars]"
+
+
+def sampled(event: str) -> bool:
+    """🎲 Vrai pour un évènement verbeux sur `sample_every` (échantillonnage)"""
+    every = _settings["sample_every"]
+    if every <= 1:
+        return True
+    with _counters_lock:
+        counter = _counters.setdefault(event, itertools.count())
+    return next(counter) % every == 0
+
+
+def _scrub(message: str) -> str:
+    for secret in _secrets:
+        if secret in message:
+            message = message.replace(secret, "***")
+    lowered = message.lower()
+    if "api_key" in lowered or "password" in lowered or "authorization" in lowered:
+        message = _SECRET_PATTERN.sub(r"\1\2***", message)
+    if "bearer" in lowered:
+        message = _BEARER_PATTERN.sub(r"\1***", message)
+    return message
+
+
+def _redact_record(record: dict):
+    """Patcher loguru : masque les secrets restants dans le message"""
+    record["message"] = _scrub(record["message"])
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        if level:
+            levels[name.strip()] = level.strip().upper()
+        else:
+            levels[""] = name.strip().upper()
+    return levels
+
+
+def setup_logging(
+    mode: Optional[str] = None,
+    levels: Optional[Dict[str, str]] = None,
+    sink=sys.stderr,
+):
+    """
+    🪵 Configure la journalisation
+
+    - `plain` (défaut) : sortie loguru habituelle, secrets masqués
+    - `structured` : lignes JSON, niveaux par sous-système (LOG_LEVELS,
+      ex: "agents.tools=WARNING,agents.agent=DEBUG"), évènements verbeux
+      échantillonnés (LOG_SAMPLE_EVERY) et charges utiles tronquées
+      (LOG_PAYLOAD_LIMIT)
+
+    Le niveau minimal du handler est le plus bas des niveaux configurés :
+    les messages paresseux (`logger.opt(lazy=True)`) en dessous ne sont
+    jamais évalués.
+    """
+    mode = mode or os.environ.get("LOG_MODE", "plain")
+    _settings["mode"] = mode
+    _secrets[:] = [
+        value
+        for name, value in os.environ.items()
+        if name.endswith(("_API_KEY", "_KEY")) and value and len(value) >= 8
+    ]
+
+    logger.remove()
+    logger.configure(patcher=_redact_record)
+    if mode == "structured":
+        configured = {**DEFAULT_LEVELS, **(levels or {})}
+        configured.update(_parse_levels(os.environ.get("LOG_LEVELS", "")))
+        _settings["sample_every"] = int(os.environ.get("LOG_SAMPLE_EVERY", "20"))
+        min_level = min(logger.level(level).no for level in configured.values())
+        logger.add(sink, level=min_level, filter=configured, serialize=True)
+    else:
+        _settings["sample_every"] = 1
+        logger.add(sink, level=os.environ.get("LOG_LEVEL", "DEBUG"))
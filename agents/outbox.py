@@ -0,0 +1,420 @@
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.message import EmailMessage
+from functools import lru_cache
+from typing import List, Optional
+from loguru import logger
+
+from agents import clients
+
+
+# 📬 États d'un email dans la file d'envoi
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    thread_id TEXT,
+    from_email TEXT NOT NULL,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    html TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    sent_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+@dataclass(slots=True)
+class OutboundEmail:
+    """✉️ Email en attente d'envoi"""
+
+    id: int
+    thread_id: Optional[str]
+    from_email: str
+    to_email: str
+    subject: str
+    html: str
+    attempts: int
+    enqueued_at: float
+
+    @property
+    def recipients(self) -> List[str]:
+        return [r.strip() for r in self.to_email.split(",") if r.strip()]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+
+class Outbox:
+    """
+    📬 File d'envoi persistante (SQLite)
+
+    Un email est d'abord enregistré, puis réclamé par lot par un worker
+    (`sending`, avec un bail de `lease_seconds`) et enfin marqué envoyé,
+    reprogrammé ou en échec. La réclamation est atomique : plusieurs
+    processus peuvent partager le fichier sans envoyer deux fois le même
+    email. Un email dont le bail a expiré (worker arrêté brutalement) est
+    de nouveau réclamable ; au démarrage, ceux-là repassent en attente.
+    """
+
+    def __init__(self, path: str = ":memory:", lease_seconds: float = 300.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(outbox)")}
+            if "claimed_at" not in columns:
+                self._db.execute("ALTER TABLE outbox ADD COLUMN claimed_at REAL")
+            recovered = self._db.execute(
+                "UPDATE outbox SET status = ? WHERE status = ?"
+                " AND (claimed_at IS NULL OR claimed_at < ?)",
+                (PENDING, SENDING, time.time() - lease_seconds),
+            ).rowcount
+        if recovered:
+            logger.info(f"📬 Recovered {recovered} emails interrupted while sending")
+
+    def enqueue(
+        self, from_email: str, to_email: str, subject: str, html: str, thread_id: str = None
+    ) -> int:
+        """📥 Ajoute un email à la file et retourne son identifiant"""
+        now = time.time()
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (thread_id, from_email, to_email, subject, html,"
+                " status, enqueued_at, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, from_email, to_email, subject, html, PENDING, now, now),
+            )
+        return cursor.lastrowid
+
+    def claim(self, limit: int) -> List[OutboundEmail]:
+        """
+        📤 Réserve un lot d'emails dont l'envoi est dû (ou dont le bail a
+        expiré), en une seule écriture sous verrou exclusif
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            rows = self._db.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, claimed_at = ?"
+                " WHERE id IN (SELECT id FROM outbox WHERE (status = ?"
+                " AND next_attempt_at <= ?) OR (status = ? AND (claimed_at IS NULL"
+                " OR claimed_at < ?)) ORDER BY next_attempt_at LIMIT ?)"
+                " RETURNING id, thread_id, from_email, to_email, subject, html,"
+                " attempts, enqueued_at",
+                (SENDING, now, PENDING, now, SENDING, now - self.lease_seconds, limit),
+            ).fetchall()
+        return [OutboundEmail(*row) for row in sorted(rows)]
+
+    def mark_sent(self, email_id: int):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE outbox SET status = ?, sent_at = ?, last_error = NULL WHERE id = ?",
+                (SENT, time.time(), email_id),
+            )
+
+    def mark_retry(self, email_id: int, error: str, delay: float):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE outbox SET status = ?, next_attempt_at = ?, last_error = ?"
+                " WHERE id = ?",
+                (PENDING, time.time() + delay, error, email_id),
+            )
+
+    def mark_failed(self, email_id: int, error: str):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE outbox SET status = ?, last_error = ? WHERE id = ?",
+                (FAILED, error, email_id),
+            )
+
+    def status(self, email_id: int) -> Optional[dict]:
+        """🔎 État d'un email (statut, tentatives, dernière erreur)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, attempts, last_error, enqueued_at, sent_at FROM outbox"
+                " WHERE id = ?",
+                (email_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, attempts, last_error, enqueued_at, sent_at = row
+        return {
+            "status": status,
+            "attempts": attempts,
+            "last_error": last_error,
+            "latency_s": round(sent_at - enqueued_at, 3) if sent_at else None,
+        }
+
+    def stats(self, window: int = 1000) -> dict:
+        """📊 Emails par statut et latence de livraison (derniers envois)"""
+        with self._lock:
+            counts = dict(
+                self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+            )
+            latencies = [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT sent_at - enqueued_at FROM outbox WHERE status = ?"
+                    " ORDER BY sent_at DESC LIMIT ?",
+                    (SENT, window),
+                )
+            ]
+        return {
+            **{status: counts.get(status, 0) for status in (PENDING, SENDING, SENT, FAILED)},
+            "latency_p50_s": round(_percentile(latencies, 50), 3),
+            "latency_p95_s": round(_percentile(latencies, 95), 3),
+            "latency_max_s": round(max(latencies, default=0.0), 3),
+        }
+
+    def purge(self, older_than_seconds: float) -> int:
+        """🧹 Supprime les emails envoyés ou en échec plus anciens que le délai"""
+        with self._lock, self._db:
+            return self._db.execute(
+                "DELETE FROM outbox WHERE status IN (?, ?) AND enqueued_at < ?",
+                (SENT, FAILED, time.time() - older_than_seconds),
+            ).rowcount
+
+
+def _errors(send, emails: List[OutboundEmail]) -> List[Optional[str]]:
+    errors = []
+    for email in emails:
+        try:
+            send(email)
+            errors.append(None)
+        except Exception as e:
+            errors.append(str(e) or type(e).__name__)
+    return errors
+
+
+class SendGridTransport:
+    """📧 Envoi via l'API SendGrid (SENDGRID_HOST pour un bouchon local)"""
+
+    def send(self, email: OutboundEmail):
+        from sendgrid.helpers.mail import Mail
+
+        response = clients.sendgrid_client().send(
+            Mail(
+                from_email=email.from_email,
+                to_emails=email.recipients,
+                subject=email.subject,
+                html_content=email.html,
+            )
+        )
+        if response.status_code >= 300:
+            raise RuntimeError(f"SendGrid returned {response.status_code}")
+
+    def send_batch(self, emails: List[OutboundEmail]) -> List[Optional[str]]:
+        return _errors(self.send, emails)
+
+
+class SMTPTransport:
+    """📮 Envoi SMTP, une connexion par lot (serveur local possible pour les tests)"""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 25,
+        username: str = None,
+        password: str = None,
+        starttls: bool = False,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    @staticmethod
+    def _message(email: OutboundEmail) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = email.from_email
+        message["To"] = ", ".join(email.recipients)
+        message["Subject"] = email.subject
+        message.set_content("This email requires an HTML-capable client.")
+        message.add_alternative(email.html, subtype="html")
+        return message
+
+    def send_batch(self, emails: List[OutboundEmail]) -> List[Optional[str]]:
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+                return _errors(lambda e: smtp.send_message(self._message(e)), emails)
+        except (OSError, smtplib.SMTPException) as e:
+            return [f"SMTP connection failed: {e}"] * len(emails)
+
+
+class EmailSender:
+    """
+    📨 Pool d'envoi en arrière-plan
+
+    Les workers réclament les emails par lots, les confient au transport et
+    reprogramment les échecs avec un délai exponentiel (avec gigue) jusqu'à
+    `max_attempts` tentatives.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        transport,
+        workers: int = 2,
+        batch_size: int = 10,
+        max_attempts: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        poll_interval: float = 1.0,
+    ):
+        self.outbox = outbox
+        self.transport = transport
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempts: int) -> float:
+        """⏳ Délai avant la tentative suivante"""
+        delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+        return delay * random.uniform(0.5, 1.0)
+
+    def submit(
+        self, from_email: str, to_email: str, subject: str, html: str, thread_id: str = None
+    ) -> int:
+        """📥 Met un email en file et réveille un worker"""
+        email_id = self.outbox.enqueue(from_email, to_email, subject, html, thread_id)
+        self.start()
+        self._wake.set()
+        return email_id
+
+    def deliver_once(self) -> int:
+        """📤 Envoie un lot d'emails dus, retourne sa taille"""
+        with self._lock:
+            self._busy += 1
+        try:
+            batch = self.outbox.claim(self.batch_size)
+            if not batch:
+                return 0
+            for email, error in zip(batch, self.transport.send_batch(batch)):
+                if error is None:
+                    self.outbox.mark_sent(email.id)
+                    logger.info(
+                        f"📨 Email {email.id} delivered after {email.attempts} attempt(s)"
+                    )
+                elif email.attempts >= self.max_attempts:
+                    self.outbox.mark_failed(email.id, error)
+                    logger.error(f"❌ Email {email.id} failed for good: {error}")
+                else:
+                    delay = self.backoff(email.attempts)
+                    self.outbox.mark_retry(email.id, error, delay)
+                    logger.warning(
+                        f"⚠️ Email {email.id} attempt {email.attempts} failed ({error}),"
+                        f" retrying in {delay:.1f}s"
+                    )
+            return len(batch)
+        finally:
+            with self._lock:
+                self._busy -= 1
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.deliver_once()
+            except Exception as e:
+                logger.error(f"❌ Email sender error: {e}")
+                sent = 0
+            if not sent:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self):
+        """🚀 Démarre les workers (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._loop, name=f"email-sender-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self):
+        """🛑 Arrête les workers (les emails restent en file)"""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join()
+
+    def drain(self, timeout: float = 30) -> bool:
+        """⏳ Attend que la file soit vide (hors emails reprogrammés plus tard)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            stats = self.outbox.stats()
+            with self._lock:
+                busy = self._busy
+            if not stats[PENDING] and not stats[SENDING] and not busy:
+                return True
+            self._wake.set()
+            time.sleep(0.05)
+        return False
+
+    def stats(self) -> dict:
+        """📊 État de la file et latence de livraison"""
+        return self.outbox.stats()
+
+
+def transport_from_env():
+    """🔧 Transport choisi par EMAIL_TRANSPORT (sendgrid par défaut, ou smtp)"""
+    if os.environ.get("EMAIL_TRANSPORT", "sendgrid") == "smtp":
+        return SMTPTransport(
+            host=os.environ.get("SMTP_HOST", "localhost"),
+            port=int(os.environ.get("SMTP_PORT", "25")),
+            username=os.environ.get("SMTP_USERNAME"),
+            password=os.environ.get("SMTP_PASSWORD"),
+            starttls=os.environ.get("SMTP_STARTTLS", "false").lower() == "true",
+        )
+    return SendGridTransport()
+
+
+@lru_cache(maxsize=None)
+def email_queue() -> EmailSender:
+    """📨 File d'envoi du processus (EMAIL_OUTBOX_DB pour le fichier SQLite)"""
+    outbox = Outbox(os.environ.get("EMAIL_OUTBOX_DB", "email_outbox.db"))
+    outbox.purge(7 * 86400)
+    sender = EmailSender(outbox, transport_from_env())
+    sender.start()
+    return sender
@@ -0,0 +1,388 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import combinations, product
+from typing import Any, List, Optional, Sequence, Tuple
+import orjson
+from loguru import logger
+
+from agents.places import normalize_place, place_of, serves
+from agents.tools.models import Flight, Hotel, Train, trains_from_table
+
+
+# ⏱️ Temps minimum de correspondance entre deux trajets
+MIN_CONNECTION = timedelta(minutes=45)
+# ✂️ Nombre maximum d'options conservées par trajet après élagage
+MAX_OPTIONS_PER_LEG = 25
+MAX_HOTELS = 25
+
+# 🧰 Outils dont les résultats entrent dans les forfaits
+PACKAGE_TOOLS = ("flights_finder", "trains_finder", "hotels_finder")
+
+
+@dataclass(slots=True)
+class TransportOption:
+    """🚆 Option de transport normalisée (vol ou train)"""
+
+    kind: str
+    route: str
+    departure: datetime
+    arrival: datetime
+    duration_minutes: int
+    transfers: int
+    co2_grams: float
+    price: float
+    summary: Any = field(repr=False)
+    # Ville d'arrivée (ou code de l'aéroport / de la gare s'il est inconnu)
+    destination: Optional[str] = None
+
+
+@dataclass(slots=True)
+class HotelOption:
+    """🏨 Option d'hébergement normalisée"""
+
+    name: str
+    check_in: date
+    price: float
+    rating: float
+    summary: Hotel = field(repr=False)
+    # Lieu de la recherche d'hôtel (paramètre `q`)
+    location: Optional[str] = None
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return None
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _flight_option(flight: Flight, price: Optional[float], summary) -> Optional[TransportOption]:
+    departure = _parse_datetime(flight.departure_time)
+    arrival = _parse_datetime(flight.arrival_time)
+    if not departure or not arrival or price is None:
+        return None
+    return TransportOption(
+        kind="flight",
+        route=f"{flight.departure_airport}->{flight.arrival_airport}",
+        departure=departure,
+        arrival=arrival,
+        duration_minutes=flight.duration_minutes
+        or int((arrival - departure).total_seconds() // 60),
+        transfers=flight.stops,
+        co2_grams=flight.co2_grams or 0.0,
+        price=price,
+        summary=summary,
+        destination=place_of(flight.arrival_airport),
+    )
+
+
+def flight_options(result: dict) -> List[TransportOption]:
+    """✈️ Options de vol depuis un résultat de flights_finder"""
+    itineraries = (result.get("round_trip") or {}).get("itineraries") or []
+    if itineraries:
+        # Aller-retour résolu : on garde le vol aller au prix aller-retour réel
+        options = [
+            _flight_option(i["outbound"], _number(i.get("total_price")), i)
+            for i in itineraries
+        ]
+    else:
+        options = [
+            _flight_option(flight, flight.price, flight)
+            for flight in result.get("flights") or []
+        ]
+    return [option for option in options if option is not None]
+
+
+def train_options(result: dict) -> List[TransportOption]:
+    """🚄 Options de train depuis un résultat de trains_finder"""
+    options = []
+    search = result.get("search_parameters") or {}
+    for train in result.get("trains") or []:
+        departure = _parse_datetime(f"{train.date} {train.departure_time}")
+        if train.price is None or departure is None:
+            continue
+        options.append(
+            TransportOption(
+                kind="train",
+                route=f"{search.get('from')}->{search.get('to')}",
+                departure=departure,
+                arrival=departure + timedelta(minutes=train.duration_minutes),
+                duration_minutes=train.duration_minutes,
+                transfers=train.transfers,
+                co2_grams=train.co2_grams,
+                price=train.price,
+                summary=train,
+                destination=place_of(search.get("to")),
+            )
+        )
+    return options
+
+
+def hotel_options(result: dict) -> List[HotelOption]:
+    """🏨 Options d'hôtel depuis un résultat de hotels_finder"""
+    options = []
+    search = result.get("search_parameters") or {}
+    dates = search.get("dates") or {}
+    try:
+        check_in = date.fromisoformat(dates.get("check_in"))
+        nights = max((date.fromisoformat(dates.get("check_out")) - check_in).days, 1)
+    except (TypeError, ValueError):
+        return options
+
+    for hotel in result.get("hotels") or []:
+        price = hotel.total_rate
+        if price is None and hotel.rate_per_night is not None:
+            price = hotel.rate_per_night * nights
+        if price is None:
+            continue
+        options.append(
+            HotelOption(
+                name=hotel.name,
+                check_in=check_in,
+                price=price,
+                rating=hotel.overall_rating or 0.0,
+                summary=hotel,
+                location=search.get("location"),
+            )
+        )
+    return options
+
+
+def _dominates(a: Sequence[float], b: Sequence[float]) -> bool:
+    return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
+
+
+def pareto_front(items: list, key) -> list:
+    """
+    📐 Front de Pareto (minimisation de tous les objectifs de `key`)
+
+    Les éléments sont parcourus par premier objectif croissant : un élément
+    ne peut être dominé que par un élément déjà retenu.
+    """
+    front: List[Tuple[tuple, object]] = []
+    for item in sorted(items, key=key):
+        objectives = key(item)
+        if not any(_dominates(kept, objectives) or kept == objectives for kept, _ in front):
+            front.append((objectives, item))
+    return [item for _, item in front]
+
+
+def _spread(front: list, key, limit: int) -> list:
+    """
+    🎯 Au plus `limit` éléments d'un front, pris à tour de rôle parmi les
+    meilleurs de chaque objectif (et non les `limit` moins chers)
+    """
+    if len(front) <= limit:
+        return front
+    rankings = [
+        sorted(front, key=lambda item, i=i: key(item)[i])
+        for i in range(len(key(front[0])))
+    ]
+    kept, seen = [], set()
+    for rank in range(len(front)):
+        for ranking in rankings:
+            item = ranking[rank]
+            if id(item) not in seen:
+                seen.add(id(item))
+                kept.append(item)
+                if len(kept) == limit:
+                    return kept
+    return kept
+
+
+def _prune_leg(options: List[TransportOption], chained_after: bool, chained_before: bool) -> List[TransportOption]:
+    """
+    ✂️ Élague un trajet à son front de Pareto
+
+    Les horaires font partie des objectifs dès qu'ils conditionnent une
+    correspondance (arrivée tôt, départ tard) ; sinon seule la date
+    d'arrivée compte pour la compatibilité avec l'hôtel. Un front de plus de
+    MAX_OPTIONS_PER_LEG options est réduit en gardant tour à tour les
+    meilleures sur chaque objectif : les forfaits extrêmes (moins cher, plus
+    rapide...) restent trouvés, mais des compromis optimaux peuvent être
+    écartés.
+    """
+
+    def key(o: TransportOption):
+        arrival = o.arrival.timestamp() if chained_after else o.arrival.date().toordinal()
+        departure = -o.departure.timestamp() if chained_before else 0
+        return (o.price, o.duration_minutes, o.transfers, o.co2_grams, arrival, departure)
+
+    return _spread(pareto_front(options, key), key, MAX_OPTIONS_PER_LEG)
+
+
+def _chains(legs: List[List[TransportOption]]):
+    """Combinaisons de trajets respectant les temps de correspondance"""
+    for combo in product(*legs):
+        if all(
+            prev.arrival + MIN_CONNECTION <= nxt.departure
+            for prev, nxt in zip(combo, combo[1:])
+        ):
+            yield combo
+
+
+def _package(combo: Tuple[TransportOption, ...], hotel: HotelOption) -> dict:
+    door_to_door = int((combo[-1].arrival - combo[0].departure).total_seconds() // 60)
+    return {
+        "total_price": round(sum(o.price for o in combo) + hotel.price, 2),
+        "door_to_door_minutes": door_to_door,
+        "transfers": sum(o.transfers for o in combo) + len(combo) - 1,
+        "co2_kg": round(sum(o.co2_grams for o in combo) / 1000, 1),
+        "hotel_rating": hotel.rating,
+        "legs": [
+            {
+                "mode": o.kind,
+                "route": o.route,
+                "departure": o.departure.strftime("%Y-%m-%d %H:%M"),
+                "arrival": o.arrival.strftime("%Y-%m-%d %H:%M"),
+                "price": o.price,
+                "details": o.summary,
+            }
+            for o in combo
+        ],
+        "hotel": {
+            "name": hotel.name,
+            "check_in": hotel.check_in.isoformat(),
+            "price": hotel.price,
+            "property_token": hotel.summary.property_token,
+            "link": hotel.summary.link,
+        },
+    }
+
+
+def build_packages(
+    transports: List[TransportOption], hotels: List[HotelOption], top_n: int = 5
+) -> List[dict]:
+    """
+    🧳 Combine vols, trains et hôtels en forfaits Pareto-optimaux
+
+    Objectifs : prix total, temps porte-à-porte, correspondances, CO2 et
+    note de l'hôtel. Les trajets sont regroupés par itinéraire et enchaînés
+    dans l'ordre chronologique. Chaque hôtel est combiné aux plus longs
+    enchaînements d'itinéraires possibles qui arrivent dans sa ville : un
+    itinéraire sans correspondance possible est ignoré plutôt que de faire
+    retomber les autres en alternatives isolées. Le dernier trajet doit
+    arriver au plus tard le jour du check-in.
+    """
+    if not transports or not hotels:
+        return []
+
+    routes = {}
+    for option in transports:
+        routes.setdefault((option.kind, option.route), []).append(option)
+    ordered = sorted(routes.values(), key=lambda opts: min(o.departure for o in opts))
+
+    # Front de Pareto des hôtels par lieu de recherche (ils ne se comparent
+    # pas d'une ville à l'autre)
+    by_location = {}
+    for hotel in hotels:
+        by_location.setdefault(normalize_place(hotel.location), []).append(hotel)
+    hotels = [
+        hotel
+        for group in by_location.values()
+        for hotel in pareto_front(
+            group, key=lambda h: (h.price, -h.rating, -h.check_in.toordinal())
+        )[:MAX_HOTELS]
+    ]
+
+    # Élagage selon la position du trajet dans l'enchaînement
+    pruned = {}
+
+    def prune(index, after, before):
+        if (index, after, before) not in pruned:
+            pruned[index, after, before] = _prune_leg(
+                ordered[index], chained_after=after, chained_before=before
+            )
+        return pruned[index, after, before]
+
+    def candidates(indexes, hotels):
+        legs = [
+            prune(index, after=i < len(indexes) - 1, before=i > 0)
+            for i, index in enumerate(indexes)
+        ]
+        for combo in _chains(legs):
+            for hotel in hotels:
+                if combo[-1].arrival.date() <= hotel.check_in and serves(
+                    combo[-1].destination, hotel.location
+                ):
+                    yield combo, hotel
+
+    # Sous-suites d'itinéraires, des plus longues aux plus courtes : un hôtel
+    # déjà atteint par un enchaînement plus long n'est plus proposé seul
+    packages, reached = [], set()
+    for size in range(len(ordered), 0, -1):
+        pending = [hotel for hotel in hotels if id(hotel) not in reached]
+        if not pending:
+            break
+        found = [
+            package
+            for indexes in combinations(range(len(ordered)), size)
+            for package in candidates(indexes, pending)
+        ]
+        reached.update(id(hotel) for _, hotel in found)
+        packages.extend(found)
+
+    def objectives(package):
+        combo, hotel = package
+        return (
+            sum(o.price for o in combo) + hotel.price,
+            (combo[-1].arrival - combo[0].departure).total_seconds(),
+            sum(o.transfers for o in combo) + len(combo) - 1,
+            sum(o.co2_grams for o in combo),
+            -hotel.rating,
+        )
+
+    front = pareto_front(packages, key=objectives)
+    logger.info(
+        f"🧳 {len(front)} Pareto-optimal packages out of {len(packages)} combinations"
+    )
+    return [_package(combo, hotel) for combo, hotel in front[:top_n]]
+
+
+def result_from_json(content: str) -> Optional[dict]:
+    """
+    ♻️ Résultat d'outil relu depuis un ToolMessage (JSON), avec ses listes de
+    vols, hôtels et trains reconstruites en modèles
+    """
+    try:
+        result = orjson.loads(content)
+        if not isinstance(result, dict):
+            return None
+        if isinstance(result.get("trains"), dict):
+            result["trains"] = trains_from_table(result["trains"])
+        for key, model in (("flights", Flight), ("hotels", Hotel), ("trains", Train)):
+            if key in result:
+                result[key] = [
+                    item if isinstance(item, model) else model(**item)
+                    for item in result[key] or []
+                ]
+        for itinerary in (result.get("round_trip") or {}).get("itineraries") or []:
+            itinerary["outbound"] = Flight(**itinerary["outbound"])
+        return result
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def packages_from_results(results: List[Tuple[str, dict]], top_n: int = 5) -> List[dict]:
+    """
+    🧳 Construit les forfaits à partir des résultats des outils (ceux des tours
+    précédents du thread compris)
+    """
+    transports, hotels = [], []
+    for name, result in results:
+        if not isinstance(result, dict) or result.get("status") != "success":
+            continue
+        if name == "flights_finder":
+            transports.extend(flight_options(result))
+        elif name == "trains_finder":
+            transports.extend(train_options(result))
+        elif name == "hotels_finder":
+            hotels.extend(hotel_options(result))
+    return build_packages(transports, hotels, top_n)
@@ -0,0 +1,85 @@
+import re
+import unicodedata
+from typing import Optional
+
+
+# ✈️ Ville desservie par les principaux aéroports (hôtel prédit, forfaits)
+AIRPORT_CITIES = {
+    "CDG": "Paris",
+    "ORY": "Paris",
+    "BVA": "Paris",
+    "LYS": "Lyon",
+    "MRS": "Marseille",
+    "NCE": "Nice",
+    "TLS": "Toulouse",
+    "BOD": "Bordeaux",
+    "NTE": "Nantes",
+    "LIL": "Lille",
+    "SXB": "Strasbourg",
+    "MPL": "Montpellier",
+    "FCO": "Rome",
+    "CIA": "Rome",
+    "MXP": "Milan",
+    "LIN": "Milan",
+    "VCE": "Venice",
+    "LHR": "London",
+    "LGW": "London",
+    "STN": "London",
+    "MAD": "Madrid",
+    "BCN": "Barcelona",
+    "LIS": "Lisbon",
+    "AMS": "Amsterdam",
+    "BRU": "Brussels",
+    "FRA": "Frankfurt",
+    "MUC": "Munich",
+    "BER": "Berlin",
+    "VIE": "Vienna",
+    "ZRH": "Zurich",
+    "GVA": "Geneva",
+    "ATH": "Athens",
+    "DUB": "Dublin",
+    "PRG": "Prague",
+    "CPH": "Copenhagen",
+    "JFK": "New York",
+    "EWR": "New York",
+    "LGA": "New York",
+}
+
+# 🚉 Code INSEE des grandes villes françaises (format attendu par trains_finder)
+FRENCH_CITY_CODES = {
+    "Paris": "75056",
+    "Lyon": "69123",
+    "Marseille": "13055",
+    "Nice": "06088",
+    "Toulouse": "31555",
+    "Bordeaux": "33063",
+    "Nantes": "44109",
+    "Lille": "59350",
+    "Strasbourg": "67482",
+    "Montpellier": "34172",
+}
+
+# 🔁 Ville d'un code INSEE (résultats de trains_finder)
+CITY_OF_CODE = {code: city for city, code in FRENCH_CITY_CODES.items()}
+
+
+def normalize_place(text: str) -> str:
+    """🔤 Nom de lieu sans accents ni casse ("Genève" -> "geneve")"""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def place_of(code: Optional[str]) -> Optional[str]:
+    """📍 Ville d'un code d'aéroport IATA ou INSEE (le code lui-même sinon)"""
+    if not code:
+        return None
+    code = str(code).strip()
+    return AIRPORT_CITIES.get(code.upper()) or CITY_OF_CODE.get(code) or code
+
+
+def serves(destination: Optional[str], location: Optional[str]) -> bool:
+    """🎯 Vrai si `location` (recherche d'hôtel) désigne la ville `destination`"""
+    if not destination or not location:
+        return False
+    pattern = rf"\b{re.escape(normalize_place(destination))}\b"
+    return re.search(pattern, normalize_place(location)) is not None
@@ -0,0 +1,168 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+from loguru import logger
+
+from agents.places import AIRPORT_CITIES, FRENCH_CITY_CODES
+from agents.quota import UPSTREAM_QUOTAS, low_priority
+from agents.tools.cache import ORIGIN_PREFETCH, RESULT_CACHE
+from agents.tools.registry import TOOL_SPECS
+
+
+def _params(call: dict) -> dict:
+    params = (call.get("args") or {}).get("params")
+    return params if isinstance(params, dict) else {}
+
+
+def predict_hotels_after_flight(call: dict, calls: List[dict]) -> List[dict]:
+    """🏨 Un aller-retour vers une ville appelle une recherche d'hôtel sur place"""
+    params = _params(call)
+    city = AIRPORT_CITIES.get(str(params.get("arrival_airport", "")).upper())
+    if not city or not params.get("outbound_date") or not params.get("return_date"):
+        return []
+    if any(c["name"] == "hotels_finder" for c in calls):
+        return []
+    return [
+        {
+            "name": "hotels_finder",
+            "args": {
+                "params": {
+                    "q": city,
+                    "check_in_date": params.get("outbound_date"),
+                    "check_out_date": params.get("return_date"),
+                    "adults": params.get("adults", 1),
+                }
+            },
+        }
+    ]
+
+
+def predict_train_leg_after_flight(call: dict, calls: List[dict]) -> List[dict]:
+    """🚄 Un vol vers une ville française et un hôtel dans une autre appellent un train"""
+    params = _params(call)
+    arrival_city = AIRPORT_CITIES.get(str(params.get("arrival_airport", "")).upper())
+    if arrival_city not in FRENCH_CITY_CODES or not params.get("outbound_date"):
+        return []
+    if any(c["name"] == "trains_finder" for c in calls):
+        return []
+
+    predictions = []
+    for other in calls:
+        if other["name"] != "hotels_finder":
+            continue
+        hotel_city = str(_params(other).get("q", "")).strip().title()
+        if hotel_city in FRENCH_CITY_CODES and hotel_city != arrival_city:
+            predictions.append(
+                {
+                    "name": "trains_finder",
+                    "args": {
+                        "params": {
+                            "origin_city": FRENCH_CITY_CODES[arrival_city],
+                            "destination_city": FRENCH_CITY_CODES[hotel_city],
+                            "departure_date": params.get("outbound_date"),
+                        }
+                    },
+                }
+            )
+    return predictions
+
+
+# 🔮 Règles de prédiction par outil appelé
+PREDICTORS: Dict[str, List[Callable[[dict, List[dict]], List[dict]]]] = {
+    "flights_finder": [predict_hotels_after_flight, predict_train_leg_after_flight],
+}
+
+
+class Prefetcher:
+    """
+    🔮 Préchargement spéculatif des recherches complémentaires
+
+    À partir des appels d'outils du tour courant, prédit les appels probables
+    du tour suivant et les exécute en arrière-plan (un seul worker, file
+    bornée) pour remplir le cache partagé avant que le LLM ne les demande.
+    Les appels passent en basse priorité sur le quota amont partagé.
+    """
+
+    def __init__(self, tools: dict, prepare: Callable[[dict], None], max_pending: int = 4):
+        self._tools = tools
+        self._prepare = prepare
+        self._max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stats = {
+            "predicted": 0,
+            "issued": 0,
+            "skipped": 0,
+            "throttled": 0,
+            "failed": 0,
+        }
+
+    @staticmethod
+    def _signature(call: dict) -> str:
+        return json.dumps([call["name"], call["args"]], sort_keys=True, default=str)
+
+    def predict(self, calls: List[dict]) -> List[dict]:
+        """🔮 Prédit les appels d'outils suivants à partir des appels courants"""
+        issued = {self._signature(c) for c in calls}
+        predictions = []
+        for call in calls:
+            for predictor in PREDICTORS.get(call.get("name"), []):
+                try:
+                    predicted_calls = predictor(call, calls)
+                except Exception as e:
+                    logger.warning(f"⚠️ {predictor.__name__} skipped: {e}")
+                    continue
+                for predicted in predicted_calls:
+                    self._prepare(predicted)
+                    signature = self._signature(predicted)
+                    if signature not in issued:
+                        issued.add(signature)
+                        predictions.append(predicted)
+        return predictions
+
+    def schedule(self, calls: List[dict]):
+        """🚀 Lance en tâche de fond les appels prédits"""
+        for predicted in self.predict(calls):
+            signature = self._signature(predicted)
+            with self._lock:
+                self._stats["predicted"] += 1
+                if (
+                    signature in self._pending
+                    or len(self._pending) >= self._max_pending
+                    or predicted["name"] not in self._tools
+                ):
+                    self._stats["skipped"] += 1
+                    continue
+                # Pas de jeton hors réserve : le quota reste aux utilisateurs
+                quota = UPSTREAM_QUOTAS[TOOL_SPECS[predicted["name"]].upstream]
+                if not quota.has_capacity(low=True):
+                    self._stats["throttled"] += 1
+                    continue
+                self._pending.add(signature)
+                self._stats["issued"] += 1
+            logger.info(f"🔮 Prefetching {predicted['name']}")
+            self._executor.submit(self._run, predicted, signature)
+
+    def _run(self, call: dict, signature: str):
+        try:
+            with RESULT_CACHE.origin(ORIGIN_PREFETCH), low_priority():
+                self._tools[call["name"]].invoke(call["args"])
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetch of {call['name']} failed: {e}")
+            with self._lock:
+                self._stats["failed"] += 1
+        finally:
+            with self._lock:
+                self._pending.discard(signature)
+
+    def stats(self) -> dict:
+        """📊 Statistiques de préchargement (taux de succès et appels gaspillés)"""
+        with self._lock:
+            stats = dict(self._stats)
+        cache_stats = RESULT_CACHE.stats()
+        stats["hits"] = cache_stats["prefetch_hits"]
+        stats["wasted"] = cache_stats["prefetch_wasted"]
+        stats["hit_ratio"] = cache_stats["prefetch_hit_ratio"]
+        return stats
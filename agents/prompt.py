@@ -0,0 +1,144 @@
+import datetime
+import json
+import threading
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from langchain_core.messages import AIMessage, SystemMessage
+from loguru import logger
+
+# 🧱 Prompt système en deux blocs : un préfixe statique (instructions, après
+# les schémas d'outils) identique octet pour octet pour tous les appels, donc
+# mis en cache côté fournisseur, puis un bloc de session (date, préférences,
+# devise, limites) placé après lui.
+
+# 🤖 Instructions pour la recherche de vols et hôtels (sans rien de variable)
+STATIC_INSTRUCTIONS = """You are a smart travel agency. Use the tools to look up information.
+    You are allowed to make multiple calls (either together or in sequence).
+    Only look up information when you are sure of what you want.
+    The current date is given in the session context, but be carefull if someone wants informations for january and we are on december maybe its for the next year
+    If you need to look up some information before asking a follow up question, you are allowed to do that!
+    hotels_finder returns short hotel summaries; call hotel_details with their property_token only for the hotels the user wants to know more about.
+    I want to have in your output links to hotels websites and flights websites (if possible).
+    I want to have as well the logo of the hotel and the logo of the airline company (if possible).
+    When a tool result includes "packages", they are the best flight/train + hotel combinations already computed for you: present those first.
+    In your output always include the price of the flight and the price of the hotel and the currency as well (if possible).
+    for example for hotels-
+    Rate: $581 per night
+    Total: $3,488
+    """
+
+# 🔢 Estimation (caractères par jeton) si l'encodage tiktoken est indisponible
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """🔤 Encodage tiktoken du modèle (None s'il ne peut pas être chargé)"""
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"⚠️ tiktoken encoding unavailable ({e}), estimating tokens")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """🔢 Nombre de jetons d'un texte pour le modèle"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def static_prefix_tokens(tool_schemas: List[dict], model: str = "gpt-4o") -> dict:
+    """🧱 Taille du préfixe statique : schémas d'outils et instructions"""
+    tools = count_tokens(json.dumps(tool_schemas, sort_keys=True), model)
+    instructions = count_tokens(STATIC_INSTRUCTIONS, model)
+    return {"tools": tools, "instructions": instructions, "total": tools + instructions}
+
+
+@lru_cache(maxsize=256)
+def session_prompt(
+    today: datetime.date,
+    currency: str,
+    max_hotels: int,
+    max_flights: int,
+    preferences: Tuple[str, ...] = (),
+    budget: int = 256,
+    model: str = "gpt-4o",
+) -> str:
+    """
+    🧑‍💼 Bloc de session : date, devise, limites puis préférences
+
+    Les préférences qui dépassent le budget de jetons sont écartées (la date,
+    la devise et les limites sont toujours présentes).
+    """
+    lines = [
+        f"Session context - current date: {today.isoformat()} ({today:%A})",
+        f"Preferred currency: {currency}",
+        f"Search limits: up to {max_hotels} hotels and {max_flights} flights",
+    ]
+    kept = []
+    for preference in preferences:
+        candidate = "\n".join(
+            lines + [f"Travel preferences: {', '.join(kept + [preference])}"]
+        )
+        if count_tokens(candidate, model) > budget:
+            logger.warning(
+                f"⚠️ Session prompt over {budget} tokens, "
+                f"{len(preferences) - len(kept)} preferences dropped"
+            )
+            break
+        kept.append(preference)
+    if kept:
+        lines.append(f"Travel preferences: {', '.join(kept)}")
+    return "\n".join(lines)
+
+
+def system_messages(session: str) -> List[SystemMessage]:
+    """📜 Messages système : préfixe statique puis bloc de session"""
+    return [SystemMessage(content=STATIC_INSTRUCTIONS), SystemMessage(content=session)]
+
+
+class PromptStats:
+    """📊 Jetons de prompt et succès du cache de préfixe, par appel (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._stats = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "hits": 0}
+
+    def record(self, message: AIMessage) -> Optional[dict]:
+        """Relève l'usage d'une réponse (None si le fournisseur ne le donne pas)"""
+        usage = (message.response_metadata or {}).get("token_usage") or {}
+        if "prompt_tokens" not in usage:
+            return None
+        prompt = usage["prompt_tokens"] or 0
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["prompt_tokens"] += prompt
+            self._stats["cached_tokens"] += cached
+            self._stats["hits"] += cached > 0
+        return {"prompt_tokens": prompt, "cached_tokens": cached}
+
+    def stats(self) -> dict:
+        """📊 Taux de succès (appels) et part des jetons servis par le cache"""
+        with self._lock:
+            stats = dict(self._stats)
+        calls, prompt = stats["calls"], stats["prompt_tokens"]
+        stats["hit_rate"] = round(stats["hits"] / calls, 4) if calls else 0.0
+        stats["cached_share"] = (
+            round(stats["cached_tokens"] / prompt, 4) if prompt else 0.0
+        )
+        return stats
+
+
+# 🌍 Statistiques partagées par toutes les sessions du processus
+PROMPT_STATS = PromptStats()
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class QuotaExceeded(RuntimeError):
+    """⛔ Quota amont épuisé (ou réservé aux requêtes utilisateur)"""
+
+
+_local = threading.local()
+
+
+@contextmanager
+def low_priority():
+    """🐢 Les appels amont du thread courant passent après les requêtes utilisateur"""
+    previous = getattr(_local, "low", False)
+    _local.low = True
+    try:
+        yield
+    finally:
+        _local.low = previous
+
+
+def is_low_priority() -> bool:
+    return getattr(_local, "low", False)
+
+
+class TokenBucket:
+    """
+    🪣 Quota d'appels vers une API amont (seau à jetons)
+
+    Les requêtes utilisateur attendent un jeton (au plus `timeout` secondes).
+    Les tâches de fond (préchargement, préchauffage) ne prennent un jeton que
+    s'il en reste au-delà de la réserve (`low_priority_reserve` × `burst`) et
+    n'attendent jamais : elles ne retardent pas les utilisateurs.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: float,
+        burst: int,
+        low_priority_reserve: float = 0.5,
+        timeout: float = 30.0,
+    ):
+        self.rate = calls_per_minute / 60.0
+        self.burst = burst
+        self.reserve = burst * low_priority_reserve
+        self.timeout = timeout
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {"granted": 0, "granted_low": 0, "denied_low": 0, "waited": 0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def has_capacity(self, low: bool = False) -> bool:
+        """🔎 Indique si un appel passerait maintenant, sans consommer de jeton"""
+        with self._lock:
+            self._refill()
+            return self._tokens - 1 >= (self.reserve if low else 0)
+
+    def acquire(self, low: bool = None):
+        """🎟️ Consomme un jeton (lève QuotaExceeded si impossible)"""
+        low = is_low_priority() if low is None else low
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens - 1 >= (self.reserve if low else 0):
+                    self._tokens -= 1
+                    self._stats["granted_low" if low else "granted"] += 1
+                    self._stats["waited"] += waited
+                    return
+                if low:
+                    self._stats["denied_low"] += 1
+                    raise QuotaExceeded("upstream quota reserved for user requests")
+                wait = (1 - self._tokens) / self.rate if self.rate else self.timeout
+            if time.monotonic() + wait > deadline:
+                raise QuotaExceeded("upstream quota exhausted")
+            waited = True
+            time.sleep(wait)
+
+    def stats(self) -> dict:
+        """📊 Jetons disponibles et appels accordés / refusés"""
+        with self._lock:
+            self._refill()
+            stats = dict(self._stats)
+            stats["tokens"] = round(self._tokens, 2)
+        return stats
+
+
+def _bucket(name: str, default_per_minute: int) -> TokenBucket:
+    per_minute = float(os.environ.get(f"{name}_CALLS_PER_MINUTE", default_per_minute))
+    burst = int(os.environ.get(f"{name}_BURST", max(int(per_minute // 6), 4)))
+    return TokenBucket(per_minute, burst)
+
+
+# 🌍 Quotas partagés par tous les appels amont du processus
+UPSTREAM_QUOTAS = {
+    "serpapi": _bucket("SERPAPI", 60),
+    "sncf": _bucket("SNCF", 120),
+}
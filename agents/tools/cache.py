@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+from loguru import logger
+
+
+# 🧭 Origine des écritures dans le cache (requête utilisateur, préchargement
+# spéculatif ou préchauffage des recherches populaires)
+ORIGIN_DEMAND = "demand"
+ORIGIN_PREFETCH = "prefetch"
+ORIGIN_WARM = "warm"
+SPECULATIVE_ORIGINS = (ORIGIN_PREFETCH, ORIGIN_WARM)
+
+# 🔐 Paramètres exclus de la clé de cache
+_KEY_EXCLUDED_PARAMS = {"api_key"}
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "origin", "hits")
+
+    def __init__(self, value: Any, expires_at: float, origin: str):
+        self.value = value
+        self.expires_at = expires_at
+        self.origin = origin
+        self.hits = 0
+
+
+class ResultCache:
+    """
+    💾 Cache TTL partagé pour les réponses des API amont (SerpAPI, SNCF)
+
+    Chaque entrée garde son origine afin de mesurer l'efficacité du
+    préchargement et du préchauffage : une entrée spéculative consultée au
+    moins une fois est un succès, une entrée spéculative expirée ou évincée
+    sans consultation est un appel gaspillé.
+    """
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._inflight: dict = {}
+        self._stats = {"hits": 0, "misses": 0}
+        for origin in SPECULATIVE_ORIGINS:
+            for counter in ("stored", "hits", "wasted"):
+                self._stats[f"{origin}_{counter}"] = 0
+
+    @staticmethod
+    def make_key(namespace: str, params: dict) -> str:
+        """🔑 Construit une clé stable à partir des paramètres de recherche"""
+        filtered = {
+            k: v
+            for k, v in params.items()
+            if k not in _KEY_EXCLUDED_PARAMS and v is not None
+        }
+        return f"{namespace}:{json.dumps(filtered, sort_keys=True, default=str)}"
+
+    @contextmanager
+    def origin(self, origin: str):
+        """🏷️ Marque les écritures du thread courant avec une origine donnée"""
+        previous = getattr(self._local, "origin", ORIGIN_DEMAND)
+        self._local.origin = origin
+        try:
+            yield
+        finally:
+            self._local.origin = previous
+
+    def _current_origin(self) -> str:
+        return getattr(self._local, "origin", ORIGIN_DEMAND)
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        if entry.origin in SPECULATIVE_ORIGINS and entry.hits == 0:
+            self._stats[f"{entry.origin}_wasted"] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """📥 Retourne la valeur en cache ou None si absente/expirée"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._drop(key)
+                entry = None
+            # Seules les lectures à la demande comptent dans les statistiques
+            on_demand = self._current_origin() == ORIGIN_DEMAND
+            if entry is None:
+                if on_demand:
+                    self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if on_demand:
+                self._stats["hits"] += 1
+                if entry.origin in SPECULATIVE_ORIGINS and entry.hits == 0:
+                    self._stats[f"{entry.origin}_hits"] += 1
+                entry.hits += 1
+            return entry.value
+
+    def contains(self, key: str) -> bool:
+        """🔎 Vérifie la présence d'une entrée valide sans toucher aux statistiques"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.expires_at > time.monotonic()
+
+    def set(self, key: str, value: Any):
+        """📤 Enregistre une valeur avec l'origine du thread courant"""
+        origin = self._current_origin()
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(
+                value, time.monotonic() + self.ttl_seconds, origin
+            )
+            if origin in SPECULATIVE_ORIGINS:
+                self._stats[f"{origin}_stored"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        ⚡ Retourne la valeur en cache ou l'obtient via `fetch` et la stocke
+
+        Un seul appel amont est émis par clé : les appelants concurrents
+        (par exemple une requête utilisateur pendant un préchargement)
+        attendent le résultat du premier.
+        """
+        while True:
+            value = self.get(key)
+            if value is not None:
+                logger.debug("💾 Cache hit: {:.80}", key)
+                return value
+
+            with self._lock:
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+
+            if not owner:
+                pending.wait()
+                if self.contains(key):
+                    continue
+                # Le premier appel a échoué : on retente pour notre compte
+                return fetch()
+
+            try:
+                value = fetch()
+                if value:
+                    self.set(key, value)
+                return value
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                pending.set()
+
+    def stats(self) -> dict:
+        """📊 Statistiques du cache, du préchargement et du préchauffage"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        for origin in SPECULATIVE_ORIGINS:
+            stored = stats[f"{origin}_stored"]
+            stats[f"{origin}_hit_ratio"] = (
+                stats[f"{origin}_hits"] / stored if stored else 0.0
+            )
+        return stats
+
+    def clear(self):
+        """🧹 Vide le cache et remet les statistiques à zéro"""
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+# 🌍 Cache partagé par tous les outils
+RESULT_CACHE = ResultCache()
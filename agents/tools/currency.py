@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from typing import Iterable, List, Optional
+from loguru import logger
+
+
+# 💶 Devise canonique des recherches amont et du cache
+CANONICAL_CURRENCY = "EUR"
+
+# 📄 Table de taux locale (remplaçable via FX_RATES_FILE)
+DEFAULT_RATES_FILE = os.path.join(os.path.dirname(__file__), "fx_rates.json")
+
+# 🪙 Unités mineures renvoyées par certaines API (ex: navitia/SNCF)
+MINOR_UNITS = {"CENTIME": ("EUR", 100), "CENT": ("EUR", 100)}
+
+
+class FXRates:
+    """
+    💱 Table de taux de change locale avec rafraîchissement périodique
+
+    Les taux sont exprimés en unités de devise pour 1 unité de la devise de
+    base du fichier. La table est relue depuis le fichier lorsque le délai
+    de rafraîchissement est écoulé ; en cas d'échec on garde la précédente.
+    """
+
+    def __init__(self, path: str = DEFAULT_RATES_FILE, refresh_seconds: float = 6 * 3600):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._rates = {CANONICAL_CURRENCY: 1.0}
+        self._updated_at = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """🔄 Recharge la table de taux depuis le fichier"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+            raw = {k.upper(): float(v) for k, v in payload["rates"].items()}
+            base_rate = raw[CANONICAL_CURRENCY]
+            rates = {k: v / base_rate for k, v in raw.items()}
+        except Exception as e:
+            logger.warning(f"⚠️ Could not refresh FX rates from {self.path}: {e}")
+            with self._lock:
+                self._loaded_at = time.monotonic()
+            return
+
+        with self._lock:
+            self._rates = rates
+            self._updated_at = payload.get("updated_at")
+            self._loaded_at = time.monotonic()
+        logger.info(f"💱 FX rates loaded ({len(rates)} currencies, {self._updated_at})")
+
+    def _ensure_fresh(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_seconds:
+            self.refresh()
+
+    def supports(self, currency: str) -> bool:
+        """✅ Indique si la devise est présente dans la table"""
+        self._ensure_fresh()
+        return str(currency).upper() in self._rates
+
+    def resolve(self, currency: Optional[str]) -> str:
+        """🎯 Retourne la devise d'affichage (canonique si inconnue)"""
+        currency = (currency or CANONICAL_CURRENCY).upper()
+        if self.supports(currency):
+            return currency
+        logger.warning(f"⚠️ Unknown currency {currency}, using {CANONICAL_CURRENCY}")
+        return CANONICAL_CURRENCY
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """📈 Taux de conversion entre deux devises"""
+        self._ensure_fresh()
+        rates = self._rates
+        return rates[to_currency.upper()] / rates[from_currency.upper()]
+
+    def convert(self, amount, from_currency: str, to_currency: str) -> Optional[float]:
+        """💱 Convertit un montant (None si le montant n'est pas numérique)"""
+        try:
+            amount = float(amount)
+        except (TypeError, ValueError):
+            return None
+        unit = MINOR_UNITS.get(str(from_currency).upper())
+        if unit:
+            from_currency, divisor = unit
+            amount /= divisor
+        return round(amount * self.rate(from_currency, to_currency), 2)
+
+
+# 🌍 Table partagée par tous les outils
+FX_RATES = FXRates(os.environ.get("FX_RATES_FILE", DEFAULT_RATES_FILE))
+
+
+def format_price(amount: Optional[float], currency: str) -> str:
+    """💰 Formate un montant converti"""
+    if amount is None:
+        return "N/A"
+    return f"{amount:.2f} {currency}"
+
+
+def _convert_rate_block(block: dict, rate: float, currency: str) -> dict:
+    """Convertit un bloc de prix SerpAPI ({lowest, extracted_lowest, ...})"""
+    converted = dict(block)
+    for name, value in block.items():
+        if name.startswith("extracted_") and isinstance(value, (int, float)):
+            amount = round(value * rate, 2)
+            converted[name] = amount
+            label = name[len("extracted_") :]
+            if label in block:
+                converted[label] = format_price(amount, currency)
+    return converted
+
+
+def convert_hotels(hotels: Iterable[dict], currency: str) -> List[dict]:
+    """🏨 Convertit en bloc les prix d'une liste d'hôtels (sans modifier le cache)"""
+    hotels = list(hotels)
+    if currency == CANONICAL_CURRENCY:
+        return hotels
+    rate = FX_RATES.rate(CANONICAL_CURRENCY, currency)
+    converted = []
+    for hotel in hotels:
+        hotel = dict(hotel)
+        for block in ("rate_per_night", "total_rate"):
+            if isinstance(hotel.get(block), dict):
+                hotel[block] = _convert_rate_block(hotel[block], rate, currency)
+        if isinstance(hotel.get("prices"), list):
+            hotel["prices"] = [
+                {
+                    **source,
+                    "rate_per_night": _convert_rate_block(
+                        source.get("rate_per_night") or {}, rate, currency
+                    ),
+                }
+                for source in hotel["prices"]
+            ]
+        converted.append(hotel)
+    return converted
+
+
+def to_canonical(amount, currency: str) -> Optional[int]:
+    """🔁 Convertit un seuil de prix utilisateur vers la devise canonique"""
+    converted = FX_RATES.convert(amount, currency, CANONICAL_CURRENCY)
+    return None if converted is None else int(round(converted))
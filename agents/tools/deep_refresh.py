@@ -0,0 +1,174 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List
+from loguru import logger
+
+from agents.tools.cache import RESULT_CACHE
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES
+
+
+def _flight_signature(flight: dict) -> tuple:
+    """Identifie un vol par la suite de ses numéros de vol"""
+    return tuple(segment.get("flight_number") for segment in flight.get("flights", []))
+
+
+def _all_flights(data: dict) -> List[dict]:
+    return list(data.get("best_flights") or []) + list(data.get("other_flights") or [])
+
+
+def compare_prices(before: dict, after: dict) -> dict:
+    """
+    📉 Compare les vols d'une recherche rapide et de la recherche approfondie
+    """
+    before_prices = {
+        _flight_signature(f): f.get("price") for f in _all_flights(before or {})
+    }
+    changed, new_options = [], 0
+    for flight in _all_flights(after or {}):
+        signature = _flight_signature(flight)
+        if signature not in before_prices:
+            new_options += 1
+        elif before_prices[signature] != flight.get("price"):
+            changed.append(
+                {
+                    "flights": list(signature),
+                    "before": before_prices[signature],
+                    "after": flight.get("price"),
+                }
+            )
+
+    def lowest(data):
+        prices = [f.get("price") for f in _all_flights(data or {}) if f.get("price")]
+        return min(prices) if prices else None
+
+    return {
+        "lowest_before": lowest(before),
+        "lowest_after": lowest(after),
+        "changed": changed,
+        "new_options": new_options,
+    }
+
+
+class DeepSearchRefresher:
+    """
+    🔭 Exécute en arrière-plan les recherches `deep_search` des vols
+
+    La recherche rapide est renvoyée immédiatement ; la recherche approfondie
+    met ensuite à jour le cache (sous les deux clés) et les écarts de prix
+    sont conservés jusqu'à ce que la session les récupère.
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 256):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="deep-search"
+        )
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._timings = {"shallow_ms": [], "deep_ms": []}
+
+    def record_shallow(self, elapsed_ms: float):
+        with self._lock:
+            self._timings["shallow_ms"].append(elapsed_ms)
+
+    def submit(
+        self,
+        deep_key: str,
+        shallow_key: str,
+        shallow_data: dict,
+        fetch: Callable[[], dict],
+        currency: str,
+        shallow_ms: float,
+    ) -> str:
+        """🚀 Lance la recherche approfondie et retourne l'identifiant de suivi"""
+        refresh_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._jobs[refresh_id] = {
+                "refresh_id": refresh_id,
+                "status": "pending",
+                "currency": currency,
+                "shallow_ms": round(shallow_ms, 1),
+            }
+            while len(self._jobs) > self._max_jobs:
+                self._jobs.popitem(last=False)
+        self._executor.submit(
+            self._run, refresh_id, deep_key, shallow_key, shallow_data, fetch
+        )
+        return refresh_id
+
+    def _run(self, refresh_id, deep_key, shallow_key, shallow_data, fetch):
+        start = time.perf_counter()
+        try:
+            deep_data = RESULT_CACHE.get_or_fetch(deep_key, fetch)
+            if deep_data:
+                # Les prochaines recherches rapides profitent du résultat approfondi
+                RESULT_CACHE.set(shallow_key, deep_data)
+            update = {"status": "done", **compare_prices(shallow_data, deep_data)}
+        except Exception as e:
+            logger.warning(f"⚠️ Deep flight search failed: {e}")
+            update = {"status": "error", "message": str(e)}
+
+        deep_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"🔭 Deep flight search {refresh_id} finished in {deep_ms:.0f} ms")
+        with self._lock:
+            self._timings["deep_ms"].append(deep_ms)
+            job = self._jobs.get(refresh_id)
+            if job is not None:
+                job.update(update, deep_ms=round(deep_ms, 1))
+            self._finished.notify_all()
+
+    def collect(self, refresh_ids: Iterable[str]) -> List[dict]:
+        """📬 Retourne (et retire) les rafraîchissements terminés, prix convertis"""
+        finished = []
+        with self._lock:
+            for refresh_id in refresh_ids:
+                job = self._jobs.get(refresh_id)
+                if job is not None and job["status"] != "pending":
+                    finished.append(self._jobs.pop(refresh_id))
+
+        for job in finished:
+            currency = job["currency"]
+            for name in ("lowest_before", "lowest_after"):
+                if job.get(name) is not None:
+                    job[name] = FX_RATES.convert(job[name], CANONICAL_CURRENCY, currency)
+            for change in job.get("changed", []):
+                change["before"] = FX_RATES.convert(change["before"], CANONICAL_CURRENCY, currency)
+                change["after"] = FX_RATES.convert(change["after"], CANONICAL_CURRENCY, currency)
+        return finished
+
+    def wait(self, refresh_ids: Iterable[str], timeout: float) -> bool:
+        """⏳ Attend (au plus `timeout` s) la fin des rafraîchissements fournis"""
+        refresh_ids = list(refresh_ids)
+        with self._finished:
+            return self._finished.wait_for(
+                lambda: not any(
+                    self._jobs.get(r, {}).get("status") == "pending"
+                    for r in refresh_ids
+                ),
+                timeout,
+            )
+
+    def pending(self, refresh_ids: Iterable[str]) -> List[str]:
+        """⏳ Identifiants encore en cours parmi ceux fournis"""
+        with self._lock:
+            return [
+                r for r in refresh_ids
+                if r in self._jobs and self._jobs[r]["status"] == "pending"
+            ]
+
+    def stats(self) -> dict:
+        """📊 Durées moyennes des deux phases"""
+        with self._lock:
+            timings = {k: list(v) for k, v in self._timings.items()}
+        return {
+            f"avg_{name}": round(sum(values) / len(values), 1) if values else None
+            for name, values in timings.items()
+        } | {"deep_searches": len(timings["deep_ms"])}
+
+
+# 🌍 Rafraîchisseur partagé
+DEEP_REFRESHER = DeepSearchRefresher()
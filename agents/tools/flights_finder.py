@@ -1,37 +1,36 @@
 import os
-from typing import Optional
-from langchain.pydantic_v1 import BaseModel, Field
+import time
 from langchain_core.tools import tool
-import serpapi
 from loguru import logger
-
-
-class FlightsInput(BaseModel):
-    departure_airport: str = Field(description="Departure airport code (IATA)")
-    arrival_airport: str = Field(description="Arrival airport code (IATA)")
-    outbound_date: str = Field(description="Outbound date in YYYY-MM-DD format")
-    return_date: Optional[str] = Field(
-        None, description="Return date in YYYY-MM-DD format"
-    )
-    currency: Optional[str] = Field("EUR", description="Currency for prices")
-    adults: Optional[int] = Field(1, description="Number of adult passengers")
-    children: Optional[int] = Field(0, description="Number of child passengers")
-    infants_in_seat: Optional[int] = Field(0, description="Number of infants in seat")
-    infants_on_lap: Optional[int] = Field(0, description="Number of infants on lap")
-    travel_class: Optional[int] = Field(
-        1, description="Travel class (1=Economy, 2=Business, 3=First)"
-    )
-
-
-class FlightsInputSchema(BaseModel):
-    params: FlightsInput
+from agents import clients
+from agents.log import cap, redact
+from agents.tools.cache import RESULT_CACHE
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES, to_canonical
+from agents.tools.deep_refresh import DEEP_REFRESHER
+from agents.tools.models import Flight
+from agents.tools.return_legs import resolve_return_legs
+from agents.tools.schemas import FlightsInput, FlightsInputSchema
+from agents.tools.subsumption import (
+    FLIGHT_FILTER_PARAMS,
+    flight_matches,
+    narrow_cached_superset,
+    split_filters,
+)
 
 
 @tool(args_schema=FlightsInputSchema)
 def flights_finder(params: FlightsInput):
     """Find flights using the Google Flights engine."""
 
-    logger.info(f"🔍 Starting flight search with parameters: {params}")
+    logger.info(
+        "🔍 Starting flight search: {} → {} on {}",
+        params.departure_airport,
+        params.arrival_airport,
+        params.outbound_date,
+    )
+
+    # Les recherches sont faites en devise canonique puis converties
+    currency = FX_RATES.resolve(params.currency)
 
     # Erreur 1 corrigée: departure_id -> departure_airport
     search_params = {
@@ -43,13 +42,18 @@ def flights_finder(params: FlightsInput):
         "departure_id": params.departure_airport,
         "arrival_id": params.arrival_airport,
         "outbound_date": params.outbound_date,
-        "currency": params.currency,
+        "currency": CANONICAL_CURRENCY,
         "adults": params.adults,
         "travel_class": 1,
         "deep_search": True,
-        "stops": 1,
     }
 
+    # Filtres de raffinement (réappliqués localement si possible)
+    if params.stops:
+        search_params["stops"] = params.stops
+    if params.max_price:
+        search_params["max_price"] = to_canonical(params.max_price, currency)
+
     if params.children and params.children > 0:
         search_params["children"] = str(params.children)
     if params.infants_in_seat and params.infants_in_seat > 0:
@@ -62,32 +66,120 @@ def flights_finder(params: FlightsInput):
         search_params["type"] = "1"  # Changement en aller-retour
         search_params["return_date"] = params.return_date
 
-    logger.info(f"🌐 Prepared SerpAPI parameters: {search_params}")
+    logger.opt(lazy=True).debug(
+        "🌐 Prepared SerpAPI parameters: {}", lambda: cap(redact(search_params))
+    )
 
     try:
         # Erreur 4 corrigée: Appel à serpapi.search
         logger.info("🚀 Making API call to SerpAPI")
-        search = serpapi.search(params=search_params)  # Correction ici
+        refinement = None
+        deep_params = dict(search_params)
+        if params.search_mode == "deep" or (
+            params.search_mode == "two_phase" and is_cached(deep_params)
+        ):
+            data = search_flights(deep_params)
+        else:
+            # Phase 1 : recherche rapide sans deep_search
+            search_params = {
+                k: v for k, v in search_params.items() if k != "deep_search"
+            }
+            start = time.perf_counter()
+            data = search_flights(search_params)
+            shallow_ms = (time.perf_counter() - start) * 1000
+            DEEP_REFRESHER.record_shallow(shallow_ms)
+            logger.info("⚡ Shallow flight search done in {:.0f} ms", shallow_ms)
+
+            # Phase 2 : recherche approfondie en arrière-plan
+            if params.search_mode == "two_phase" and data:
+                refresh_id = DEEP_REFRESHER.submit(
+                    RESULT_CACHE.make_key("flights_finder", deep_params),
+                    RESULT_CACHE.make_key("flights_finder", search_params),
+                    data,
+                    lambda: clients.serpapi_search(deep_params),
+                    currency,
+                    shallow_ms,
+                )
+                refinement = {
+                    "refresh_id": refresh_id,
+                    "status": "pending",
+                    "shallow_ms": round(shallow_ms, 1),
+                }
         logger.info("✅ API call successful")
 
-        if search.data:
-            logger.info(f"📝 Response keys: {search.data.values()}")
-            flights = search.data.get("flights", search.data.get("best_flights", []))
+        if data:
+            logger.opt(lazy=True).debug("📝 Response keys: {}", lambda: list(data))
+            flights = (
+                data.get("flights")
+                or data.get("best_flights")
+                or data.get("other_flights", [])
+            )
+
+            # Aller-retour : appariement avec les vols retour
+            round_trip = None
+            if params.return_date and params.return_top_k and flights:
+                round_trip = resolve_return_legs(
+                    search_params,
+                    flights,
+                    currency,
+                    top_k=params.return_top_k,
+                    call_budget=params.return_call_budget,
+                )
+
+            rate = FX_RATES.rate(CANONICAL_CURRENCY, currency)
             return {
                 "status": "success",
-                "flights": flights,
+                "flights": [Flight.from_serpapi(f, rate) for f in flights or []],
                 "count": len(flights) if flights else 0,
-                "search_params": search_params,
+                "currency": currency,
+                "round_trip": round_trip,
+                "refinement": refinement,
+                "search_params": redact(search_params),
             }
         else:
             return {
                 "status": "no_data",
                 "message": "No data returned from search",
-                "search_params": search_params,
+                "search_params": redact(search_params),
             }
 
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"❌ Error in flight search: {error_msg}")
-        logger.error(f"Parameters used: {search_params}")
-        return {"status": "error", "message": error_msg, "parameters": search_params}
+        logger.error("❌ Error in flight search: {}", error_msg)
+        logger.error("Parameters used: {}", redact(search_params))
+        return {
+            "status": "error",
+            "message": error_msg,
+            "parameters": redact(search_params),
+        }
+
+
+def is_cached(search_params: dict) -> bool:
+    """🔎 Indique si une recherche (ou son sur-ensemble non filtré) est en cache"""
+    base_params, _ = split_filters(search_params, FLIGHT_FILTER_PARAMS)
+    return RESULT_CACHE.contains(
+        RESULT_CACHE.make_key("flights_finder", search_params)
+    ) or RESULT_CACHE.contains(RESULT_CACHE.make_key("flights_finder", base_params))
+
+
+def search_flights(search_params: dict) -> dict:
+    """
+    🛫 Interroge Google Flights via le cache partagé
+
+    Une recherche raffinée peut être servie par un sur-ensemble en cache
+    """
+    base_params, filters = split_filters(search_params, FLIGHT_FILTER_PARAMS)
+    data = narrow_cached_superset(
+        "flights_finder",
+        base_params,
+        filters,
+        ["best_flights", "other_flights"],
+        flight_matches,
+        min_results=1,
+    )
+    if data is None:
+        data = RESULT_CACHE.get_or_fetch(
+            RESULT_CACHE.make_key("flights_finder", search_params),
+            lambda: clients.serpapi_search(search_params),
+        )
+    return data
@@ -0,0 +1,136 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from langchain_core.tools import tool
+from loguru import logger
+from agents import clients
+from agents.tools.cache import ResultCache
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES, convert_hotels
+from agents.tools.schemas import HotelDetailsInput, HotelDetailsInputSchema
+
+# 💾 Cache dédié aux fiches détaillées (plus stables que les listes de prix)
+DETAILS_CACHE = ResultCache(ttl_seconds=3600, max_entries=256)
+
+# 🔢 Limites du détail renvoyé
+MAX_PROPERTIES = 5
+MAX_IMAGES = 5
+MAX_NEARBY_PLACES = 5
+
+# 📋 Champs conservés dans la fiche détaillée
+DETAIL_FIELDS = (
+    "name",
+    "type",
+    "property_token",
+    "link",
+    "address",
+    "phone",
+    "description",
+    "rate_per_night",
+    "total_rate",
+    "hotel_class",
+    "extracted_hotel_class",
+    "overall_rating",
+    "reviews",
+    "check_in_time",
+    "check_out_time",
+    "gps_coordinates",
+    "amenities",
+    "excluded_amenities",
+)
+
+
+def detail_view(property_data: dict) -> dict:
+    """
+    📋 Fiche détaillée d'un hôtel : prix par site, lieux proches, images
+    """
+    detail = {k: property_data[k] for k in DETAIL_FIELDS if k in property_data}
+    detail["prices"] = [
+        {
+            "source": p.get("source"),
+            "link": p.get("link"),
+            "rate_per_night": p.get("rate_per_night"),
+        }
+        for p in property_data.get("prices") or []
+    ]
+    detail["nearby_places"] = [
+        {
+            "name": place.get("name"),
+            "transportations": place.get("transportations", []),
+        }
+        for place in (property_data.get("nearby_places") or [])[:MAX_NEARBY_PLACES]
+    ]
+    detail["images"] = [
+        image.get("thumbnail")
+        for image in (property_data.get("images") or [])[:MAX_IMAGES]
+    ]
+    return detail
+
+
+def fetch_hotel_details(base_params: dict, property_tokens: List[str]) -> dict:
+    """
+    🔍 Récupère en parallèle les fiches des hôtels demandés (avec cache dédié)
+    """
+
+    def fetch(token: str):
+        params = {**base_params, "property_token": token}
+        try:
+            data = DETAILS_CACHE.get_or_fetch(
+                DETAILS_CACHE.make_key("hotel_details", params),
+                lambda: clients.serpapi_search(params),
+            )
+            return token, data, None
+        except Exception as e:
+            logger.warning(f"⚠️ Hotel details lookup failed for {token}: {e}")
+            return token, None, str(e)
+
+    tokens = list(dict.fromkeys(property_tokens))[:MAX_PROPERTIES]
+    results = {}
+    if tokens:
+        with ThreadPoolExecutor(max_workers=len(tokens)) as executor:
+            for token, data, error in executor.map(fetch, tokens):
+                results[token] = {"data": data, "error": error}
+    return results
+
+
+@tool(args_schema=HotelDetailsInputSchema)
+def hotel_details(params: HotelDetailsInput):
+    """
+    🏨 Get full details (prices per site, nearby places, images, amenities) for
+    specific hotels returned by hotels_finder, using their property_token.
+    """
+    logger.info(f"🔍 Fetching details for {len(params.property_tokens)} hotels")
+
+    currency = FX_RATES.resolve(params.currency)
+    base_params = {
+        "api_key": os.environ.get("SERPAPI_API_KEY"),
+        "engine": "google_hotels",
+        "hl": "fr",
+        "gl": "fr",
+        "q": params.q,
+        "check_in_date": params.check_in_date,
+        "check_out_date": params.check_out_date,
+        "currency": CANONICAL_CURRENCY,
+        "adults": str(params.adults or 1),
+    }
+
+    try:
+        results = fetch_hotel_details(base_params, params.property_tokens)
+        hotels, errors = [], {}
+        for token, result in results.items():
+            if result["data"]:
+                hotels.append(detail_view(result["data"]))
+            else:
+                errors[token] = result["error"] or "No data returned"
+
+        logger.info(f"✨ Got details for {len(hotels)} hotels")
+        return {
+            "status": "success" if hotels else "no_results",
+            "hotels": convert_hotels(hotels, currency),
+            "errors": errors,
+            "currency": currency,
+        }
+
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"❌ Error in hotel details: {error_msg}")
+        return {"status": "error", "message": error_msg}
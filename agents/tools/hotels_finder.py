@@ -1,36 +1,22 @@
 import os
-from typing import Optional, List
-from langchain.pydantic_v1 import BaseModel, Field
+from typing import List
 from langchain_core.tools import tool
-import serpapi
 from loguru import logger
-
-
-class HotelsInput(BaseModel):
-    q: str = Field(description="Location of the hotel")
-    check_in_date: str = Field(description="Check-in date in YYYY-MM-DD format")
-    check_out_date: str = Field(description="Check-out date in YYYY-MM-DD format")
-    currency: Optional[str] = Field("EUR", description="Currency for prices")
-    adults: Optional[int] = Field(1, description="Number of adults")
-    children: Optional[int] = Field(0, description="Number of children")
-    rooms: Optional[int] = Field(1, description="Number of rooms")
-    hotel_class: Optional[str] = Field(None, description="Hotel class (2,3,4,5)")
-    sort_by: Optional[str] = Field(
-        "8",
-        description="""Sorting options:
-        1: Price (low to high)
-        2: Price (high to low)
-        3: Distance
-        8: Rating (default)
-        """,
-    )
-    min_price: Optional[int] = Field(None, description="Minimum price per night")
-    max_price: Optional[int] = Field(None, description="Maximum price per night")
-    amenities: Optional[List[str]] = Field(None, description="Required amenities")
-
-
-class HotelsInputSchema(BaseModel):
-    params: HotelsInput
+from agents import clients
+from agents.log import cap, redact
+from agents.tools.cache import RESULT_CACHE
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES, to_canonical
+from agents.tools.models import Hotel
+from agents.tools.schemas import HotelsInput, HotelsInputSchema
+from agents.tools.subsumption import (
+    HOTEL_FILTER_PARAMS,
+    hotel_matches,
+    narrow_cached_superset,
+    split_filters,
+)
+
+# 🔢 Nombre d'hôtels renvoyés au LLM
+MAX_HOTELS = 5
 
 
 @tool(args_schema=HotelsInputSchema)
@@ -38,8 +24,11 @@ def hotels_finder(params: HotelsInput):
     """
     🏨 Find hotels using the Google Hotels engine with advanced filtering.
     """
-    logger.info(f"🔍 Starting hotel search for location: {params.q}")
-    logger.info(f"📅 Dates: {params.check_in_date} to {params.check_out_date}")
+    logger.info("🔍 Starting hotel search for location: {}", params.q)
+    logger.info("📅 Dates: {} to {}", params.check_in_date, params.check_out_date)
+
+    # Les recherches sont faites en devise canonique puis converties
+    currency = FX_RATES.resolve(params.currency)
 
     # Construction des paramètres de base
     search_params = {
@@ -50,7 +39,7 @@ def hotels_finder(params: HotelsInput):
         "q": params.q,
         "check_in_date": params.check_in_date,
         "check_out_date": params.check_out_date,
-        "currency": params.currency,
+        "currency": CANONICAL_CURRENCY,
         "sort_by": str(params.sort_by),
     }
 
@@ -64,37 +53,54 @@ def hotels_finder(params: HotelsInput):
     if params.hotel_class:
         search_params["hotel_class"] = params.hotel_class
     if params.min_price:
-        search_params["min_price"] = str(params.min_price)
+        search_params["min_price"] = str(to_canonical(params.min_price, currency))
     if params.max_price:
-        search_params["max_price"] = str(params.max_price)
+        search_params["max_price"] = str(to_canonical(params.max_price, currency))
 
-    logger.info(f"🌐 Prepared search parameters: {search_params}")
+    logger.opt(lazy=True).debug(
+        "🌐 Prepared search parameters: {}", lambda: cap(redact(search_params))
+    )
 
     try:
         logger.info("🚀 Making API call to SerpAPI")
-        search = serpapi.search(params=search_params)
+        # Une recherche raffinée peut être servie par un sur-ensemble en cache
+        base_params, filters = split_filters(search_params, HOTEL_FILTER_PARAMS)
+        data = narrow_cached_superset(
+            "hotels_finder",
+            base_params,
+            filters,
+            ["properties"],
+            hotel_matches,
+            min_results=MAX_HOTELS,
+        )
+        if data is None:
+            data = RESULT_CACHE.get_or_fetch(
+                RESULT_CACHE.make_key("hotels_finder", search_params),
+                lambda: clients.serpapi_search(search_params),
+            )
         logger.info("✅ API call successful")
 
-        if not search.data or "properties" not in search.data:
+        if not data or "properties" not in data:
             logger.warning("⚠️ No hotels found")
             return {
                 "status": "no_results",
                 "message": "No hotels found for these criteria",
-                "search_params": search_params,
+                "search_params": redact(search_params),
             }
 
         # Récupération et traitement des résultats
-        hotels = search.data["properties"]
-        logger.info(f"✨ Found {len(hotels)} hotels")
+        hotels = data["properties"]
+        logger.info("✨ Found {} hotels", len(hotels))
 
         # Application des filtres supplémentaires
         if params.amenities:
             hotels = filter_hotels_by_amenities(hotels, params.amenities)
 
-        # Préparation de la réponse
+        # Préparation de la réponse (résumés compacts, le détail passe par hotel_details)
+        rate = FX_RATES.rate(CANONICAL_CURRENCY, currency)
         response = {
             "status": "success",
-            "hotels": hotels[:5],  # Limitation à 5 résultats
+            "hotels": [Hotel.from_serpapi(h, rate) for h in hotels[:MAX_HOTELS]],
             "total_found": len(hotels),
             "search_parameters": {
                 "location": params.q,
@@ -105,7 +111,7 @@ def hotels_finder(params: HotelsInput):
                 "guests": {"adults": params.adults, "children": params.children},
                 "rooms": params.rooms,
                 "hotel_class": params.hotel_class,
-                "currency": params.currency,
+                "currency": currency,
             },
         }
 
@@ -113,9 +119,13 @@ def hotels_finder(params: HotelsInput):
 
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"❌ Error in hotel search: {error_msg}")
-        logger.error(f"Parameters used: {search_params}")
-        return {"status": "error", "message": error_msg, "parameters": search_params}
+        logger.error("❌ Error in hotel search: {}", error_msg)
+        logger.error("Parameters used: {}", redact(search_params))
+        return {
+            "status": "error",
+            "message": error_msg,
+            "parameters": redact(search_params),
+        }
 
 
 def filter_hotels_by_amenities(hotels: list, required_amenities: List[str]) -> list:
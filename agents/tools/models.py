@@ -0,0 +1,351 @@
+import re
+from dataclasses import dataclass, fields
+from typing import Any, List, Optional, Sequence, Tuple
+
+import msgpack
+import orjson
+
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES
+
+
+# 📦 Résultats d'outils compacts : un seul passage sur le JSON amont, des
+# objets à slots (pas de dict par résultat) et un encodage rapide, en JSON
+# (orjson) pour les ToolMessages et en msgpack (une ligne par résultat, sans
+# noms de champs) pour les caches.
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _scaled(value, rate: float) -> Optional[float]:
+    value = _number(value)
+    if value is None:
+        return None
+    return value if rate == 1.0 else round(value * rate, 2)
+
+
+@dataclass(slots=True)
+class Flight:
+    """✈️ Vol (aller simple ou une des branches d'un aller-retour)"""
+
+    departure_airport: Optional[str]
+    departure_time: Optional[str]
+    arrival_airport: Optional[str]
+    arrival_time: Optional[str]
+    duration_minutes: Optional[int]
+    stops: int
+    layovers: Tuple[str, ...]
+    airlines: Tuple[str, ...]
+    flight_numbers: Tuple[str, ...]
+    price: Optional[float]
+    co2_grams: Optional[float]
+    airline_logo: Optional[str]
+    departure_token: Optional[str]
+    booking_token: Optional[str]
+
+    @classmethod
+    def from_serpapi(cls, flight: dict, rate: float = 1.0) -> "Flight":
+        """🔎 Depuis une option Google Flights (prix multiplié par `rate`)"""
+        segments = flight.get("flights") or ()
+        airlines, numbers = [], []
+        # Un seul passage sur les segments (appelé pour chaque option de vol)
+        for segment in segments:
+            airline = segment.get("airline")
+            if airline and airline not in airlines:
+                airlines.append(airline)
+            numbers.append(segment.get("flight_number"))
+        if segments:
+            departure = segments[0].get("departure_airport") or {}
+            arrival = segments[-1].get("arrival_airport") or {}
+        else:
+            departure = arrival = {}
+        layovers = flight.get("layovers")
+        emissions = flight.get("carbon_emissions")
+        return cls(
+            departure.get("id"),
+            departure.get("time"),
+            arrival.get("id"),
+            arrival.get("time"),
+            flight.get("total_duration"),
+            max(len(segments) - 1, 0),
+            tuple(l["id"] for l in layovers if l.get("id")) if layovers else (),
+            tuple(airlines),
+            tuple(numbers),
+            _scaled(flight.get("price"), rate),
+            _number(emissions.get("this_flight")) if emissions else None,
+            flight.get("airline_logo"),
+            flight.get("departure_token"),
+            flight.get("booking_token"),
+        )
+
+
+@dataclass(slots=True)
+class Hotel:
+    """🏨 Résumé d'hôtel (le détail complet passe par hotel_details)"""
+
+    name: str
+    type: Optional[str]
+    property_token: Optional[str]
+    link: Optional[str]
+    description: Optional[str]
+    hotel_class: Optional[int]
+    overall_rating: Optional[float]
+    reviews: Optional[int]
+    rate_per_night: Optional[float]
+    total_rate: Optional[float]
+    check_in_time: Optional[str]
+    check_out_time: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    thumbnail: Optional[str]
+    amenities: Tuple[str, ...]
+    amenities_count: int
+
+    @classmethod
+    def from_serpapi(
+        cls, hotel: dict, rate: float = 1.0, max_amenities: int = 8
+    ) -> "Hotel":
+        """🔎 Depuis une propriété Google Hotels (prix multipliés par `rate`)"""
+        gps = hotel.get("gps_coordinates") or {}
+        images = hotel.get("images") or ()
+        amenities = hotel.get("amenities") or ()
+        return cls(
+            hotel.get("name", ""),
+            hotel.get("type"),
+            hotel.get("property_token"),
+            hotel.get("link"),
+            hotel.get("description"),
+            hotel.get("extracted_hotel_class"),
+            _number(hotel.get("overall_rating")),
+            hotel.get("reviews"),
+            _scaled((hotel.get("rate_per_night") or {}).get("extracted_lowest"), rate),
+            _scaled((hotel.get("total_rate") or {}).get("extracted_lowest"), rate),
+            hotel.get("check_in_time"),
+            hotel.get("check_out_time"),
+            gps.get("latitude"),
+            gps.get("longitude"),
+            images[0].get("thumbnail") if images else None,
+            tuple(amenities[:max_amenities]),
+            len(amenities),
+        )
+
+
+_UIC = re.compile(r"\d{7,}")
+
+
+def uic_code(stop_point: dict) -> Optional[str]:
+    """🚉 Code UIC de la gare d'un stop_point navitia"""
+    stop_area = stop_point.get("stop_area") or {}
+    for code in stop_area.get("codes") or ():
+        if code.get("type") == "uic":
+            return code.get("value")
+    # Identifiants navitia : stop_area:SNCF:87686006, stop_point:SNCF:87686006:Train
+    match = _UIC.search(stop_area.get("id") or stop_point.get("id") or "")
+    return match.group(0) if match else None
+
+
+def _navitia_datetime(value: str) -> Tuple[str, str]:
+    """🕐 "20250110T080000" -> ("2025-01-10", "08:00"), sans strptime"""
+    return f"{value[0:4]}-{value[4:6]}-{value[6:8]}", f"{value[9:11]}:{value[11:13]}"
+
+
+@dataclass(slots=True)
+class Train:
+    """🚆 Trajet en train (premier tronçon en transport public du voyage)"""
+
+    date: str
+    departure_time: str
+    arrival_date: str
+    arrival_time: str
+    departure_station: str
+    departure_city: str
+    arrival_station: str
+    arrival_city: str
+    departure_uic: Optional[str]
+    arrival_uic: Optional[str]
+    duration_minutes: int
+    train_type: str
+    train_number: str
+    company: str
+    transfers: int
+    co2_grams: float
+    price: Optional[float]
+    currency: str
+    fare_source: Optional[str]
+    tickets: Tuple[Tuple[str, Optional[float]], ...]
+
+    @classmethod
+    def from_navitia(cls, journey: dict, section: dict) -> "Train":
+        """
+        🔎 Depuis un voyage navitia et sa première section en transport public
+
+        Les montants (centimes navitia) sont exprimés en devise canonique.
+        """
+        display = section.get("display_informations") or {}
+        origin = section["from"]["stop_point"]
+        destination = section["to"]["stop_point"]
+        date, departure_time = _navitia_datetime(journey["departure_date_time"])
+        arrival_date, arrival_time = _navitia_datetime(journey["arrival_date_time"])
+
+        def amount(cost) -> Optional[float]:
+            cost = cost or {}
+            return FX_RATES.convert(
+                cost.get("value"),
+                cost.get("currency", CANONICAL_CURRENCY),
+                CANONICAL_CURRENCY,
+            )
+
+        fare = journey.get("fare") or {}
+        found = fare.get("found")
+        return cls(
+            date,
+            departure_time,
+            arrival_date,
+            arrival_time,
+            origin["name"],
+            origin["label"],
+            destination["name"],
+            destination["label"],
+            uic_code(origin),
+            uic_code(destination),
+            journey["duration"] // 60,
+            display.get("commercial_mode", ""),
+            display.get("headsign", ""),
+            display.get("network", "SNCF"),
+            journey["nb_transfers"],
+            _number((journey.get("co2_emission") or {}).get("value")) or 0.0,
+            amount(fare.get("total")) if found else None,
+            CANONICAL_CURRENCY,
+            "api" if found else None,
+            tuple(
+                (link.get("name", "N/A"), amount(link.get("cost")))
+                for link in fare.get("links") or ()
+                if found and "ticket" in link.get("id", "")
+            ),
+        )
+
+
+def parse_journeys(journeys: list) -> List[Train]:
+    """🚆 Trains des voyages navitia (première section en transport public)"""
+    trains = []
+    for journey in journeys:
+        section = next(
+            (s for s in journey["sections"] if s.get("type") == "public_transport"),
+            None,
+        )
+        if section is not None:
+            trains.append(Train.from_navitia(journey, section))
+    return trains
+
+
+def convert_trains(trains: List[Train], currency: str) -> List[Train]:
+    """
+    💱 Convertit les prix d'un lot de trains, en place (un seul taux)
+
+    À appeler sur des objets frais (sortie de `unpack`), pas sur un cache.
+    """
+    for train in trains:
+        if train.currency == currency:
+            continue
+        rate = FX_RATES.rate(train.currency, currency)
+        train.price = _scaled(train.price, rate)
+        train.tickets = tuple(
+            (name, _scaled(cost, rate)) for name, cost in train.tickets
+        )
+        train.currency = currency
+    return trains
+
+
+# 🏷️ Étiquettes msgpack des modèles
+MODELS = {"flight": Flight, "hotel": Hotel, "train": Train}
+_TAGS = {model: tag for tag, model in MODELS.items()}
+_FIELDS = {model: tuple(f.name for f in fields(model)) for model in MODELS.values()}
+
+
+# 🚆 Colonnes des trains transmises au LLM : sans les champs internes (codes
+# UIC, source du tarif) ni la devise, donnée une fois pour tout le tableau
+TRAIN_COLUMNS = tuple(
+    name
+    for name in _FIELDS[Train]
+    if name not in ("departure_uic", "arrival_uic", "fare_source", "currency")
+)
+_ARRIVAL_DATE = TRAIN_COLUMNS.index("arrival_date")
+
+
+def train_table(trains: Sequence[Train]) -> dict:
+    """
+    🚆 Trains en tableau : en-tête de colonnes puis une ligne par train
+
+    La date d'arrivée est nulle quand c'est le jour du départ.
+    """
+    rows = []
+    for train in trains:
+        row = [getattr(train, name) for name in TRAIN_COLUMNS]
+        if train.arrival_date == train.date:
+            row[_ARRIVAL_DATE] = None
+        rows.append(row)
+    return {
+        "currency": trains[0].currency if trains else None,
+        "columns": TRAIN_COLUMNS,
+        "rows": rows,
+    }
+
+
+def trains_from_table(table: dict) -> List[Train]:
+    """🚆 Inverse de `train_table` (champs internes absents laissés à None)"""
+    currency = table.get("currency") or CANONICAL_CURRENCY
+    trains = []
+    for row in table["rows"]:
+        values = dict(zip(table["columns"], row))
+        values["arrival_date"] = values["arrival_date"] or values["date"]
+        values["tickets"] = tuple(tuple(ticket) for ticket in values["tickets"])
+        trains.append(
+            Train(
+                departure_uic=None,
+                arrival_uic=None,
+                fare_source=None,
+                currency=currency,
+                **values,
+            )
+        )
+    return trains
+
+
+def to_json(obj: Any) -> str:
+    """📤 JSON compact (modèles, dates et tuples compris)"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def tool_json(result: Any) -> str:
+    """📤 JSON d'un résultat d'outil pour le LLM (trains en tableau)"""
+    trains = result.get("trains") if isinstance(result, dict) else None
+    if trains and isinstance(trains[0], Train):
+        result = {**result, "trains": train_table(trains)}
+    return to_json(result)
+
+
+def pack(items: Sequence) -> bytes:
+    """📦 Lot homogène de modèles en msgpack (une ligne de valeurs par résultat)"""
+    if not items:
+        return msgpack.packb(None)
+    model = type(items[0])
+    names = _FIELDS[model]
+    return msgpack.packb(
+        (_TAGS[model], [[getattr(item, name) for name in names] for item in items])
+    )
+
+
+def unpack(data: bytes) -> List:
+    """📦 Inverse de `pack`"""
+    payload = msgpack.unpackb(data, use_list=False)
+    if payload is None:
+        return []
+    tag, rows = payload
+    model = MODELS[tag]
+    return [model(*row) for row in rows]
@@ -0,0 +1,98 @@
+import importlib
+import threading
+from typing import Dict, List, NamedTuple, Type
+from langchain.pydantic_v1 import BaseModel
+
+from agents.tools.schemas import (
+    FlightsInputSchema,
+    HotelDetailsInputSchema,
+    HotelsInputSchema,
+    TrainsInputSchema,
+)
+
+
+class ToolSpec(NamedTuple):
+    """📇 Description d'un outil : de quoi le présenter au LLM sans l'importer"""
+
+    module: str
+    args_schema: Type[BaseModel]
+    description: str
+    upstream: str
+
+
+# 📇 Outils disponibles (la description doit rester celle de l'outil)
+TOOL_SPECS = {
+    "flights_finder": ToolSpec(
+        "agents.tools.flights_finder",
+        FlightsInputSchema,
+        "Find flights using the Google Flights engine.",
+        "serpapi",
+    ),
+    "hotels_finder": ToolSpec(
+        "agents.tools.hotels_finder",
+        HotelsInputSchema,
+        "🏨 Find hotels using the Google Hotels engine with advanced filtering.",
+        "serpapi",
+    ),
+    "hotel_details": ToolSpec(
+        "agents.tools.hotel_details",
+        HotelDetailsInputSchema,
+        "🏨 Get full details (prices per site, nearby places, images, amenities) for\n"
+        "specific hotels returned by hotels_finder, using their property_token.",
+        "serpapi",
+    ),
+    "trains_finder": ToolSpec(
+        "agents.tools.trains_finder",
+        TrainsInputSchema,
+        "🚂 Recherche des trains SNCF (ou balayage de plusieurs jours et "
+        "créneaux)",
+        "sncf",
+    ),
+}
+
+
+class ToolRegistry:
+    """
+    🗂️ Registre paresseux des outils
+
+    Les schémas servent au bind_tools du LLM sans importer les modules
+    d'outils ; chaque module (et ses clients) n'est importé qu'au premier
+    appel de l'outil.
+    """
+
+    def __init__(self, specs: Dict[str, ToolSpec]):
+        self._specs = specs
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __getitem__(self, name: str):
+        tool = self._loaded.get(name)
+        if tool is None:
+            spec = self._specs[name]
+            with self._lock:
+                tool = self._loaded.get(name)
+                if tool is None:
+                    tool = getattr(importlib.import_module(spec.module), name)
+                    self._loaded[name] = tool
+        return tool
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def schemas(self) -> List[dict]:
+        """🧾 Schémas d'outils au format OpenAI, pour bind_tools"""
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        schemas = []
+        for name, spec in self._specs.items():
+            schema = convert_to_openai_tool(spec.args_schema)
+            schema["function"]["name"] = name
+            schema["function"]["description"] = spec.description
+            schemas.append(schema)
+        return schemas
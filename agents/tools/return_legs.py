@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from loguru import logger
+
+from agents import clients
+from agents.tools.cache import RESULT_CACHE
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES
+from agents.tools.models import Flight
+from agents.tools.subsumption import FLIGHT_FILTER_PARAMS, flight_matches, split_filters
+
+
+# 🔢 Nombre d'options retour conservées par vol aller
+RETURNS_PER_OUTBOUND = 2
+
+
+def resolve_return_legs(
+    search_params: dict,
+    outbound_flights: List[dict],
+    currency: str,
+    top_k: int = 3,
+    call_budget: Optional[int] = 3,
+) -> dict:
+    """
+    🔁 Résout en parallèle les vols retour des meilleurs vols aller
+
+    Chaque `departure_token` est interrogé une fois, sans les filtres de
+    raffinement ni `deep_search`, puis mis en cache : répéter la recherche
+    avec un filtre en plus réutilise les retours déjà connus, filtrés
+    localement. Seuls les jetons absents du cache consomment le budget
+    d'appels amont. Retourne les itinéraires appariés (prix aller-retour
+    réel) et le décompte des appels.
+    """
+    base_params, filters = split_filters(search_params, FLIGHT_FILTER_PARAMS)
+    base_params.pop("deep_search", None)
+    candidates = [f for f in outbound_flights if f.get("departure_token")][:top_k]
+    to_fetch, report = [], {"upstream": 0, "cached": 0, "skipped": 0}
+    for outbound in candidates:
+        params = {**base_params, "departure_token": outbound["departure_token"]}
+        key = RESULT_CACHE.make_key("flights_return", params)
+        if RESULT_CACHE.contains(key):
+            report["cached"] += 1
+        elif call_budget is not None and report["upstream"] >= call_budget:
+            report["skipped"] += 1
+            continue
+        else:
+            report["upstream"] += 1
+        to_fetch.append((outbound, params, key))
+
+    def fetch(item):
+        outbound, params, key = item
+        try:
+            data = RESULT_CACHE.get_or_fetch(
+                key, lambda: clients.serpapi_search(params)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Return leg lookup failed: {e}")
+            return outbound, []
+        returns = [
+            f
+            for f in list((data or {}).get("best_flights") or [])
+            + list((data or {}).get("other_flights") or [])
+            if flight_matches(f, filters)
+        ]
+        returns.sort(key=lambda f: f.get("price") or float("inf"))
+        return outbound, returns[:RETURNS_PER_OUTBOUND]
+
+    itineraries = []
+    rate = FX_RATES.rate(CANONICAL_CURRENCY, currency)
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=len(to_fetch)) as executor:
+            for outbound, returns in executor.map(fetch, to_fetch):
+                for inbound in returns:
+                    compact_return = Flight.from_serpapi(inbound, rate)
+                    itineraries.append(
+                        {
+                            "outbound": Flight.from_serpapi(outbound, rate),
+                            "return": compact_return,
+                            # Le prix d'une option retour est le prix aller-retour
+                            "total_price": compact_return.price,
+                        }
+                    )
+
+    itineraries.sort(key=lambda i: i["total_price"] or float("inf"))
+    logger.info(f"🔁 Resolved {len(itineraries)} round-trip itineraries ({report})")
+    return {"itineraries": itineraries, "calls": report}
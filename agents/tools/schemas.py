@@ -0,0 +1,106 @@
+from typing import List, Optional
+from langchain.pydantic_v1 import BaseModel, Field
+
+
+# 🪶 Schémas d'entrée des outils, sans dépendance vers les clients amont :
+# ils servent au bind_tools du LLM sans importer les modules d'outils
+
+
+class FlightsInput(BaseModel):
+    departure_airport: str = Field(description="Departure airport code (IATA)")
+    arrival_airport: str = Field(description="Arrival airport code (IATA)")
+    outbound_date: str = Field(description="Outbound date in YYYY-MM-DD format")
+    return_date: Optional[str] = Field(
+        None, description="Return date in YYYY-MM-DD format"
+    )
+    currency: Optional[str] = Field("EUR", description="Currency for prices")
+    adults: Optional[int] = Field(1, description="Number of adult passengers")
+    children: Optional[int] = Field(0, description="Number of child passengers")
+    infants_in_seat: Optional[int] = Field(0, description="Number of infants in seat")
+    infants_on_lap: Optional[int] = Field(0, description="Number of infants on lap")
+    travel_class: Optional[int] = Field(
+        1, description="Travel class (1=Economy, 2=Business, 3=First)"
+    )
+    stops: Optional[int] = Field(
+        None,
+        description="Stops filter (1=nonstop only, 2=1 stop or fewer, 3=2 stops or fewer)",
+    )
+    max_price: Optional[int] = Field(None, description="Maximum ticket price")
+    search_mode: Optional[str] = Field(
+        "deep",
+        description="deep (slow, exhaustive), shallow (fast) or two_phase (fast then deep in background)",
+    )
+    return_top_k: Optional[int] = Field(
+        3, description="Round trips: number of outbound flights to pair with returns"
+    )
+    return_call_budget: Optional[int] = Field(
+        3, description="Round trips: max upstream calls to resolve return flights"
+    )
+
+
+class FlightsInputSchema(BaseModel):
+    params: FlightsInput
+
+
+class HotelsInput(BaseModel):
+    q: str = Field(description="Location of the hotel")
+    check_in_date: str = Field(description="Check-in date in YYYY-MM-DD format")
+    check_out_date: str = Field(description="Check-out date in YYYY-MM-DD format")
+    currency: Optional[str] = Field("EUR", description="Currency for prices")
+    adults: Optional[int] = Field(1, description="Number of adults")
+    children: Optional[int] = Field(0, description="Number of children")
+    rooms: Optional[int] = Field(1, description="Number of rooms")
+    hotel_class: Optional[str] = Field(None, description="Hotel class (2,3,4,5)")
+    sort_by: Optional[str] = Field(
+        "8",
+        description="""Sorting options:
+        1: Price (low to high)
+        2: Price (high to low)
+        3: Distance
+        8: Rating (default)
+        """,
+    )
+    min_price: Optional[int] = Field(None, description="Minimum price per night")
+    max_price: Optional[int] = Field(None, description="Maximum price per night")
+    amenities: Optional[List[str]] = Field(None, description="Required amenities")
+
+
+class HotelsInputSchema(BaseModel):
+    params: HotelsInput
+
+
+class HotelDetailsInput(BaseModel):
+    q: str = Field(description="Location used for the hotel search")
+    check_in_date: str = Field(description="Check-in date in YYYY-MM-DD format")
+    check_out_date: str = Field(description="Check-out date in YYYY-MM-DD format")
+    property_tokens: List[str] = Field(
+        description="property_token values of the hotels to expand (from hotels_finder)"
+    )
+    currency: Optional[str] = Field("EUR", description="Currency for prices")
+    adults: Optional[int] = Field(1, description="Number of adults")
+
+
+class HotelDetailsInputSchema(BaseModel):
+    params: HotelDetailsInput
+
+
+class TrainsInput(BaseModel):
+    origin_city: str = Field(description="Ville de départ (ex: Paris)")
+    destination_city: str = Field(description="Ville d'arrivée (ex: Lyon)")
+    departure_date: str = Field(description="Date de départ (YYYY-MM-DD)")
+    departure_time: Optional[str] = Field(None, description="Heure de départ (HH:MM)")
+    currency: Optional[str] = Field("EUR", description="Devise d'affichage des prix")
+    end_date: Optional[str] = Field(
+        None,
+        description="Dernière date (YYYY-MM-DD) pour balayer plusieurs jours : "
+        "renvoie par jour le train le moins cher et le plus rapide",
+    )
+    time_windows: Optional[List[str]] = Field(
+        None,
+        description='Créneaux de départ à balayer (ex: ["18:00-23:59"] pour le '
+        "dernier train du soir)",
+    )
+
+
+class TrainsInputSchema(BaseModel):
+    params: TrainsInput
@@ -0,0 +1,107 @@
+import os
+import re
+from typing import List, Optional
+from loguru import logger
+
+from agents import clients
+from agents.tools.cache import RESULT_CACHE
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES
+from agents.tools.models import Train
+
+
+# 🎫 Tarifs manquants de l'API navitia complétés par le pool de navigateurs
+# sncf-connect (sncf-connect/src/server.ts), si SNCF_CONNECT_URL est défini
+
+_TIME = re.compile(r"(\d{1,2})\s*[:h]\s*(\d{2})")
+_AMOUNT = re.compile(r"\d+(?:[.,]\d{1,2})?")
+
+
+def resarail_code(uic: Optional[str]) -> Optional[str]:
+    """🚉 Code gare SNCF Connect (RESARAIL_STA_ + 7 premiers chiffres UIC)"""
+    digits = "".join(ch for ch in str(uic or "") if ch.isdigit())
+    return f"RESARAIL_STA_{digits[:7]}" if len(digits) >= 7 else None
+
+
+def parse_time_label(label: str) -> Optional[str]:
+    """🕐 Heure "6h04" ou "06:04" normalisée en "06:04" """
+    match = _TIME.search(label or "")
+    return f"{int(match.group(1)):02d}:{match.group(2)}" if match else None
+
+
+def parse_price_label(label: str) -> Optional[float]:
+    """💶 Montant en euros d'un libellé de prix ("Dès 1 045,50 €")"""
+    if not label:
+        return None
+    compact = re.sub(r"\s", "", str(label))
+    match = _AMOUNT.search(compact)
+    return float(match.group(0).replace(",", ".")) if match else None
+
+
+def _fetch(searches: List[dict]) -> List[Optional[List[dict]]]:
+    """📡 Résultats par recherche (cache, puis un seul lot pour les manquantes)"""
+    keys = [RESULT_CACHE.make_key("sncf_connect", search) for search in searches]
+    results = [RESULT_CACHE.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    response = clients.sncf_connect_search([searches[i] for i in missing]) or []
+    for i, result in zip(missing, response):
+        if result.get("ok"):
+            results[i] = result["trains"]
+            RESULT_CACHE.set(keys[i], result["trains"])
+        else:
+            logger.warning(f"⚠️ SNCF Connect search failed: {result.get('error')}")
+    return results
+
+
+def fill_missing_fares(trains: List[Train], currency: str) -> int:
+    """
+    🎫 Complète le prix des trains sans tarif navitia
+
+    Une recherche par trajet et par jour, envoyée en un seul lot ; les
+    trains sont appariés par heure de départ. Retourne le nombre de tarifs
+    complétés.
+    """
+    if not trains or not os.environ.get("SNCF_CONNECT_URL"):
+        return 0
+    groups = {}
+    for train in trains:
+        codes = (resarail_code(train.departure_uic), resarail_code(train.arrival_uic))
+        if None in codes:
+            continue
+        groups.setdefault((*codes, train.date), []).append(train)
+    if not groups:
+        return 0
+
+    searches = [
+        {
+            "origin": origin,
+            "destination": destination,
+            "date": f"{day}T{min(t.departure_time for t in items)}:00",
+        }
+        for (origin, destination, day), items in groups.items()
+    ]
+    try:
+        results = _fetch(searches)
+    except Exception as e:
+        logger.warning(f"⚠️ SNCF Connect fares unavailable: {e}")
+        return 0
+
+    filled = 0
+    for items, proposals in zip(groups.values(), results):
+        fares = {}
+        for proposal in proposals or []:
+            time = parse_time_label((proposal.get("departure") or {}).get("time"))
+            price = parse_price_label(proposal.get("price"))
+            if time and price is not None:
+                fares[time] = min(price, fares.get(time, price))
+        for train in items:
+            price = fares.get(train.departure_time)
+            if price is None:
+                continue
+            train.price = FX_RATES.convert(price, CANONICAL_CURRENCY, currency)
+            train.fare_source = "sncf-connect"
+            filled += 1
+    logger.info(f"🎫 {filled}/{len(trains)} missing fares filled from SNCF Connect")
+    return filled
@@ -0,0 +1,104 @@
+from typing import Callable, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from agents.tools.cache import RESULT_CACHE
+
+
+# 🎯 Paramètres de filtrage que l'on sait réappliquer localement
+HOTEL_FILTER_PARAMS = ("hotel_class", "min_price", "max_price")
+FLIGHT_FILTER_PARAMS = ("stops", "max_price")
+
+
+def split_filters(search_params: dict, filter_names: Iterable[str]) -> Tuple[dict, dict]:
+    """
+    ✂️ Sépare les paramètres de recherche de base des filtres de raffinement
+    """
+    base = {k: v for k, v in search_params.items() if k not in filter_names}
+    filters = {
+        k: v
+        for k, v in search_params.items()
+        if k in filter_names and v not in (None, "", 0, "0")
+    }
+    return base, filters
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def hotel_matches(hotel: dict, filters: dict) -> bool:
+    """🏨 Vérifie qu'un hôtel respecte les filtres de classe et de prix"""
+    if "hotel_class" in filters:
+        allowed = {int(c) for c in str(filters["hotel_class"]).split(",") if c.strip()}
+        if hotel.get("extracted_hotel_class") not in allowed:
+            return False
+
+    price = _number((hotel.get("rate_per_night") or {}).get("extracted_lowest"))
+    if "min_price" in filters or "max_price" in filters:
+        if price is None:
+            return False
+        if "min_price" in filters and price < float(filters["min_price"]):
+            return False
+        if "max_price" in filters and price > float(filters["max_price"]):
+            return False
+    return True
+
+
+def flight_matches(flight: dict, filters: dict) -> bool:
+    """✈️ Vérifie qu'un vol respecte les filtres d'escales et de prix"""
+    if "stops" in filters:
+        # SerpAPI : 1 = direct, 2 = 1 escale max, 3 = 2 escales max
+        max_stops = int(filters["stops"]) - 1
+        if len(flight.get("flights", [])) - 1 > max_stops:
+            return False
+
+    if "max_price" in filters:
+        price = _number(flight.get("price"))
+        if price is None or price > float(filters["max_price"]):
+            return False
+    return True
+
+
+def narrow_cached_superset(
+    namespace: str,
+    base_params: dict,
+    filters: dict,
+    list_keys: List[str],
+    matches: Callable[[dict, dict], bool],
+    min_results: int,
+) -> Optional[dict]:
+    """
+    🔬 Répond à une recherche raffinée en filtrant localement un sur-ensemble en cache
+
+    Le sur-ensemble est la réponse non filtrée pour les mêmes paramètres de
+    base (lieu/trajet, dates, voyageurs, devise). Retourne None si aucun
+    sur-ensemble n'est en cache ou s'il ne contient pas assez de candidats
+    pour satisfaire la demande : il faut alors interroger l'API.
+    """
+    superset_key = RESULT_CACHE.make_key(namespace, base_params)
+    if not filters or not RESULT_CACHE.contains(superset_key):
+        return None
+    superset = RESULT_CACHE.get(superset_key)
+    if superset is None:
+        return None
+
+    narrowed = dict(superset)
+    found = 0
+    for list_key in list_keys:
+        if list_key in superset:
+            narrowed[list_key] = [
+                item for item in superset[list_key] if matches(item, filters)
+            ]
+            found += len(narrowed[list_key])
+
+    if found < min_results:
+        logger.info(
+            f"🔬 Cached superset too small for {filters} ({found} < {min_results})"
+        )
+        return None
+
+    logger.info(f"🔬 Answered {namespace} refinement {filters} from cached superset")
+    return narrowed
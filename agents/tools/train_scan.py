@@ -0,0 +1,279 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import requests
+from loguru import logger
+
+from agents import clients
+from agents.tools.cache import RESULT_CACHE
+from agents.tools.models import Train, convert_trains, pack, parse_journeys, unpack
+from agents.tools.sncf_connect import fill_missing_fares
+
+# 🗓️ Balayage multi-jours : une requête navitia par (jour, créneau horaire),
+# prolongée par les liens "next" jusqu'à la fin du créneau. Les créneaux sont
+# interrogés en parallèle ; chaque appel passe par le quota SNCF partagé.
+
+# 🔢 Limites du balayage
+MAX_SCAN_DAYS = 14
+MAX_PAGES_PER_WINDOW = 6
+MAX_SCAN_QUERIES = 60
+SCAN_WORKERS = int(os.environ.get("TRAINS_SCAN_WORKERS", "4"))
+
+# 🕐 Créneau par défaut : toute la journée
+FULL_DAY = "00:00-23:59"
+
+
+def next_link(data: dict) -> Optional[str]:
+    """🔗 Lien navitia vers les voyages suivants (None s'il n'y en a pas)"""
+    for link in data.get("links") or ():
+        if link.get("type") == "next" and link.get("href"):
+            return link["href"]
+    return None
+
+
+def fetch_page(
+    url: str, params: Optional[dict] = None
+) -> Tuple[List[Train], Optional[str]]:
+    """
+    📡 Une page de voyages navitia : trains (en devise canonique) et lien suivant
+
+    La page est mise en cache compactée (msgpack) ; les trains renvoyés sont
+    des objets neufs, modifiables par l'appelant.
+    """
+
+    def fetch():
+        logger.info("🚀 Making API call to SNCF")
+        response = clients.sncf_get(
+            url, params=params, auth=(os.environ.get("SNCF_API_KEY"), "")
+        )
+        if response.status_code != 200:
+            logger.error(f"❌ API error: {response.status_code}")
+            raise requests.HTTPError(f"API error: {response.status_code}")
+        data = response.json()
+        # Analyse unique à la réception : le cache garde les trains compactés
+        return {
+            "trains": pack(parse_journeys(data.get("journeys", []))),
+            "next": next_link(data),
+        }
+
+    page = RESULT_CACHE.get_or_fetch(
+        RESULT_CACHE.make_key("trains_finder", {"url": url, **(params or {})}), fetch
+    )
+    return unpack(page["trains"]), page["next"]
+
+
+def _clock(value: str) -> str:
+    hours, minutes = value.strip().split(":")
+    return f"{int(hours):02d}:{int(minutes):02d}"
+
+
+def parse_windows(windows: Optional[List[str]]) -> List[Tuple[str, str]]:
+    """🕐 Créneaux "HH:MM-HH:MM" validés, triés et dédoublonnés"""
+    parsed = set()
+    for window in windows or [FULL_DAY]:
+        try:
+            start, end = (_clock(part) for part in window.split("-"))
+        except ValueError:
+            raise ValueError(f"Invalid time window {window!r} (expected HH:MM-HH:MM)")
+        if not "00:00" <= start <= end <= "23:59":
+            raise ValueError(f"Invalid time window {window!r}")
+        parsed.add((start, end))
+    return sorted(parsed)
+
+
+def scan_days(first: str, last: Optional[str]) -> List[str]:
+    """🗓️ Jours du balayage (au plus MAX_SCAN_DAYS)"""
+    start = date.fromisoformat(first)
+    end = date.fromisoformat(last) if last else start
+    if end < start:
+        raise ValueError(f"end_date {last} is before departure_date {first}")
+    count = (end - start).days + 1
+    if count > MAX_SCAN_DAYS:
+        logger.warning(f"⚠️ Train scan limited to {MAX_SCAN_DAYS} of {count} days")
+        count = MAX_SCAN_DAYS
+    return [(start + timedelta(days=i)).isoformat() for i in range(count)]
+
+
+class _Budget:
+    """🎟️ Nombre de requêtes amont autorisées pour un balayage (thread-safe)"""
+
+    def __init__(self, queries: int):
+        self.left = queries
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.left <= 0:
+                self.exhausted = True
+                return False
+            self.left -= 1
+            return True
+
+
+def _scan_window(
+    url: str, params: dict, day: str, window: Tuple[str, str], budget: _Budget
+) -> List[Train]:
+    """🔁 Trains d'un créneau d'un jour, en suivant les liens "next" """
+    start, end = window
+    page_url, page_params = url, {
+        **params,
+        "datetime": f"{day.replace('-', '')}T{start.replace(':', '')}00",
+    }
+    trains = []
+    for _ in range(MAX_PAGES_PER_WINDOW):
+        if not budget.take():
+            break
+        page, following = fetch_page(page_url, page_params)
+        trains += [
+            t for t in page if t.date == day and start <= t.departure_time <= end
+        ]
+        last = max(((t.date, t.departure_time) for t in page), default=None)
+        if following is None or last is None or last > (day, end):
+            break
+        page_url, page_params = following, None
+    return trains
+
+
+def _dedupe(trains: List[Train]) -> List[Train]:
+    """🧹 Un train par circulation (tarif conservé si une page l'a)"""
+    unique: Dict[tuple, Train] = {}
+    for train in trains:
+        key = (
+            train.date,
+            train.departure_time,
+            train.arrival_time,
+            train.train_number,
+            train.departure_station,
+        )
+        known = unique.get(key)
+        if known is None or (known.price is None and train.price is not None):
+            unique[key] = train
+    return sorted(unique.values(), key=lambda t: (t.date, t.departure_time))
+
+
+def _cheapest(trains: List[Train]) -> Optional[Train]:
+    priced = [t for t in trains if t.price is not None]
+    return min(priced, key=lambda t: (t.price, t.duration_minutes), default=None)
+
+
+def _fastest(trains: List[Train]) -> Optional[Train]:
+    return min(
+        trains,
+        key=lambda t: (t.duration_minutes, t.price is None, t.price or 0),
+        default=None,
+    )
+
+
+def timetable_matrix(
+    trains: List[Train], days: List[str], windows: List[Tuple[str, str]]
+) -> List[dict]:
+    """
+    📊 Une ligne par jour : nombre de trains, premier/dernier départ et prix
+    minimum par créneau, heures du moins cher et du plus rapide
+    """
+    by_day: Dict[str, List[Train]] = {day: [] for day in days}
+    for train in trains:
+        by_day[train.date].append(train)
+    rows = []
+    for day, items in by_day.items():
+        cells = {}
+        for start, end in windows:
+            inside = [t for t in items if start <= t.departure_time <= end]
+            cheapest = _cheapest(inside)
+            cells[f"{start}-{end}"] = {
+                "count": len(inside),
+                "first": inside[0].departure_time if inside else None,
+                "last": inside[-1].departure_time if inside else None,
+                "min_price": cheapest.price if cheapest else None,
+            }
+        cheapest, fastest = _cheapest(items), _fastest(items)
+        rows.append(
+            {
+                "date": day,
+                "count": len(items),
+                "windows": cells,
+                "cheapest": (
+                    {"departure_time": cheapest.departure_time, "price": cheapest.price}
+                    if cheapest
+                    else None
+                ),
+                "fastest": (
+                    {
+                        "departure_time": fastest.departure_time,
+                        "duration_minutes": fastest.duration_minutes,
+                    }
+                    if fastest
+                    else None
+                ),
+            }
+        )
+    return rows
+
+
+def scan_trains(
+    url: str,
+    params: dict,
+    departure_date: str,
+    end_date: Optional[str],
+    time_windows: Optional[List[str]],
+    currency: str,
+    max_queries: int = MAX_SCAN_QUERIES,
+) -> dict:
+    """
+    🗓️ Balaye une plage de dates et de créneaux horaires
+
+    Les (jour, créneau) sont interrogés en parallèle (SCAN_WORKERS) sous le
+    quota SNCF partagé et un budget de `max_queries` requêtes ; les voyages
+    sont fusionnés et dédoublonnés. Retourne la matrice jour × créneau et
+    les trains les moins chers et les plus rapides de chaque jour.
+    """
+    days = scan_days(departure_date, end_date)
+    windows = parse_windows(time_windows)
+    budget = _Budget(max_queries)
+    slots = [(day, window) for day in days for window in windows]
+    logger.info(f"🗓️ Scanning {len(days)} days x {len(windows)} time windows")
+
+    def scan(slot):
+        day, window = slot
+        try:
+            return _scan_window(url, params, day, window, budget), None
+        except Exception as e:
+            logger.warning(f"⚠️ Train scan failed for {day} {window}: {e}")
+            return [], f"{day} {window[0]}-{window[1]}: {e}"
+
+    found, errors = [], []
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(SCAN_WORKERS, len(slots)))
+    ) as executor:
+        for trains, error in executor.map(scan, slots):
+            found += trains
+            if error:
+                errors.append(error)
+
+    trains = convert_trains(_dedupe(found), currency)
+    # Tarifs absents de l'API : complétés via SNCF Connect si configuré
+    fill_missing_fares([t for t in trains if t.price is None], currency)
+
+    picks = []
+    for day in days:
+        items = [t for t in trains if t.date == day]
+        for train in (_cheapest(items), _fastest(items)):
+            if train is not None and train not in picks:
+                picks.append(train)
+    logger.info(
+        f"✨ Train scan: {len(trains)} trains, {max_queries - budget.left} queries"
+    )
+    if errors and not trains:
+        return {"status": "error", "message": "; ".join(errors), "errors": errors}
+    return {
+        "status": "success",
+        "matrix": timetable_matrix(trains, days, windows),
+        "trains": picks,
+        "count": len(trains),
+        "queries": max_queries - budget.left,
+        "truncated": budget.exhausted,
+        "errors": errors,
+    }
@@ -1,47 +1,12 @@
 import os
-from typing import Optional
-from datetime import datetime
-from langchain.pydantic_v1 import BaseModel, Field
 from langchain_core.tools import tool
-import requests
 from loguru import logger
-
-
-class TrainsInput(BaseModel):
-    origin_city: str = Field(description="Ville de départ (ex: Paris)")
-    destination_city: str = Field(description="Ville d'arrivée (ex: Lyon)")
-    departure_date: str = Field(description="Date de départ (YYYY-MM-DD)")
-    departure_time: Optional[str] = Field(None, description="Heure de départ (HH:MM)")
-
-
-class TrainsInputSchema(BaseModel):
-    params: TrainsInput
-
-
-def parse_fare_info(fare_data: dict) -> dict:
-    """
-    Analyse les informations de tarif depuis la réponse de l'API
-    """
-    if not fare_data or not fare_data.get("found"):
-        return {"found": False, "total": "N/A", "currency": "EUR", "tickets": []}
-
-    tickets = []
-    for ticket in fare_data.get("links", []):
-        if "ticket" in ticket.get("id", ""):
-            ticket_info = {
-                "id": ticket.get("id"),
-                "name": ticket.get("name", "N/A"),
-                "cost": ticket.get("cost", {}).get("value", "N/A"),
-                "currency": ticket.get("cost", {}).get("currency", "EUR"),
-            }
-            tickets.append(ticket_info)
-
-    return {
-        "found": True,
-        "total": fare_data.get("total", {}).get("value", "N/A"),
-        "currency": fare_data.get("total", {}).get("currency", "EUR"),
-        "tickets": tickets,
-    }
+from agents.log import cap
+from agents.tools.currency import FX_RATES
+from agents.tools.models import convert_trains
+from agents.tools.schemas import TrainsInput, TrainsInputSchema
+from agents.tools.sncf_connect import fill_missing_fares
+from agents.tools.train_scan import fetch_page, scan_trains
 
 
 def format_datetime(date: str, time: str = None) -> str:
@@ -54,15 +19,17 @@ def format_datetime(date: str, time: str = None) -> str:
 @tool(args_schema=TrainsInputSchema)
 def trains_finder(params: TrainsInput):
     """
-    🚂 Recherche des trains SNCF
+    🚂 Recherche des trains SNCF (ou balayage de plusieurs jours et créneaux)
     """
     logger.info(
         f"🔍 Starting train search: {params.origin_city} → {params.destination_city}"
     )
 
     # Configuration de l'API SNCF
-    SNCF_API_KEY = os.environ.get("SNCF_API_KEY")
-    base_url = "https://api.sncf.com/v1/coverage/sncf/journeys"
+    api_url = os.environ.get("SNCF_API_URL", "https://api.sncf.com/v1")
+    base_url = f"{api_url}/coverage/sncf/journeys"
+
+    currency = FX_RATES.resolve(params.currency)
 
     # Préparation de la date/heure
     datetime_str = format_datetime(params.departure_date, params.departure_time)
@@ -79,65 +46,34 @@ def trains_finder(params: TrainsInput):
     }
 
     try:
-        logger.info("🚀 Making API call to SNCF")
-        response = requests.get(base_url, params=search_params, auth=(SNCF_API_KEY, ""))
-
-        if response.status_code != 200:
-            logger.error(f"❌ API error: {response.status_code}")
+        # 🗓️ Mode balayage : plage de dates et/ou créneaux horaires
+        if params.end_date or params.time_windows:
+            windows = params.time_windows or (
+                [f"{params.departure_time}-23:59"] if params.departure_time else None
+            )
             return {
-                "status": "error",
-                "message": f"API error: {response.status_code}",
-                "parameters": search_params,
+                **scan_trains(
+                    base_url,
+                    search_params,
+                    params.departure_date,
+                    params.end_date,
+                    windows,
+                    currency,
+                ),
+                "search_parameters": {
+                    "from": params.origin_city,
+                    "to": params.destination_city,
+                    "dates": [params.departure_date, params.end_date],
+                    "time_windows": windows,
+                },
             }
 
-        data = response.json()
-        journeys = data.get("journeys", [])
-
-        # Traitement des résultats
-        trains = []
-        for journey in journeys:
-            transport_sections = [
-                section
-                for section in journey["sections"]
-                if section.get("type") == "public_transport"
-            ]
+        trains, _ = fetch_page(base_url, search_params)
+        trains = convert_trains(trains, currency)
+        logger.opt(lazy=True).debug("Trains: {}", lambda: cap(trains))
 
-            if transport_sections:
-                section = transport_sections[0]
-                display_info = section.get("display_informations", {})
-
-                # Formatage des dates
-                departure_time = datetime.strptime(
-                    journey["departure_date_time"], "%Y%m%dT%H%M%S"
-                )
-                arrival_time = datetime.strptime(
-                    journey["arrival_date_time"], "%Y%m%dT%H%M%S"
-                )
-
-                train = {
-                    "departure": {
-                        "station": section["from"]["stop_point"]["name"],
-                        "city": section["from"]["stop_point"]["label"],
-                        "time": departure_time.strftime("%H:%M"),
-                    },
-                    "arrival": {
-                        "station": section["to"]["stop_point"]["name"],
-                        "city": section["to"]["stop_point"]["label"],
-                        "time": arrival_time.strftime("%H:%M"),
-                    },
-                    "duration_minutes": journey["duration"] // 60,
-                    "train_type": display_info.get("commercial_mode", ""),
-                    "train_number": display_info.get("headsign", ""),
-                    "company": display_info.get("network", "SNCF"),
-                    "transfers": journey["nb_transfers"],
-                    "co2_emission": journey.get("co2_emission", {}).get("value", 0),
-                    "price": parse_fare_info(journey.get("fare", {})),
-                }
-
-                # Log des détails pour debug
-                logger.debug(f"Train details: {train}")
-
-                trains.append(train)
+        # Tarifs absents de l'API : complétés via SNCF Connect si configuré
+        fill_missing_fares([t for t in trains if t.price is None], currency)
 
         return {
             "status": "success",
@@ -154,3 +90,4 @@ def trains_finder(params: TrainsInput):
     except Exception as e:
         logger.error(f"❌ Error in train search: {str(e)}")
         return {"status": "error", "message": str(e), "parameters": search_params}
+
@@ -0,0 +1,261 @@
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+from agents.quota import UPSTREAM_QUOTAS, low_priority
+from agents.tools.cache import ORIGIN_WARM, RESULT_CACHE
+from agents.tools.registry import TOOL_SPECS
+from agents.tools.schemas import FlightsInput, HotelsInput, TrainsInput
+
+
+# 📋 Outils préchauffables et leurs champs de date (retirés pour obtenir un
+# modèle de recherche indépendant du jour demandé)
+INPUT_MODELS = {
+    "flights_finder": FlightsInput,
+    "hotels_finder": HotelsInput,
+    "trains_finder": TrainsInput,
+}
+DATE_FIELDS = {
+    "flights_finder": ("outbound_date", "return_date"),
+    "hotels_finder": ("check_in_date", "check_out_date"),
+    "trains_finder": ("departure_date", "departure_time", "end_date"),
+}
+
+# ⚙️ Surcharges des appels de préchauffage : la recherche approfondie en cache
+# sert aussi les recherches two_phase ; les vols retour restent à la demande
+WARM_OVERRIDES = {"flights_finder": {"search_mode": "deep", "return_top_k": 0}}
+
+
+def template_of(name: str, params: dict) -> Optional[dict]:
+    """🧩 Modèle de recherche (paramètres normalisés, sans les dates)"""
+    model = INPUT_MODELS.get(name)
+    if model is None:
+        return None
+    try:
+        normalized = model(**params).dict()
+    except Exception:
+        return None
+    template = {k: v for k, v in normalized.items() if k not in DATE_FIELDS[name]}
+    if name == "flights_finder":
+        template["round_trip"] = bool(normalized.get("return_date"))
+    return template
+
+
+def upcoming_weekends(count: int, today: Optional[date] = None) -> List[Tuple[date, date]]:
+    """
+    📅 Prochains week-ends (vendredi, dimanche), à partir du prochain vendredi
+    (aujourd'hui compris)
+
+    Le samedi et le dimanche, le week-end en cours n'est pas inclus : son
+    vendredi est passé, on ne peut plus y chercher de départ.
+    """
+    today = today or date.today()
+    friday = today + timedelta(days=(4 - today.weekday()) % 7)
+    return [
+        (friday + timedelta(weeks=i), friday + timedelta(weeks=i, days=2))
+        for i in range(count)
+    ]
+
+
+def dated_call(name: str, template: dict, friday: date, sunday: date) -> dict:
+    """📅 Appel d'outil pour un modèle de recherche et un week-end donné"""
+    params = {k: v for k, v in template.items() if k != "round_trip"}
+    if name == "flights_finder":
+        params["outbound_date"] = friday.isoformat()
+        if template.get("round_trip"):
+            params["return_date"] = sunday.isoformat()
+    elif name == "hotels_finder":
+        params["check_in_date"] = friday.isoformat()
+        params["check_out_date"] = sunday.isoformat()
+    elif name == "trains_finder":
+        params["departure_date"] = friday.isoformat()
+    params.update(WARM_OVERRIDES.get(name, {}))
+    return {"name": name, "args": {"params": params}}
+
+
+class SearchHistory:
+    """
+    📈 Popularité des recherches, apprise des appels d'outils
+
+    Chaque modèle de recherche a un score à décroissance exponentielle
+    (demi-vie `half_life_seconds`). Avec un fichier, l'historique est
+    conservé entre deux redémarrages (une ligne JSON par recherche).
+    """
+
+    def __init__(self, path: Optional[str] = None, half_life_seconds: float = 7 * 86400):
+        self.path = path
+        self.half_life = half_life_seconds
+        self._scores: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _decay(self, elapsed: float) -> float:
+        return 0.5 ** (elapsed / self.half_life)
+
+    def _add(self, name: str, template: dict, ts: float):
+        signature = json.dumps([name, template], sort_keys=True, default=str)
+        entry = self._scores.get(signature)
+        if entry is None:
+            self._scores[signature] = [1.0, ts, name, template]
+        elif ts >= entry[1]:
+            entry[0] = entry[0] * self._decay(ts - entry[1]) + 1
+            entry[1] = ts
+        else:
+            entry[0] += self._decay(entry[1] - ts)
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                    self._add(event["name"], event["template"], event["ts"])
+                except (ValueError, KeyError):
+                    continue
+        logger.info(f"📈 Loaded {len(self._scores)} search templates from {self.path}")
+
+    def record(self, name: str, args: dict):
+        """📝 Enregistre une recherche utilisateur"""
+        template = template_of(name, (args or {}).get("params") or {})
+        if template is None:
+            return
+        ts = time.time()
+        with self._lock:
+            self._add(name, template, ts)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    event = {"ts": ts, "name": name, "template": template}
+                    f.write(json.dumps(event, default=str) + "\n")
+
+    def top(self, k: int, min_score: float = 0.0) -> List[Tuple[str, dict, float]]:
+        """🔥 Les `k` modèles de recherche les plus populaires"""
+        now = time.time()
+        with self._lock:
+            scored = [
+                (name, template, score * self._decay(max(now - updated, 0)))
+                for score, updated, name, template in self._scores.values()
+            ]
+        scored = [item for item in scored if item[2] >= min_score]
+        scored.sort(key=lambda item: item[2], reverse=True)
+        return scored[:k]
+
+
+class CacheWarmer:
+    """
+    🔥 Préchauffage du cache pour les recherches populaires
+
+    Rejoue en tâche de fond les modèles de recherche les plus fréquents pour
+    les prochains week-ends, en basse priorité sur le quota amont partagé :
+    un appel n'est émis que s'il reste des jetons hors réserve utilisateur.
+    """
+
+    def __init__(
+        self,
+        history: SearchHistory,
+        top_k: int = 10,
+        weekends: int = 2,
+        min_score: float = 2.0,
+        interval_seconds: float = 600,
+    ):
+        self.history = history
+        self.top_k = top_k
+        self.weekends = weekends
+        self.min_score = min_score
+        self.interval_seconds = interval_seconds
+        self._tools = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"rounds": 0, "warmed": 0, "throttled": 0, "failed": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def plan(self, today: Optional[date] = None) -> List[dict]:
+        """📋 Appels à préchauffer, du modèle le plus populaire au moins populaire"""
+        weekends = upcoming_weekends(self.weekends, today)
+        return [
+            dated_call(name, template, friday, sunday)
+            for name, template, _ in self.history.top(self.top_k, self.min_score)
+            for friday, sunday in weekends
+        ]
+
+    def warm_once(self, tools, today: Optional[date] = None):
+        """🔥 Un passage de préchauffage"""
+        for call in self.plan(today):
+            if call["name"] not in tools:
+                continue
+            quota = UPSTREAM_QUOTAS[TOOL_SPECS[call["name"]].upstream]
+            if not quota.has_capacity(low=True):
+                self._count("throttled")
+                continue
+            try:
+                with RESULT_CACHE.origin(ORIGIN_WARM), low_priority():
+                    result = tools[call["name"]].invoke(call["args"])
+                ok = isinstance(result, dict) and result.get("status") != "error"
+            except Exception as e:
+                logger.warning(f"⚠️ Cache warm-up of {call['name']} failed: {e}")
+                ok = False
+            self._count("warmed" if ok else "failed")
+        self._count("rounds")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.warm_once(self._tools)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache warm-up round failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self, tools):
+        """🚀 Démarre le préchauffage périodique (une seule fois par processus)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._tools = tools
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="cache-warmer", daemon=True
+            )
+            self._thread.start()
+        logger.info("🔥 Cache warmer started")
+
+    def stop(self):
+        """🛑 Arrête le préchauffage périodique"""
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict:
+        """
+        📊 Gain de taux de succès du cache par rapport à un cache froid
+
+        Sans préchauffage, la première lecture d'une entrée préchauffée
+        aurait été un échec : le taux de référence les retire des succès.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        cache = RESULT_CACHE.stats()
+        lookups = cache["hits"] + cache["misses"]
+        stats["hot_templates"] = len(self.history.top(self.top_k, self.min_score))
+        stats["hits"] = cache["warm_hits"]
+        stats["wasted"] = cache["warm_wasted"]
+        stats["hit_ratio"] = cache["warm_hit_ratio"]
+        stats["demand_hit_ratio"] = cache["hit_ratio"]
+        stats["cold_baseline_hit_ratio"] = (
+            (cache["hits"] - cache["warm_hits"]) / lookups if lookups else 0.0
+        )
+        stats["lift"] = stats["demand_hit_ratio"] - stats["cold_baseline_hit_ratio"]
+        return stats
+
+
+# 🌍 Historique (SEARCH_HISTORY_FILE pour le persister) et préchauffage partagés
+SEARCH_HISTORY = SearchHistory(os.environ.get("SEARCH_HISTORY_FILE"))
+CACHE_WARMER = CacheWarmer(SEARCH_HISTORY)
@@ -0,0 +1,59 @@
+"""
+⏱️ Benchmark du démarrage à froid
+
+Mesure, dans un interpréteur neuf à chaque essai, le temps d'import des
+points d'entrée et la création de l'agent, ainsi que les bibliothèques
+lourdes chargées au passage (elles doivent l'être au premier usage).
+
+    python -m benchmarks.bench_import
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+
+# 📦 Bibliothèques qui ne devraient pas être importées au démarrage
+HEAVY_MODULES = ("langchain_openai", "openai", "serpapi", "sendgrid", "agents.tools.flights_finder")
+
+STEPS = {
+    "import config": "import config",
+    "import agents.agent": "import agents.agent",
+    "Agent()": "from agents.agent import Agent; Agent()",
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement: str) -> dict:
+    samples, loaded = [], []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        samples.append(result["ms"])
+        loaded = result["loaded"]
+    return {"median_ms": statistics.median(samples), "loaded": loaded}
+
+
+def main():
+    print(f"{RUNS} fresh interpreters per step\n")
+    for label, statement in STEPS.items():
+        result = measure(statement)
+        heavy = ", ".join(result["loaded"]) or "-"
+        print(f"{label:<22} {result['median_ms']:>8.0f} ms   heavy modules loaded: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
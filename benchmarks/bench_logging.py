@@ -0,0 +1,96 @@
+"""
+⏱️ Micro-benchmark du coût de journalisation par appel d'outil
+
+Compare l'ancienne journalisation (f-strings évaluées à chaque appel, réponse
+SerpAPI complète au niveau INFO) au mode structuré (évaluation paresseuse,
+troncature, secrets masqués).
+
+    python -m benchmarks.bench_logging
+"""
+import io
+import os
+import time
+
+from loguru import logger
+
+from agents.log import cap, redact, setup_logging
+
+ITERATIONS = 200
+
+
+def fake_response(n_flights: int = 400) -> dict:
+    """Réponse Google Flights synthétique (~1 Mo une fois formatée)"""
+    flight = {
+        "flights": [
+            {
+                "departure_airport": {"name": "Paris CDG", "id": "CDG", "time": "2025-05-01 10:00"},
+                "arrival_airport": {"name": "Rome FCO", "id": "FCO", "time": "2025-05-01 12:10"},
+                "airline": "Air France",
+                "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/AF.png",
+                "flight_number": "AF 1404",
+                "extensions": ["Average legroom (76 cm)", "Wi-Fi for a fee"] * 3,
+            }
+        ]
+        * 2,
+        "total_duration": 130,
+        "price": 142,
+    }
+    return {"best_flights": [flight] * n_flights, "search_metadata": {"id": "x" * 24}}
+
+
+SEARCH_PARAMS = {
+    "api_key": "serpapi-secret-key-0123456789",
+    "engine": "google_flights",
+    "departure_id": "CDG",
+    "arrival_id": "FCO",
+    "outbound_date": "2025-05-01",
+}
+
+
+def legacy_call(data: dict):
+    logger.info(f"🌐 Prepared SerpAPI parameters: {SEARCH_PARAMS}")
+    logger.info(f"📝 Response keys: {data.values()}")
+
+
+def structured_call(data: dict):
+    logger.opt(lazy=True).debug(
+        "🌐 Prepared SerpAPI parameters: {}", lambda: cap(redact(SEARCH_PARAMS))
+    )
+    logger.opt(lazy=True).debug("📝 Response keys: {}", lambda: list(data))
+
+
+def measure(label: str, call, data: dict, sink: io.StringIO):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        call(data)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<38} {elapsed / ITERATIONS * 1e6:>10.1f} µs/call"
+        f" {sink.tell() / ITERATIONS / 1024:>10.1f} KiB/call"
+    )
+
+
+def main():
+    data = fake_response()
+    print(f"Payload: {len(repr(data)) / 1024:.0f} KiB, {ITERATIONS} calls\n")
+
+    sink = io.StringIO()
+    setup_logging("plain", sink=sink)
+    measure("legacy (eager f-strings, INFO)", legacy_call, data, sink)
+
+    sink = io.StringIO()
+    setup_logging("structured", sink=sink)
+    measure("structured (lazy, DEBUG filtered)", structured_call, data, sink)
+
+    sink = io.StringIO()
+    os.environ["LOG_LEVELS"] = "DEBUG"
+    setup_logging("structured", sink=sink)
+    measure("structured (lazy, DEBUG emitted)", structured_call, data, sink)
+    del os.environ["LOG_LEVELS"]
+
+    leaked = "serpapi-secret-key" in sink.getvalue()
+    print(f"\nAPI key present in structured output: {leaked}")
+
+
+if __name__ == "__main__":
+    main()
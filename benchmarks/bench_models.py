@@ -0,0 +1,269 @@
+"""
+⏱️ Micro-benchmark des modèles de résultats compacts (vols, hôtels, trains)
+
+Compare, pour 1 000 résultats, les dict construits jusqu'ici par les outils
+(copie du JSON amont, double strptime et dict imbriqués pour les trains,
+encodage str()) aux modèles à slots de agents.tools.models (un seul passage,
+encodage orjson pour les ToolMessages, trains en tableau, et msgpack pour
+les caches) : temps d'analyse, mémoire conservée et taille/temps d'encodage.
+
+    python -m benchmarks.bench_models
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from agents.tools.currency import FX_RATES, convert_hotels
+from agents.tools.models import (
+    Flight,
+    Hotel,
+    convert_trains,
+    pack,
+    parse_journeys,
+    to_json,
+    train_table,
+    unpack,
+)
+from benchmarks.stub_servers import serpapi_response, sncf_response
+
+RESULTS = 1000
+REPEAT = 5
+CURRENCY = "USD"
+
+
+# 🧓 Construction des résultats avant les modèles (référence)
+
+
+def legacy_flights(flights: list) -> list:
+    rate = FX_RATES.rate("EUR", CURRENCY)
+    return [{**flight, "price": round(flight["price"] * rate, 2)} for flight in flights]
+
+
+SUMMARY_FIELDS = (
+    "name",
+    "type",
+    "property_token",
+    "link",
+    "description",
+    "rate_per_night",
+    "total_rate",
+    "hotel_class",
+    "extracted_hotel_class",
+    "overall_rating",
+    "reviews",
+    "check_in_time",
+    "check_out_time",
+    "gps_coordinates",
+)
+
+
+def legacy_hotels(hotels: list) -> list:
+    summaries = []
+    for hotel in convert_hotels(hotels, CURRENCY):
+        summary = {k: hotel[k] for k in SUMMARY_FIELDS if k in hotel}
+        for block in ("rate_per_night", "total_rate"):
+            if isinstance(summary.get(block), dict):
+                summary[block] = {
+                    k: v for k, v in summary[block].items() if k.endswith("lowest")
+                }
+        images = hotel.get("images") or []
+        if images:
+            summary["thumbnail"] = images[0].get("thumbnail")
+        amenities = hotel.get("amenities") or []
+        summary["amenities"] = amenities[:8]
+        summary["amenities_count"] = len(amenities)
+        summaries.append(summary)
+    return summaries
+
+
+def legacy_fare(fare: dict) -> dict:
+    if not fare or not fare.get("found"):
+        return {"found": False, "total": "N/A", "currency": CURRENCY, "tickets": []}
+
+    def convert(cost: dict):
+        value = FX_RATES.convert(
+            cost.get("value"), cost.get("currency", "EUR"), CURRENCY
+        )
+        return "N/A" if value is None else value
+
+    tickets = [
+        {
+            "id": t.get("id"),
+            "name": t.get("name", "N/A"),
+            "cost": convert(t.get("cost", {})),
+            "currency": CURRENCY,
+        }
+        for t in fare.get("links", [])
+        if "ticket" in t.get("id", "")
+    ]
+    return {
+        "found": True,
+        "total": convert(fare.get("total", {})),
+        "currency": CURRENCY,
+        "tickets": tickets,
+    }
+
+
+def legacy_trains(journeys: list) -> list:
+    trains = []
+    for journey in journeys:
+        sections = [
+            s for s in journey["sections"] if s.get("type") == "public_transport"
+        ]
+        if not sections:
+            continue
+        section = sections[0]
+        display = section.get("display_informations", {})
+        departure = datetime.strptime(journey["departure_date_time"], "%Y%m%dT%H%M%S")
+        arrival = datetime.strptime(journey["arrival_date_time"], "%Y%m%dT%H%M%S")
+        trains.append(
+            {
+                "departure": {
+                    "station": section["from"]["stop_point"]["name"],
+                    "city": section["from"]["stop_point"]["label"],
+                    "time": departure.strftime("%H:%M"),
+                },
+                "arrival": {
+                    "station": section["to"]["stop_point"]["name"],
+                    "city": section["to"]["stop_point"]["label"],
+                    "time": arrival.strftime("%H:%M"),
+                },
+                "duration_minutes": journey["duration"] // 60,
+                "train_type": display.get("commercial_mode", ""),
+                "train_number": display.get("headsign", ""),
+                "company": display.get("network", "SNCF"),
+                "transfers": journey["nb_transfers"],
+                "co2_emission": journey.get("co2_emission", {}).get("value", 0),
+                "price": legacy_fare(journey.get("fare", {})),
+            }
+        )
+    return trains
+
+
+# ✨ Modèles compacts
+
+
+def model_flights(flights: list) -> list:
+    rate = FX_RATES.rate("EUR", CURRENCY)
+    return [Flight.from_serpapi(flight, rate) for flight in flights]
+
+
+def model_hotels(hotels: list) -> list:
+    rate = FX_RATES.rate("EUR", CURRENCY)
+    return [Hotel.from_serpapi(hotel, rate) for hotel in hotels]
+
+
+def model_trains(journeys: list) -> list:
+    return convert_trains(parse_journeys(journeys), CURRENCY)
+
+
+# 🧪 Données amont synthétiques (bouchons du test de charge)
+
+
+def upstream_payloads() -> dict:
+    flights, hotels, journeys = [], [], []
+    day = 0
+    while len(flights) < RESULTS or len(hotels) < RESULTS or len(journeys) < RESULTS:
+        date = f"2025-{day % 12 + 1:02d}-{day % 28 + 1:02d}"
+        data = serpapi_response(
+            {"engine": "google_flights", "outbound_date": date, "deep_search": day}
+        )
+        flights += data["best_flights"] + data["other_flights"]
+        hotels += serpapi_response({"engine": "google_hotels", "q": f"City {day}"})[
+            "properties"
+        ]
+        journeys += sncf_response({"datetime": f"{date.replace('-', '')}T000000"})[
+            "journeys"
+        ]
+        day += 1
+    return {
+        "flights": json.dumps(flights[:RESULTS]),
+        "hotels": json.dumps(hotels[:RESULTS]),
+        "trains": json.dumps(journeys[:RESULTS]),
+    }
+
+
+def parse_ms(parse, raw: list) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        parse(raw)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def retained_kib(parse, text: str) -> float:
+    """Mémoire conservée par les résultats une fois la réponse amont libérée"""
+    gc.collect()
+    tracemalloc.start()
+    raw = json.loads(text)
+    results = parse(raw)
+    del raw
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return current / 1024
+
+
+def encode(results: list, encoder) -> tuple:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        data = encoder(results)
+    return len(data) / 1024, (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    payloads = upstream_payloads()
+    cases = {
+        "flights": (legacy_flights, model_flights),
+        "hotels": (legacy_hotels, model_hotels),
+        "trains": (legacy_trains, model_trains),
+    }
+    print(f"Per {RESULTS} results (best of {REPEAT}):\n")
+    print(
+        f"{'':<8} {'variant':<8} {'parse ms':>9} {'memory KiB':>11}"
+        f" {'encoding':<10} {'size KiB':>9} {'encode ms':>10}"
+    )
+    for name, (legacy, model) in cases.items():
+        raw = json.loads(payloads[name])
+        legacy_results, model_results = legacy(raw), model(raw)
+        rows = [
+            ("dict", legacy, "str()", encode(legacy_results, str)),
+            ("model", model, "orjson", encode(model_results, to_json)),
+            ("", None, "msgpack", encode(model_results, pack)),
+        ]
+        if name == "trains":
+            # Encodage des ToolMessages : en-tête de colonnes puis lignes
+            rows.insert(
+                2,
+                (
+                    "",
+                    None,
+                    "table",
+                    encode(model_results, lambda r: to_json(train_table(r))),
+                ),
+            )
+        for variant, parse, encoding, (size, encode_ms) in rows:
+            timing = f"{parse_ms(parse, raw):>9.2f}" if parse else f"{'':>9}"
+            memory = (
+                f"{retained_kib(parse, payloads[name]):>11.0f}"
+                if parse
+                else f"{'':>11}"
+            )
+            print(
+                f"{name if variant == 'dict' else '':<8} {variant:<8} {timing} {memory}"
+                f" {encoding:<10} {size:>9.1f} {encode_ms:>10.2f}"
+            )
+        start = time.perf_counter()
+        unpack(pack(model_results))
+        print(
+            f"{'':<8} msgpack round trip {(time.perf_counter() - start) * 1000:.2f} ms\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
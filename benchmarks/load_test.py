@@ -0,0 +1,480 @@
+"""
+📈 Test de charge : conversations de voyage concurrentes sur `Agent.graph`
+
+Chaque utilisateur simulé (un thread, avec son propre Agent comme une
+session Streamlit) enchaîne des conversations : recherche (LLM + outils)
+jusqu'à l'interruption avant l'email, puis pour une partie d'entre elles
+reprise du graphe pour envoyer l'email et libération du thread. Les API
+amont sont des bouchons locaux (benchmarks.stub_servers) lancés dans un
+processus séparé.
+
+Sortie : débit, p50/p95/p99 par nœud du graphe, taux d'erreurs et
+croissance de la mémoire (RSS) par thread de conversation.
+
+    python -m benchmarks.load_test --users 20 --conversations 200
+    python -m benchmarks.load_test --users 50 --latency-scale 0.5 --llm-error-rate 0.02 --json report.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from benchmarks.stub_servers import add_arguments, stub_options
+
+NODES = ("call_tools_llm", "invoke_tools", "email_sender")
+
+# ✈️ Routes synthétiques : (aéroport départ, aéroport arrivée, ville de l'hôtel)
+ROUTES = [
+    ("CDG", "FCO", "Rome"),
+    ("CDG", "LHR", "London"),
+    ("ORY", "BCN", "Barcelona"),
+    ("CDG", "MAD", "Madrid"),
+    ("CDG", "LIS", "Lisbon"),
+    ("CDG", "AMS", "Amsterdam"),
+    ("CDG", "BER", "Berlin"),
+    ("CDG", "VIE", "Vienna"),
+    ("ORY", "NCE", "Nice"),
+    ("CDG", "MXP", "Milan"),
+]
+# 🚄 Trajets en train (codes INSEE) ajoutés à certaines conversations
+TRAIN_LEGS = [("75056", "69123"), ("75056", "13055"), ("75056", "33063")]
+
+
+def rss_mib() -> float:
+    """Mémoire résidente courante du processus (MiB)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Hors Linux : pic de mémoire résidente
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(samples: list, q: float) -> float:
+    """Percentile par rang le plus proche"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class Recorder:
+    """⏱️ Durées et erreurs par nœud (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.durations = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    @contextmanager
+    def time(self, name: str):
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.durations[name].append(elapsed)
+                self.errors[name] += failed
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] += value
+
+
+def instrumented_agent_class(recorder: Recorder):
+    """Agent dont chaque nœud du graphe est chronométré"""
+    from agents.agent import Agent
+    from agents.blobstore import BLOB_STORE
+
+    class InstrumentedAgent(Agent):
+        def call_tools_llm(self, state, config):
+            with recorder.time("call_tools_llm"):
+                return super().call_tools_llm(state, config)
+
+        def invoke_tools(self, state, config):
+            with recorder.time("invoke_tools"):
+                update = super().invoke_tools(state, config)
+            for message in update["messages"]:
+                content = BLOB_STORE.get(message.content)
+                recorder.count("tool_calls")
+                if content.startswith("Error") or '"status":"error"' in content:
+                    recorder.count("tool_errors")
+            return update
+
+        def email_sender(self, state, config=None):
+            with recorder.time("email_sender"):
+                return super().email_sender(state, config)
+
+    return InstrumentedAgent
+
+
+def trip_message(rng: random.Random, routes: int, train_ratio: float) -> str:
+    origin, destination, city = rng.choice(ROUTES[:routes])
+    outbound = date.today() + timedelta(days=rng.randrange(7, 60))
+    back = outbound + timedelta(days=rng.randrange(2, 6))
+    message = f"Trip {origin}->{destination} {outbound}..{back} hotel {city}"
+    if rng.random() < train_ratio:
+        train_from, train_to = rng.choice(TRAIN_LEGS)
+        message += f" train {train_from}->{train_to}"
+    return message
+
+
+EMAIL = {
+    "from": "agent@example.com",
+    "to": "traveller@example.com",
+    "subject": "Load test",
+}
+
+
+def send_email(agent, config: dict):
+    """📧 Reprise après l'interruption humaine, comme le formulaire d'email"""
+    agent.graph.update_state(config, {"email": EMAIL})
+    agent.graph.invoke(None, config=config)
+
+
+def run_conversation(agent, recorder: Recorder, rng: random.Random, args):
+    """💬 Une conversation : recherche, puis éventuellement envoi de l'email"""
+    from langchain_core.messages import HumanMessage
+
+    thread_id = str(uuid.uuid4())
+    config = {"configurable": {"thread_id": thread_id}}
+    with recorder.time("conversation"):
+        agent.graph.invoke(
+            {
+                "messages": [
+                    HumanMessage(
+                        content=trip_message(rng, args.routes, args.train_ratio)
+                    )
+                ]
+            },
+            config=config,
+        )
+        if rng.random() < args.email_ratio:
+            send_email(agent, config)
+            agent.release_thread(thread_id)
+            recorder.count("emails")
+        else:
+            recorder.count("retained_threads")
+
+
+def warm_up(agent):
+    """🔥 Conversation complète hors mesure : imports paresseux et clients créés"""
+    from langchain_core.messages import HumanMessage
+
+    config = {"configurable": {"thread_id": "warm-up"}}
+    message = f"Trip {ROUTES[0][0]}->{ROUTES[0][1]} {date.today()}..{date.today()} hotel {ROUTES[0][2]}"
+    agent.graph.invoke({"messages": [HumanMessage(content=message)]}, config=config)
+    send_email(agent, config)
+    agent.release_thread("warm-up")
+
+
+def user_loop(agent, recorder, args, seed: int, quota: list, lock):
+    rng = random.Random(seed)
+    while True:
+        with lock:
+            if quota[0] <= 0:
+                return
+            quota[0] -= 1
+        try:
+            run_conversation(agent, recorder, rng, args)
+        except Exception as e:
+            recorder.count("failed_conversations")
+            if recorder.counters["failed_conversations"] <= 3:
+                print(f"conversation failed: {e!r}", file=sys.stderr)
+
+
+def build_config(config_class, args):
+    config = config_class()
+    config.prefetch = not args.no_prefetch
+    config.cache_warmer = False
+    config.flight_search_mode = args.flight_search_mode
+    config.thread_ttl_seconds = args.thread_ttl
+    return config
+
+
+def start_stubs(args) -> tuple:
+    """Lance les bouchons dans un processus séparé (hors mesure mémoire)"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_servers", "--port", str(port)]
+        + stub_options(args),
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    process.stdout.readline()  # "Stub servers listening on ..."
+    return process, f"http://127.0.0.1:{port}"
+
+
+def point_clients_at(base_url: str, args):
+    """Redirige tous les clients amont vers les bouchons (avant tout import de l'agent)"""
+    os.environ.update(
+        {
+            "SERPAPI_BASE_URL": base_url,
+            "SNCF_API_URL": f"{base_url}/v1",
+            "SENDGRID_HOST": base_url,
+            "OPENAI_BASE_URL": f"{base_url}/v1",
+            "OPENAI_API_KEY": "stub",
+            "SERPAPI_API_KEY": "stub",
+            "SNCF_API_KEY": "stub",
+            "SENDGRID_API_KEY": "stub",
+            "EMAIL_OUTBOX_DB": ":memory:",
+            "EMAIL_TRANSPORT": "sendgrid",
+            "SERPAPI_CALLS_PER_MINUTE": str(args.serpapi_quota),
+            "SERPAPI_BURST": str(max(args.serpapi_quota // 60, 10)),
+            "SNCF_CALLS_PER_MINUTE": str(args.sncf_quota),
+            "SNCF_BURST": str(max(args.sncf_quota // 60, 10)),
+            "LOG_LEVEL": args.log_level,
+            "LOG_MODE": "plain",
+        }
+    )
+
+
+def report(
+    recorder: Recorder,
+    args,
+    elapsed: float,
+    rss: dict,
+    stub_stats: dict,
+    email_stats: dict,
+    prompt_stats: dict,
+) -> dict:
+    conversations = len(recorder.durations["conversation"])
+    failed = recorder.counters["failed_conversations"]
+    threads = conversations + failed
+    nodes = {}
+    for name in NODES + ("conversation",):
+        samples = recorder.durations[name]
+        nodes[name] = {
+            "count": len(samples),
+            "p50_ms": round(percentile(samples, 50), 1),
+            "p95_ms": round(percentile(samples, 95), 1),
+            "p99_ms": round(percentile(samples, 99), 1),
+            "errors": recorder.errors[name],
+            "error_rate": (
+                round(recorder.errors[name] / len(samples), 4) if samples else 0.0
+            ),
+        }
+    tool_calls = recorder.counters["tool_calls"]
+    return {
+        "users": args.users,
+        "conversations": threads,
+        "elapsed_s": round(elapsed, 2),
+        "throughput": {
+            "conversations_per_s": round(threads / elapsed, 2) if elapsed else 0.0,
+            "llm_calls_per_s": (
+                round(nodes["call_tools_llm"]["count"] / elapsed, 2) if elapsed else 0.0
+            ),
+        },
+        "nodes": nodes,
+        "errors": {
+            "failed_conversations": failed,
+            "conversation_error_rate": round(failed / threads, 4) if threads else 0.0,
+            "tool_calls": tool_calls,
+            "tool_errors": recorder.counters["tool_errors"],
+            "tool_error_rate": (
+                round(recorder.counters["tool_errors"] / tool_calls, 4)
+                if tool_calls
+                else 0.0
+            ),
+        },
+        "memory": {
+            "rss_start_mib": round(rss["start"], 1),
+            "rss_ready_mib": round(rss["ready"], 1),
+            "rss_end_mib": round(rss["end"], 1),
+            "rss_growth_per_thread_kib": (
+                round((rss["end"] - rss["ready"]) * 1024 / threads, 1)
+                if threads
+                else 0.0
+            ),
+            "emails_sent": recorder.counters["emails"],
+            "retained_threads": recorder.counters["retained_threads"],
+        },
+        "email_delivery": email_stats,
+        "prompt_cache": prompt_stats,
+        "upstream": stub_stats,
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"\n{result['users']} users, {result['conversations']} conversations in {result['elapsed_s']} s"
+        f" -> {result['throughput']['conversations_per_s']} conversations/s,"
+        f" {result['throughput']['llm_calls_per_s']} LLM calls/s\n"
+    )
+    print(
+        f"{'node':<16} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    )
+    for name, node in result["nodes"].items():
+        print(
+            f"{name:<16} {node['count']:>7} {node['p50_ms']:>9} {node['p95_ms']:>9}"
+            f" {node['p99_ms']:>9} {node['errors']:>7}"
+        )
+    errors, memory = result["errors"], result["memory"]
+    print(
+        f"\nErrors: {errors['failed_conversations']} failed conversations"
+        f" ({errors['conversation_error_rate']:.1%}), {errors['tool_errors']}/{errors['tool_calls']}"
+        f" tool calls returned an error ({errors['tool_error_rate']:.1%})"
+    )
+    print(
+        f"Memory: RSS {memory['rss_ready_mib']} -> {memory['rss_end_mib']} MiB,"
+        f" {memory['rss_growth_per_thread_kib']} KiB per conversation thread"
+        f" ({memory['retained_threads']} threads retained without email, {memory['emails_sent']} released)"
+    )
+    delivery = result["email_delivery"]
+    print(
+        f"Email delivery: {delivery['sent']} sent, {delivery['failed']} failed,"
+        f" {delivery['pending']} pending, latency p50 {delivery['latency_p50_s']} s,"
+        f" p95 {delivery['latency_p95_s']} s"
+    )
+    prompts = result["prompt_cache"]
+    print(
+        f"Prompt cache: {prompts['hits']}/{prompts['calls']} LLM calls hit"
+        f" ({prompts['hit_rate']:.1%}), {prompts['cached_tokens']}/{prompts['prompt_tokens']}"
+        f" prompt tokens cached ({prompts['cached_share']:.1%})"
+    )
+    print(
+        f"Upstream requests: {result['upstream'].get('requests')}, injected errors: {result['upstream'].get('errors')}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--users", type=int, default=10, help="concurrent simulated users"
+    )
+    parser.add_argument(
+        "--conversations", type=int, default=100, help="total conversations"
+    )
+    parser.add_argument(
+        "--shared-agent", action="store_true", help="one Agent for all users"
+    )
+    parser.add_argument(
+        "--routes",
+        type=int,
+        default=len(ROUTES),
+        help="distinct routes (cache locality)",
+    )
+    parser.add_argument(
+        "--email-ratio",
+        type=float,
+        default=0.5,
+        help="share of conversations resumed to send the email",
+    )
+    parser.add_argument("--train-ratio", type=float, default=0.3)
+    parser.add_argument("--flight-search-mode", default="two_phase")
+    parser.add_argument("--no-prefetch", action="store_true")
+    parser.add_argument("--thread-ttl", type=int, default=6 * 3600)
+    parser.add_argument(
+        "--serpapi-quota", type=int, default=100000, help="SerpAPI calls per minute"
+    )
+    parser.add_argument(
+        "--sncf-quota", type=int, default=100000, help="SNCF calls per minute"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json", help="write the report as JSON to this file ('-' for stdout)"
+    )
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    args.routes = max(1, min(args.routes, len(ROUTES)))
+
+    rss = {"start": rss_mib()}
+    stubs, base_url = start_stubs(args)
+    try:
+        point_clients_at(base_url, args)
+        from agents.log import setup_logging
+        from agents.prompt import PROMPT_STATS
+        from config import AgentConfig
+
+        setup_logging()
+        recorder = Recorder()
+        agent_class = instrumented_agent_class(recorder)
+
+        if args.shared_agent:
+            agents = [agent_class(config=build_config(AgentConfig, args))] * args.users
+        else:
+            agents = [
+                agent_class(config=build_config(AgentConfig, args))
+                for _ in range(args.users)
+            ]
+        warm_up(agents[0])
+        recorder.reset()
+        PROMPT_STATS.reset()
+        gc.collect()
+        rss["ready"] = rss_mib()
+
+        quota, lock = [args.conversations], threading.Lock()
+        users = [
+            threading.Thread(
+                target=user_loop,
+                args=(agents[i], recorder, args, args.seed * 1000 + i, quota, lock),
+                name=f"user-{i}",
+            )
+            for i in range(args.users)
+        ]
+        start = time.perf_counter()
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        rss["end"] = rss_mib()
+
+        import requests
+        from agents.outbox import email_queue
+
+        # Les emails partent en arrière-plan : on attend la fin de la file
+        email_queue().drain()
+        email_stats = email_queue().stats()
+        stub_stats = requests.get(f"{base_url}/stats", timeout=5).json()
+    finally:
+        stubs.terminate()
+        stubs.wait()
+
+    result = report(
+        recorder, args, elapsed, rss, stub_stats, email_stats, PROMPT_STATS.stats()
+    )
+    if args.json == "-":
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(result, f, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    main()
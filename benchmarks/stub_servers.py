@@ -0,0 +1,515 @@
+"""
+🧪 Bouchons locaux des API amont pour les tests de charge
+
+Un seul serveur HTTP (multi-thread) imite SerpAPI (Google Flights / Hotels),
+l'API SNCF (navitia), SendGrid et l'API de chat OpenAI. Chaque API a une
+latence log-normale (médiane en ms, dispersion sigma) et un taux d'erreur
+configurables.
+
+    python -m benchmarks.stub_servers --port 8765 --serpapi-latency 800,0.4
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+APIS = ("serpapi", "sncf", "sendgrid", "llm")
+
+# ⏱️ Latences par défaut (médiane ms, sigma) : ordres de grandeur observés
+DEFAULT_LATENCIES = {
+    "serpapi": "1200,0.5",
+    "sncf": "400,0.4",
+    "sendgrid": "150,0.3",
+    "llm": "1500,0.4",
+}
+
+# 💬 Demande de voyage synthétique envoyée par le test de charge
+TRIP_PATTERN = re.compile(
+    r"Trip (?P<origin>[A-Z]{3})->(?P<destination>[A-Z]{3}) "
+    r"(?P<outbound>\d{4}-\d{2}-\d{2})\.\.(?P<back>\d{4}-\d{2}-\d{2}) "
+    r"hotel (?P<city>[\w ]+?)(?: train (?P<train_from>\d+)->(?P<train_to>\d+))?$"
+)
+
+
+class Latency:
+    """⏱️ Distribution log-normale de latence"""
+
+    def __init__(self, spec: str, scale: float = 1.0):
+        median, _, sigma = spec.partition(",")
+        self.median = float(median) * scale
+        self.sigma = float(sigma or 0)
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median), self.sigma) / 1000
+
+
+def _seed(*parts) -> random.Random:
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()
+    return random.Random(int(digest[:12], 16))
+
+
+def _flight(
+    rng: random.Random, origin: str, destination: str, day: str, token: bool
+) -> dict:
+    departure = datetime.fromisoformat(day) + timedelta(
+        minutes=rng.randrange(6 * 60, 21 * 60, 5)
+    )
+    duration = rng.randrange(80, 260, 5)
+    stops = rng.choice([0, 0, 1])
+    segments = []
+    leg_start = departure
+    airports = [origin] + ["FRA"] * stops + [destination]
+    for i in range(stops + 1):
+        leg_end = leg_start + timedelta(minutes=duration // (stops + 1))
+        segments.append(
+            {
+                "departure_airport": {
+                    "name": airports[i],
+                    "id": airports[i],
+                    "time": leg_start.strftime("%Y-%m-%d %H:%M"),
+                },
+                "arrival_airport": {
+                    "name": airports[i + 1],
+                    "id": airports[i + 1],
+                    "time": leg_end.strftime("%Y-%m-%d %H:%M"),
+                },
+                "duration": duration // (stops + 1),
+                "airline": rng.choice(
+                    ["Air France", "ITA Airways", "Lufthansa", "easyJet"]
+                ),
+                "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/AF.png",
+                "flight_number": f"AF {rng.randrange(1000, 9999)}",
+                "travel_class": "Economy",
+                "extensions": [
+                    "Average legroom (76 cm)",
+                    "Carbon emissions estimate: 98 kg",
+                ],
+            }
+        )
+        leg_start = leg_end + timedelta(minutes=60)
+    flight = {
+        "flights": segments,
+        "total_duration": duration + 60 * stops,
+        "carbon_emissions": {"this_flight": rng.randrange(60000, 180000)},
+        "price": rng.randrange(60, 450),
+        "type": "Round trip" if token else "One way",
+        "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/AF.png",
+    }
+    if token:
+        flight["departure_token"] = hashlib.sha1(
+            f"{origin}{destination}{day}{departure}".encode()
+        ).hexdigest()
+    return flight
+
+
+def serpapi_response(params: dict) -> dict:
+    """🔎 Réponse SerpAPI synthétique (déterministe pour des paramètres donnés)"""
+    engine = params.get("engine")
+    rng = _seed(*sorted(params.items()))
+    metadata = {
+        "search_metadata": {
+            "id": hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:24],
+            "status": "Success",
+        }
+    }
+    if engine == "google_flights":
+        origin, destination = params.get("departure_id", "CDG"), params.get(
+            "arrival_id", "FCO"
+        )
+        if params.get("departure_token"):
+            day = params.get("return_date", params.get("outbound_date"))
+            return {
+                **metadata,
+                "best_flights": [
+                    _flight(rng, destination, origin, day, False) for _ in range(3)
+                ],
+            }
+        round_trip = params.get("type") == "1"
+        day = params.get("outbound_date")
+        count = 12 if params.get("deep_search") else 8
+        flights = [
+            _flight(rng, origin, destination, day, round_trip) for _ in range(count)
+        ]
+        return {**metadata, "best_flights": flights[:3], "other_flights": flights[3:]}
+
+    if engine == "google_hotels":
+        city = params.get("q", "City")
+        if params.get("property_token"):
+            return {
+                **metadata,
+                **_hotel(rng, city, params["property_token"], detailed=True),
+            }
+        return {
+            **metadata,
+            "properties": [_hotel(rng, city, f"{city}-{i}") for i in range(10)],
+        }
+
+    return metadata
+
+
+def _hotel(rng: random.Random, city: str, token: str, detailed: bool = False) -> dict:
+    nightly = rng.randrange(60, 400)
+    hotel_class = rng.randrange(2, 6)
+    hotel = {
+        "type": "hotel",
+        "name": f"Hotel {city} {token[-2:]}",
+        "property_token": token,
+        "link": f"https://example.com/hotels/{token}",
+        "description": "Comfortable rooms near the city centre, free Wi-Fi and breakfast.",
+        "gps_coordinates": {
+            "latitude": 41.9 + rng.random(),
+            "longitude": 12.5 + rng.random(),
+        },
+        "rate_per_night": {"lowest": f"€{nightly}", "extracted_lowest": nightly},
+        "total_rate": {"lowest": f"€{nightly * 3}", "extracted_lowest": nightly * 3},
+        "hotel_class": f"{hotel_class}-star hotel",
+        "extracted_hotel_class": hotel_class,
+        "overall_rating": round(rng.uniform(3.2, 4.9), 1),
+        "reviews": rng.randrange(50, 4000),
+        "amenities": [
+            "Free Wi-Fi",
+            "Breakfast",
+            "Air conditioning",
+            "Restaurant",
+            "Bar",
+            "Gym",
+            "Spa",
+            "Pool",
+            "Parking",
+        ],
+        "images": [
+            {"thumbnail": f"https://example.com/img/{token}/{i}.jpg"} for i in range(8)
+        ],
+    }
+    if detailed:
+        hotel["prices"] = [
+            {
+                "source": source,
+                "link": f"https://{source.lower()}.example/{token}",
+                "rate_per_night": {"extracted_lowest": nightly + i},
+            }
+            for i, source in enumerate(["Booking.com", "Expedia", "Hotels.com"])
+        ]
+        hotel["nearby_places"] = [
+            {
+                "name": f"Place {i}",
+                "transportations": [{"type": "Walking", "duration": "5 min"}],
+            }
+            for i in range(6)
+        ]
+    return hotel
+
+
+def sncf_response(params: dict, url: str = "/coverage/sncf/journeys") -> dict:
+    """🚆 Réponse navitia synthétique (départs après `datetime`, lien "next")"""
+    rng = _seed(*sorted((k, str(v)) for k, v in params.items()))
+    start = datetime.strptime(
+        params.get("datetime", "20250101T000000"), "%Y%m%dT%H%M%S"
+    )
+    departure = max(start, start.replace(hour=6, minute=0, second=0))
+    journeys = []
+    for i in range(5):
+        departure += timedelta(minutes=rng.randrange(20, 120, 5))
+        if departure.hour >= 22:
+            departure = (departure + timedelta(days=1)).replace(hour=6, minute=5)
+        duration = rng.randrange(110, 260, 5) * 60
+        arrival = departure + timedelta(seconds=duration)
+        section = {
+            "type": "public_transport",
+            "from": {
+                "stop_point": {
+                    "name": "Gare de départ",
+                    "label": params.get("from", ""),
+                }
+            },
+            "to": {
+                "stop_point": {"name": "Gare d'arrivée", "label": params.get("to", "")}
+            },
+            "display_informations": {
+                "commercial_mode": "TGV INOUI",
+                "headsign": str(rng.randrange(6000, 6999)),
+                "network": "SNCF",
+            },
+        }
+        journeys.append(
+            {
+                "departure_date_time": departure.strftime("%Y%m%dT%H%M%S"),
+                "arrival_date_time": arrival.strftime("%Y%m%dT%H%M%S"),
+                "duration": duration,
+                "nb_transfers": 0,
+                "co2_emission": {"value": rng.uniform(1000, 3000), "unit": "gEC"},
+                "fare": {
+                    "found": True,
+                    "total": {
+                        "value": str(rng.randrange(2500, 12000)),
+                        "currency": "centime",
+                    },
+                    "links": [],
+                },
+                "sections": [section],
+            }
+        )
+    following = {
+        **params,
+        "datetime": (departure + timedelta(minutes=1)).strftime("%Y%m%dT%H%M%S"),
+    }
+    return {
+        "journeys": journeys,
+        "links": [{"type": "next", "href": f"{url}?{urlencode(following)}"}],
+    }
+
+
+def _tool_call(index: int, name: str, params: dict) -> dict:
+    return {
+        "id": f"call_{index}_{name}",
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps({"params": params})},
+    }
+
+
+# 🧊 Cache de préfixe simulé (comme OpenAI : à partir de 1 024 jetons, par
+# blocs de 128) : empreintes des préfixes déjà vus, aux frontières de messages
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_BLOCK = 128
+_prefixes = set()
+_prefixes_lock = threading.Lock()
+
+
+def prompt_usage(body: dict) -> tuple:
+    """Jetons du prompt (4 caractères par jeton) et part servie par le cache"""
+    tools = json.dumps(body.get("tools") or [], sort_keys=True)
+    digest = hashlib.sha256(tools.encode())
+    tokens, boundaries = len(tools) // 4, []
+    for message in body.get("messages") or []:
+        text = json.dumps(message, sort_keys=True)
+        digest.update(text.encode())
+        tokens += len(text) // 4
+        boundaries.append((digest.hexdigest(), tokens))
+    with _prefixes_lock:
+        cached = max((n for key, n in boundaries if key in _prefixes), default=0)
+        _prefixes.update(key for key, _ in boundaries)
+    if cached < PROMPT_CACHE_MIN_TOKENS:
+        return tokens, 0
+    return tokens, cached // PROMPT_CACHE_BLOCK * PROMPT_CACHE_BLOCK
+
+
+def llm_response(body: dict) -> dict:
+    """🧠 Réponse de chat synthétique : appels d'outils puis réponse finale"""
+    messages = body.get("messages") or []
+    first_system = next(
+        (m.get("content") or "" for m in messages if m.get("role") == "system"), ""
+    )
+    user = next(
+        (m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"),
+        "",
+    )
+    message = {"role": "assistant", "content": None}
+    finish = "stop"
+
+    if first_system.startswith("Your task is to convert"):
+        message["content"] = (
+            f"<!DOCTYPE html><html><body><p>{user[:2000]}</p></body></html>"
+        )
+    elif any(m.get("role") == "tool" for m in messages):
+        message["content"] = (
+            "Here are the best flights and hotels I found:\n"
+            + "\n".join(f"- option {i}: see links" for i in range(5))
+        )
+    else:
+        trip = TRIP_PATTERN.search(user)
+        if trip is None:
+            message["content"] = "Could you tell me where and when you want to travel?"
+        else:
+            calls = [
+                _tool_call(
+                    0,
+                    "flights_finder",
+                    {
+                        "departure_airport": trip["origin"],
+                        "arrival_airport": trip["destination"],
+                        "outbound_date": trip["outbound"],
+                        "return_date": trip["back"],
+                    },
+                ),
+                _tool_call(
+                    1,
+                    "hotels_finder",
+                    {
+                        "q": trip["city"],
+                        "check_in_date": trip["outbound"],
+                        "check_out_date": trip["back"],
+                    },
+                ),
+            ]
+            if trip["train_from"]:
+                calls.append(
+                    _tool_call(
+                        2,
+                        "trains_finder",
+                        {
+                            "origin_city": trip["train_from"],
+                            "destination_city": trip["train_to"],
+                            "departure_date": trip["outbound"],
+                        },
+                    )
+                )
+            message["tool_calls"] = calls
+            finish = "tool_calls"
+
+    prompt_tokens, cached_tokens = prompt_usage(body)
+    return {
+        "id": f"chatcmpl-{random.getrandbits(48):x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": 50,
+            "total_tokens": prompt_tokens + 50,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        },
+    }
+
+
+class StubState:
+    """📊 Configuration et compteurs des bouchons"""
+
+    def __init__(self, latencies: dict, error_rates: dict):
+        self.latencies = latencies
+        self.error_rates = error_rates
+        self.requests = {api: 0 for api in APIS}
+        self.errors = {api: 0 for api in APIS}
+        self.lock = threading.Lock()
+
+    def admit(self, api: str) -> bool:
+        """Simule la latence ; retourne False si une erreur doit être injectée"""
+        time.sleep(self.latencies[api].sample())
+        failed = random.random() < self.error_rates.get(api, 0.0)
+        with self.lock:
+            self.requests[api] += 1
+            self.errors[api] += failed
+        return not failed
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, payload: Optional[dict] = None):
+            body = json.dumps(payload).encode() if payload is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self, api: str, respond):
+            if not state.admit(api):
+                self._reply(500, {"error": f"injected {api} failure"})
+                return
+            self._reply(*respond())
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if url.path == "/search":
+                self._route("serpapi", lambda: (200, serpapi_response(params)))
+            elif url.path.endswith("/coverage/sncf/journeys"):
+                href = f"http://{self.headers['Host']}{url.path}"
+                self._route("sncf", lambda: (200, sncf_response(params, href)))
+            elif url.path == "/stats":
+                with state.lock:
+                    self._reply(
+                        200, {"requests": state.requests, "errors": state.errors}
+                    )
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.endswith("/chat/completions"):
+                self._route("llm", lambda: (200, llm_response(body)))
+            elif self.path == "/v3/mail/send":
+                self._route("sendgrid", lambda: (202, None))
+            else:
+                self._reply(404, {"error": "not found"})
+
+    return Handler
+
+
+def serve(port: int, latencies: dict, error_rates: dict) -> ThreadingHTTPServer:
+    """🚀 Démarre les bouchons dans un thread et retourne le serveur"""
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(StubState(latencies, error_rates))
+    )
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="stub-servers", daemon=True
+    ).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Options de latence et d'erreurs (partagées avec le test de charge)"""
+    for api in APIS:
+        parser.add_argument(
+            f"--{api}-latency", default=DEFAULT_LATENCIES[api], help="median_ms[,sigma]"
+        )
+        parser.add_argument(f"--{api}-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="multiplies every median latency",
+    )
+
+
+def stub_options(args) -> list:
+    """Options à transmettre au processus des bouchons"""
+    options = ["--latency-scale", str(args.latency_scale)]
+    for api in APIS:
+        options += [f"--{api}-latency", getattr(args, f"{api}_latency")]
+        options += [f"--{api}-error-rate", str(getattr(args, f"{api}_error_rate"))]
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+    latencies = {
+        api: Latency(getattr(args, f"{api}_latency"), args.latency_scale)
+        for api in APIS
+    }
+    error_rates = {api: getattr(args, f"{api}_error_rate") for api in APIS}
+    server = serve(args.port, latencies, error_rates)
+    print(
+        f"Stub servers listening on http://127.0.0.1:{server.server_port}", flush=True
+    )
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
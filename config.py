@@ -1,9 +1,7 @@
 # config.py
 from typing import List
 from dataclasses import dataclass
-from agents.tools.flights_finder import flights_finder
-from agents.tools.hotels_finder import hotels_finder
-from agents.tools.trains_finder import trains_finder
+from agents.tools.registry import TOOL_SPECS, ToolRegistry
 
 
 @dataclass
@@ -22,10 +20,26 @@ class AgentConfig:
     max_flights: int = 5
     preferences: List[str] = None
     currency: str = "EUR"
+    # 🔮 Préchargement spéculatif des recherches complémentaires
+    prefetch: bool = True
+    # ✈️ Mode de recherche de vols : deep, shallow ou two_phase
+    flight_search_mode: str = "two_phase"
+    # 🔁 Aller-retour : vols aller appariés et budget d'appels pour les retours
+    return_legs_top_k: int = 3
+    return_legs_budget: int = 3
+    # 🧳 Nombre de forfaits combinés transmis au LLM (0 pour désactiver)
+    max_packages: int = 5
+    # 🔥 Préchauffage du cache pour les recherches populaires
+    cache_warmer: bool = True
+    # ⏳ Durée d'inactivité avant libération d'un thread (checkpoints et résultats)
+    thread_ttl_seconds: int = 6 * 3600
+    # 🧮 Budget en jetons du bloc de session du prompt système (préférences)
+    session_prompt_tokens: int = 256
 
     def __post_init__(self):
         if self.preferences is None:
             self.preferences = []
 
 
-TOOLS = [flights_finder, hotels_finder, trains_finder]
+# 🗂️ Outils chargés à la demande (schémas disponibles sans import des modules)
+TOOLS = ToolRegistry(TOOL_SPECS)
@@ -0,0 +1,71 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from agents import clients
+from agents.tools.cache import RESULT_CACHE
+
+
+class FakeResponse:
+    """Réponse HTTP minimale (statut et JSON)"""
+
+    def __init__(self, data, status_code: int = 200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+
+def _responder(respond):
+    return respond if callable(respond) else lambda params: respond
+
+
+@pytest.fixture
+def serpapi(monkeypatch):
+    """
+    🧪 SerpAPI simulée, cache de résultats vidé
+
+    `serpapi(réponse)` installe la réponse (données ou fonction des
+    paramètres) et retourne la liste des appels amont.
+    """
+    RESULT_CACHE.clear()
+
+    def install(respond) -> list:
+        calls, reply = [], _responder(respond)
+
+        def fake_search(params):
+            calls.append(params)
+            return reply(params)
+
+        monkeypatch.setattr(clients, "serpapi_search", fake_search)
+        return calls
+
+    return install
+
+
+@pytest.fixture
+def sncf(monkeypatch):
+    """
+    🧪 API SNCF simulée, cache de résultats vidé
+
+    `sncf(réponse)` fonctionne comme `serpapi` ; les paramètres des liens
+    "next" (URL complète, sans `params`) sont relus depuis l'URL.
+    """
+    RESULT_CACHE.clear()
+
+    def install(respond) -> list:
+        calls, reply = [], _responder(respond)
+
+        def fake_get(url, params=None, **kwargs):
+            if params is None:
+                query = parse_qs(urlparse(url).query)
+                params = {k: v[-1] for k, v in query.items()}
+            params = {k: str(v) for k, v in params.items()}
+            calls.append(params)
+            return FakeResponse(reply(params))
+
+        monkeypatch.setattr(clients, "sncf_get", fake_get)
+        return calls
+
+    return install
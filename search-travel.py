@@ -1,29 +1,31 @@
-import os
 import uuid
 import streamlit as st
 from langchain_core.messages import HumanMessage
 from agents.agent import Agent
-from config import AgentConfig, TOOLS
-from langchain_openai import ChatOpenAI
+from agents.log import setup_logging
+from config import AgentConfig
 
-
-# 🔧 Fonctions de configuration
-def populate_envs(sender_email, receiver_email, subject):
-    """Configuration des variables d'environnement pour l'envoi d'email"""
-    os.environ["FROM_EMAIL"] = sender_email
-    os.environ["TO_EMAIL"] = receiver_email
-    os.environ["EMAIL_SUBJECT"] = subject
+# 🪵 Journalisation configurée par l'application, pas à l'import de l'agent
+setup_logging()
 
 
+# 📧 Envoi d'email
 def send_email(sender_email, receiver_email, subject, thread_id):
     """Gestion de l'envoi d'email avec gestion des erreurs"""
     try:
-        populate_envs(sender_email, receiver_email, subject)
         config = {"configurable": {"thread_id": thread_id}}
-        st.session_state.agent.graph.invoke(None, config=config)
-        st.success("Email sent successfully!")
-        # Nettoyage de la session
-        for key in ["travel_info", "thread_id"]:
+        graph = st.session_state.agent.graph
+        # Destinataires et sujet portés par l'état du thread, pas par l'environnement
+        graph.update_state(
+            config,
+            {"email": {"from": sender_email, "to": receiver_email, "subject": subject}},
+        )
+        result = graph.invoke(None, config=config)
+        email_id = (result.get("email") or {}).get("outbox_id")
+        st.success(f"Email queued for delivery (#{email_id})!")
+        # Nettoyage de la session et du thread côté agent
+        st.session_state.agent.release_thread(thread_id)
+        for key in ["travel_info", "thread_id", "price_updates"]:
             st.session_state.pop(key, None)
     except Exception as e:
         st.error(f"Error sending email: {e}")
@@ -39,12 +41,8 @@ def initialize_agent():
         else:
             # Mise à jour de la configuration existante
             st.session_state.agent.config = config
-            st.session_state.agent._tools_llm = ChatOpenAI(
-                model=config.model, temperature=config.temperature
-            ).bind_tools(TOOLS)
-            st.session_state.agent._system_prompt = (
-                st.session_state.agent._build_system_prompt()
-            )
+            # Le LLM lié aux outils sera recréé au prochain appel
+            st.session_state.agent._tools_llm = None
     else:
         if "agent" not in st.session_state:
             st.session_state.agent = Agent()
@@ -196,6 +194,7 @@ def process_query(user_input):
             st.subheader("Travel Information")
             st.write(result["messages"][-1].content)
             st.session_state.travel_info = result["messages"][-1].content
+            st.session_state.price_updates = []
 
         except Exception as e:
             st.error(f"Error: {e}")
@@ -203,6 +202,21 @@ def process_query(user_input):
         st.error("Merci de renseigner votre demande")
 
 
+# 📉 Prix affinés en arrière-plan
+def render_price_updates():
+    """Affiche les écarts de prix des recherches approfondies terminées"""
+    # Un thread par requête : sans tour suivant, le LLM ne les verrait pas
+    updates = st.session_state.agent.price_updates(st.session_state.thread_id)
+    st.session_state.setdefault("price_updates", []).extend(updates)
+    for u in st.session_state.price_updates:
+        st.info(
+            f"Flight prices refined by deep search: lowest {u['lowest_before']}"
+            f" -> {u['lowest_after']} {u['currency']}, {len(u['changed'])} price"
+            f" changes, {u['new_options']} new options"
+        )
+    st.button("Check refined flight prices")
+
+
 # 📧 Formulaire d'email
 def render_email_form():
     """Affiche et gère le formulaire d'envoi d'email"""
@@ -236,6 +250,7 @@ def main():
         process_query(user_input)
 
     if "travel_info" in st.session_state:
+        render_price_updates()
         render_email_form()
 
 
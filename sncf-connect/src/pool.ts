@@ -0,0 +1,219 @@
+// src/pool.ts
+import { chromium } from 'playwright';
+import type { Browser, BrowserContext, LaunchOptions, Page } from 'playwright';
+import { UserAgentRotator } from './userAgentRotator';
+import { newSearchContext, searchWithPage, warmUpPage } from './scraper';
+import type { PoolOptions, PoolStats, SearchParams, TrainResult } from './types';
+
+// ⚙️ Options du pool (surchargées par les variables SNCF_POOL_*)
+export function poolOptionsFromEnv(env: Record<string, string | undefined> = process.env): PoolOptions {
+    return {
+        size: Number(env.SNCF_POOL_SIZE ?? 2),
+        headless: (env.SNCF_POOL_HEADLESS ?? 'true') !== 'false',
+        warmUp: (env.SNCF_POOL_WARMUP ?? 'true') !== 'false',
+        maxSearchesPerContext: Number(env.SNCF_POOL_MAX_SEARCHES_PER_CONTEXT ?? 50),
+        searchTimeoutMs: Number(env.SNCF_POOL_SEARCH_TIMEOUT_MS ?? 30000),
+        maxQueue: Number(env.SNCF_POOL_MAX_QUEUE ?? 100),
+    };
+}
+
+// 🚀 Lancement du navigateur (remplaçable dans les tests)
+export type BrowserLauncher = (options: LaunchOptions) => Promise<Browser>;
+
+interface Worker {
+    id: number;
+    context: BrowserContext;
+    page: Page;
+    warm: boolean;
+    searches: number;
+    // Contexte fermé sans remplaçant, ou navigateur relancé depuis : à recréer
+    dead: boolean;
+    generation: number;
+}
+
+function percentile(values: number[], q: number): number {
+    if (!values.length) {
+        return 0;
+    }
+    const ordered = [...values].sort((a, b) => a - b);
+    return ordered[Math.min(Math.floor((q / 100) * ordered.length), ordered.length - 1)];
+}
+
+/**
+ * 🏊 Pool de navigateurs longue durée pour les recherches SNCF Connect
+ *
+ * Un seul Chromium headless est lancé ; chaque worker garde son contexte et
+ * sa page (page d'accueil chargée une fois, cookies conservés) et enchaîne
+ * les recherches API. Un contexte est recréé après `maxSearchesPerContext`
+ * recherches ou après une erreur ; sa page d'accueil est rechargée à la
+ * recherche suivante. Si la recréation échoue, le worker est marqué mort et
+ * recréé à sa prochaine recherche. Chromium est relancé s'il se déconnecte
+ * (crash) ; les workers de l'ancien navigateur sont alors recréés.
+ */
+export class BrowserPool {
+    private browser: Browser | null = null;
+    private idle: Worker[] = [];
+    private waiting: ((worker: Worker) => void)[] = [];
+    private userAgents = new UserAgentRotator();
+    private latencies: number[] = [];
+    private counters = { searches: 0, errors: 0, recycled: 0, relaunches: 0 };
+    private warmUpMs = 0;
+    private generation = 0;
+    private relaunching: Promise<void> | null = null;
+
+    constructor(
+        readonly options: PoolOptions = poolOptionsFromEnv(),
+        private readonly launcher: BrowserLauncher = (launchOptions) => chromium.launch(launchOptions)
+    ) {}
+
+    // 🚀 Lance le navigateur et prépare les workers (en parallèle)
+    async start(): Promise<void> {
+        const started = performance.now();
+        await this.launch();
+        const workers = await Promise.all(
+            Array.from({ length: this.options.size }, (_, id) => this.createWorker(id))
+        );
+        this.idle.push(...workers);
+        this.warmUpMs = Math.round(performance.now() - started);
+        console.log(`🏊 Browser pool ready: ${workers.length} workers in ${this.warmUpMs} ms`);
+    }
+
+    private async launch(): Promise<void> {
+        const browser = await this.launcher({ headless: this.options.headless });
+        browser.on('disconnected', () => this.onDisconnected(browser));
+        this.generation++;
+        this.browser = browser;
+    }
+
+    // 💥 Crash de Chromium (une fermeture volontaire a déjà retiré le navigateur)
+    private onDisconnected(browser: Browser): void {
+        if (browser !== this.browser) {
+            return;
+        }
+        console.warn('⚠️ Browser disconnected, relaunching');
+        this.counters.relaunches++;
+        this.relaunch().catch((error) => console.error('❌ Browser relaunch failed:', error));
+    }
+
+    // 🔁 Relance du navigateur (une seule à la fois)
+    private relaunch(): Promise<void> {
+        this.relaunching ??= this.launch().finally(() => {
+            this.relaunching = null;
+        });
+        return this.relaunching;
+    }
+
+    private async createWorker(id: number, warmUp = this.options.warmUp): Promise<Worker> {
+        const generation = this.generation;
+        const context = await newSearchContext(this.browser!, this.userAgents.next());
+        const page = await context.newPage();
+        const worker = { id, context, page, warm: false, searches: 0, dead: false, generation };
+        if (warmUp) {
+            await this.warm(worker);
+        }
+        return worker;
+    }
+
+    private async warm(worker: Worker): Promise<void> {
+        await warmUpPage(worker.page);
+        worker.warm = true;
+    }
+
+    // ♻️ Nouveau contexte pour le worker (page d'accueil rechargée à sa prochaine recherche)
+    private async recycle(worker: Worker): Promise<Worker> {
+        this.counters.recycled++;
+        await worker.context.close().catch(() => undefined);
+        return this.createWorker(worker.id, false).catch((error) => {
+            // Contexte fermé : surtout pas remis tel quel dans le pool
+            console.warn(`⚠️ Could not recreate worker ${worker.id}: ${error}`);
+            return { ...worker, warm: false, dead: true };
+        });
+    }
+
+    private acquire(): Promise<Worker> {
+        const worker = this.idle.pop();
+        if (worker) {
+            return Promise.resolve(worker);
+        }
+        if (this.waiting.length >= this.options.maxQueue) {
+            return Promise.reject(new Error('Browser pool queue is full'));
+        }
+        return new Promise((resolve) => this.waiting.push(resolve));
+    }
+
+    private release(worker: Worker): void {
+        const next = this.waiting.shift();
+        if (next) {
+            next(worker);
+        } else {
+            this.idle.push(worker);
+        }
+    }
+
+    // 🔎 Une recherche sur le premier worker libre
+    async search(params: SearchParams): Promise<TrainResult[]> {
+        if (!this.browser) {
+            throw new Error('Browser pool is not started');
+        }
+        if (this.relaunching || !this.browser.isConnected()) {
+            await this.relaunch();
+        }
+        let worker = await this.acquire();
+        const started = performance.now();
+        try {
+            if (worker.dead || worker.generation !== this.generation) {
+                await worker.context.close().catch(() => undefined);
+                worker = await this.createWorker(worker.id, false);
+            }
+            if (!worker.warm) {
+                await this.warm(worker);
+            }
+            const trains = await searchWithPage(worker.page, params, this.options.searchTimeoutMs);
+            worker.searches++;
+            this.record(performance.now() - started);
+            if (worker.searches >= this.options.maxSearchesPerContext) {
+                worker = await this.recycle(worker);
+            }
+            return trains;
+        } catch (error) {
+            this.counters.errors++;
+            // Session probablement invalide (cookies expirés, blocage) : nouveau contexte
+            worker = await this.recycle(worker);
+            throw error;
+        } finally {
+            this.release(worker);
+        }
+    }
+
+    private record(latencyMs: number): void {
+        this.counters.searches++;
+        this.latencies.push(latencyMs);
+        if (this.latencies.length > 1000) {
+            this.latencies.shift();
+        }
+    }
+
+    // 📊 Occupation du pool et latence des recherches
+    stats(): PoolStats {
+        return {
+            size: this.options.size,
+            idle: this.idle.length,
+            queued: this.waiting.length,
+            ...this.counters,
+            warmUpMs: this.warmUpMs,
+            latencyMs: {
+                p50: Math.round(percentile(this.latencies, 50)),
+                p95: Math.round(percentile(this.latencies, 95)),
+                max: Math.round(Math.max(0, ...this.latencies)),
+            },
+        };
+    }
+
+    // 🛑 Ferme le navigateur (les recherches en cours échouent)
+    async close(): Promise<void> {
+        const browser = this.browser;
+        this.browser = null;
+        this.idle = [];
+        await browser?.close();
+    }
+}
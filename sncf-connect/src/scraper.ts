@@ -1,89 +1,133 @@
 import { chromium } from 'playwright';
+import type { Browser, BrowserContext, Page } from 'playwright';
 import { format } from 'date-fns';
 import { UserAgentRotator } from './userAgentRotator';
 import type { SearchParams, TrainResult } from './types';
 
+export const HOME_URL = 'https://www.sncf-connect.com/';
+export const API_URL = 'https://www.sncf-connect.com/bff/api/v1/itineraries';
+
+// 📨 En-têtes attendus par l'API BFF de SNCF Connect
+export const BFF_HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Language': 'fr-FR,fr;q=0.9',
+    'x-bff-key': 'ah1MPO-izehIHD-QZZ9y88n-kku876',
+    'virtual-env-name': 'master',
+    'x-api-env': 'production',
+    'Origin': 'https://www.sncf-connect.com',
+    'Referer': 'https://www.sncf-connect.com/',
+    'x-client-channel': 'web',
+    'x-client-app-id': 'front-web',
+    'x-device-class': 'desktop',
+    'x-market-locale': 'fr_FR'
+};
+
+// 🧭 Contexte de navigation configuré comme un visiteur de SNCF Connect
+export async function newSearchContext(browser: Browser, userAgent: string): Promise<BrowserContext> {
+    return browser.newContext({
+        userAgent,
+        viewport: { width: 1920, height: 1080 },
+        extraHTTPHeaders: BFF_HEADERS
+    });
+}
+
+// 🌍 Chargement de la page d'accueil (cookies de session requis par l'API)
+export async function warmUpPage(page: Page): Promise<void> {
+    await page.goto(HOME_URL);
+    await page.waitForLoadState('networkidle');
+}
+
+export function buildPayload(params: SearchParams) {
+    return {
+        schedule: {
+            outward: {
+                date: format(params.date, "yyyy-MM-dd'T'HH:mm:ss.SSS'Z'"),
+                arrivalAt: false
+            }
+        },
+        mainJourney: {
+            origin: {
+                id: params.origin,
+                codes: []
+            },
+            destination: {
+                id: params.destination,
+                codes: []
+            }
+        },
+        passengers: [{
+            typology: "ADULT",
+            withoutSeatAssignment: false
+        }],
+        forceDisplayResults: true,
+        trainExpected: true,
+        directJourney: false
+    };
+}
+
+// 📡 Recherche via l'API depuis une page déjà chargée (cookies réutilisés)
+export async function searchWithPage(page: Page, params: SearchParams, timeout = 30000): Promise<TrainResult[]> {
+    const response = await page.request.post(API_URL, {
+        data: buildPayload(params),
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        timeout
+    });
+    if (!response.ok()) {
+        throw new Error(`SNCF Connect API returned ${response.status()}`);
+    }
+    return parseResults(await response.json());
+}
+
+export function parseResults(response: any): TrainResult[] {
+    if (!response?.longDistance?.proposals?.proposals) {
+        return [];
+    }
+
+    return response.longDistance.proposals.proposals.map((proposal: { id: any; departure: { timeLabel: any; originStationLabel: any; }; arrival: { timeLabel: any; destinationStationLabel: any; }; durationLabel: any; bestPriceLabel: any; transporterDescription: any; segments: string | any[]; }) => ({
+        id: proposal.id,
+        departure: {
+            time: proposal.departure.timeLabel,
+            station: proposal.departure.originStationLabel
+        },
+        arrival: {
+            time: proposal.arrival.timeLabel,
+            station: proposal.arrival.destinationStationLabel
+        },
+        duration: proposal.durationLabel,
+        price: proposal.bestPriceLabel,
+        type: proposal.transporterDescription,
+        isDirectTrain: !proposal.segments?.length
+    }));
+}
+
+// 🚂 Recherche ponctuelle : un navigateur par appel (voir BrowserPool pour un
+// service longue durée qui réutilise navigateur et contextes)
 export class SNCFScraper {
     private userAgentRotator: UserAgentRotator;
-    private readonly API_URL = 'https://www.sncf-connect.com/bff/api/v1/itineraries';
+    private readonly headless: boolean;
 
-    constructor() {
+    constructor(options: { headless?: boolean } = {}) {
         this.userAgentRotator = new UserAgentRotator();
+        this.headless = options.headless ?? true;
     }
 
     async searchTrains(params: SearchParams): Promise<TrainResult[]> {
         const browser = await chromium.launch({
-            headless: false
-        });
-
-        const context = await browser.newContext({
-            userAgent: this.userAgentRotator.next(),
-            viewport: { width: 1920, height: 1080 },
-            extraHTTPHeaders: {
-                'Accept': 'application/json',
-                'Accept-Language': 'fr-FR,fr;q=0.9',
-                'x-bff-key': 'ah1MPO-izehIHD-QZZ9y88n-kku876',
-                'virtual-env-name': 'master',
-                'x-api-env': 'production',
-                'Origin': 'https://www.sncf-connect.com',
-                'Referer': 'https://www.sncf-connect.com/',
-                'x-client-channel': 'web',
-                'x-client-app-id': 'front-web',
-                'x-device-class': 'desktop',
-                'x-market-locale': 'fr_FR'
-            }
+            headless: this.headless
         });
 
         try {
+            const context = await newSearchContext(browser, this.userAgentRotator.next());
             const page = await context.newPage();
 
             console.log('🌍 Accès à la page SNCF Connect...');
-            await page.goto('https://www.sncf-connect.com/');
-            await page.waitForLoadState('networkidle');
+            await warmUpPage(page);
             console.log('✅ Page chargée');
 
-            const payload = {
-                schedule: {
-                    outward: {
-                        date: format(params.date, "yyyy-MM-dd'T'HH:mm:ss.SSS'Z'"),
-                        arrivalAt: false
-                    }
-                },
-                mainJourney: {
-                    origin: {
-                        id: params.origin,
-                        codes: []
-                    },
-                    destination: {
-                        id: params.destination,
-                        codes: []
-                    }
-                },
-                passengers: [{
-                    typology: "ADULT",
-                    withoutSeatAssignment: false
-                }],
-                forceDisplayResults: true,
-                trainExpected: true,
-                directJourney: false
-            };
-
-            console.log('📡 Envoi de la requête à l\'API...', {
-                url: this.API_URL,
-                payload: JSON.stringify(payload, null, 2)
-            });
-
-            const response = await page.request.post(this.API_URL, {
-                data: payload,
-                headers: {
-                    'Content-Type': 'application/json'
-                }
-            });
-
-            const responseData = await response.json();
-            console.log('📥 Réponse reçue:', JSON.stringify(responseData, null, 2));
-
-            const results = this.parseResults(responseData);
+            console.log('📡 Envoi de la requête à l\'API...', { url: API_URL });
+            const results = await searchWithPage(page, params);
             console.log('🔍 Résultats parsés:', results);
 
             return results;
@@ -95,28 +139,4 @@ export class SNCFScraper {
             await browser.close();
         }
     }
-
-
-
-    private parseResults(response: any): TrainResult[] {
-        if (!response?.longDistance?.proposals?.proposals) {
-            return [];
-        }
-
-        return response.longDistance.proposals.proposals.map((proposal: { id: any; departure: { timeLabel: any; originStationLabel: any; }; arrival: { timeLabel: any; destinationStationLabel: any; }; durationLabel: any; bestPriceLabel: any; transporterDescription: any; segments: string | any[]; }) => ({
-            id: proposal.id,
-            departure: {
-                time: proposal.departure.timeLabel,
-                station: proposal.departure.originStationLabel
-            },
-            arrival: {
-                time: proposal.arrival.timeLabel,
-                station: proposal.arrival.destinationStationLabel
-            },
-            duration: proposal.durationLabel,
-            price: proposal.bestPriceLabel,
-            type: proposal.transporterDescription,
-            isDirectTrain: !proposal.segments?.length
-        }));
-    }
-}
\ No newline at end of file
+}
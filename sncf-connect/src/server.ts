@@ -0,0 +1,91 @@
+// src/server.ts
+import { createServer } from 'node:http';
+import type { IncomingMessage, ServerResponse } from 'node:http';
+import { BrowserPool } from './pool';
+import type { BatchResult, BatchSearch } from './types';
+
+// 🔌 Service local : POST /search (recherches groupées), GET /stats, GET /health
+const PORT = Number(process.env.SNCF_CONNECT_PORT ?? 8790);
+const HOST = process.env.SNCF_CONNECT_HOST ?? '127.0.0.1';
+const MAX_BATCH = Number(process.env.SNCF_CONNECT_MAX_BATCH ?? 20);
+
+function sendJson(res: ServerResponse, status: number, body: unknown): void {
+    res.writeHead(status, { 'Content-Type': 'application/json' });
+    res.end(JSON.stringify(body));
+}
+
+async function readJson(req: IncomingMessage): Promise<any> {
+    const chunks: Buffer[] = [];
+    for await (const chunk of req) {
+        chunks.push(chunk as Buffer);
+    }
+    return JSON.parse(Buffer.concat(chunks).toString('utf-8') || '{}');
+}
+
+// 📦 Les recherches d'un lot partent en parallèle sur les workers du pool
+export async function searchBatch(pool: BrowserPool, searches: BatchSearch[]): Promise<BatchResult[]> {
+    return Promise.all(searches.map(async (search): Promise<BatchResult> => {
+        const started = performance.now();
+        try {
+            const trains = await pool.search({
+                origin: search.origin,
+                destination: search.destination,
+                date: new Date(search.date)
+            });
+            return { ok: true, trains, latencyMs: Math.round(performance.now() - started) };
+        } catch (error) {
+            return { ok: false, error: String((error as Error)?.message ?? error) };
+        }
+    }));
+}
+
+export function createPoolServer(pool: BrowserPool) {
+    return createServer(async (req, res) => {
+        try {
+            if (req.method === 'GET' && req.url === '/health') {
+                return sendJson(res, 200, { status: 'ok' });
+            }
+            if (req.method === 'GET' && req.url === '/stats') {
+                return sendJson(res, 200, pool.stats());
+            }
+            if (req.method === 'POST' && req.url === '/search') {
+                const body = await readJson(req);
+                const searches: BatchSearch[] = Array.isArray(body.searches) ? body.searches : [];
+                if (!searches.length || searches.length > MAX_BATCH) {
+                    return sendJson(res, 400, { error: `Expected 1 to ${MAX_BATCH} searches` });
+                }
+                const started = performance.now();
+                const results = await searchBatch(pool, searches);
+                return sendJson(res, 200, { results, elapsedMs: Math.round(performance.now() - started) });
+            }
+            sendJson(res, 404, { error: 'Not found' });
+        } catch (error) {
+            console.error('🚨 Request failed:', error);
+            sendJson(res, 500, { error: String(error) });
+        }
+    });
+}
+
+async function main() {
+    const pool = new BrowserPool();
+    await pool.start();
+    const server = createPoolServer(pool).listen(PORT, HOST, () => {
+        console.log(`🚀 SNCF Connect pool listening on http://${HOST}:${PORT}`);
+    });
+
+    const shutdown = async () => {
+        console.log('🛑 Shutting down...');
+        server.close();
+        await pool.close();
+        process.exit(0);
+    };
+    process.on('SIGINT', shutdown);
+    process.on('SIGTERM', shutdown);
+}
+
+if (import.meta.main) {
+    main().catch((error) => {
+        console.error('❌ Error:', error);
+        process.exit(1);
+    });
+}
@@ -19,4 +19,36 @@ export interface TrainResult {
     price: string;
     type: string;
     isDirectTrain: boolean;
-}
\ No newline at end of file
+}
+
+// 📦 Recherche groupée reçue par le serveur du pool (date ISO locale)
+export interface BatchSearch {
+    origin: string;
+    destination: string;
+    date: string;
+}
+
+export type BatchResult =
+    | { ok: true; trains: TrainResult[]; latencyMs: number }
+    | { ok: false; error: string };
+
+export interface PoolOptions {
+    size: number;
+    headless: boolean;
+    warmUp: boolean;
+    maxSearchesPerContext: number;
+    searchTimeoutMs: number;
+    maxQueue: number;
+}
+
+export interface PoolStats {
+    size: number;
+    idle: number;
+    queued: number;
+    searches: number;
+    errors: number;
+    recycled: number;
+    relaunches: number;
+    warmUpMs: number;
+    latencyMs: { p50: number; p95: number; max: number };
+}
@@ -0,0 +1,130 @@
+// tests/pool.spec.ts
+import { EventEmitter } from 'node:events';
+import { test, expect } from '@playwright/test';
+import type { Browser } from 'playwright';
+import { BrowserPool } from '../src/pool';
+import type { PoolOptions } from '../src/types';
+
+// 🧪 Navigateur factice : contextes et pages en mémoire, pannes à la demande
+class FakePage {
+    closed = false;
+    searches = 0;
+    failNextSearch = false;
+
+    async goto(): Promise<void> {
+        this.check();
+    }
+
+    async waitForLoadState(): Promise<void> {
+        this.check();
+    }
+
+    request = {
+        post: async () => {
+            this.check();
+            this.searches++;
+            if (this.failNextSearch) {
+                this.failNextSearch = false;
+                throw new Error('session blocked');
+            }
+            return { ok: () => true, status: () => 200, json: async () => ({}) };
+        },
+    };
+
+    private check(): void {
+        if (this.closed) {
+            throw new Error('Target page, context or browser has been closed');
+        }
+    }
+}
+
+class FakeBrowser extends EventEmitter {
+    pages: FakePage[] = [];
+    failContexts = 0;
+    connected = true;
+
+    async newContext() {
+        if (!this.connected || this.failContexts > 0) {
+            this.failContexts = Math.max(0, this.failContexts - 1);
+            throw new Error('browser.newContext failed');
+        }
+        const page = new FakePage();
+        this.pages.push(page);
+        return {
+            newPage: async () => page,
+            close: async () => {
+                page.closed = true;
+            },
+        };
+    }
+
+    isConnected(): boolean {
+        return this.connected;
+    }
+
+    crash(): void {
+        this.connected = false;
+        this.pages.forEach((page) => (page.closed = true));
+        this.emit('disconnected');
+    }
+
+    async close(): Promise<void> {
+        this.crash();
+    }
+}
+
+const OPTIONS: PoolOptions = {
+    size: 1,
+    headless: true,
+    warmUp: true,
+    maxSearchesPerContext: 50,
+    searchTimeoutMs: 1000,
+    maxQueue: 10,
+};
+const SEARCH = { origin: 'A', destination: 'B', date: new Date('2025-01-06T08:00:00') };
+
+function fakePool() {
+    const browsers: FakeBrowser[] = [];
+    const pool = new BrowserPool(OPTIONS, async () => {
+        const browser = new FakeBrowser();
+        browsers.push(browser);
+        return browser as unknown as Browser;
+    });
+    return { pool, browsers };
+}
+
+test.describe('BrowserPool', () => {
+    test('a failed recycle never hands out a closed context', async () => {
+        const { pool, browsers } = fakePool();
+        await pool.start();
+        const [browser] = browsers;
+
+        // Recherche en échec, puis recréation du contexte en échec
+        browser.pages[0].failNextSearch = true;
+        browser.failContexts = 1;
+        await expect(pool.search(SEARCH)).rejects.toThrow('session blocked');
+        expect(browser.pages[0].closed).toBe(true);
+
+        // Le worker mort est recréé : la recherche suivante réussit
+        await expect(pool.search(SEARCH)).resolves.toEqual([]);
+        expect(browser.pages).toHaveLength(2);
+        expect(browser.pages[1].searches).toBe(1);
+        expect(pool.stats()).toMatchObject({ searches: 1, errors: 1, recycled: 1 });
+        await pool.close();
+    });
+
+    test('the browser is relaunched after a crash', async () => {
+        const { pool, browsers } = fakePool();
+        await pool.start();
+
+        browsers[0].crash();
+        await expect(pool.search(SEARCH)).resolves.toEqual([]);
+        expect(browsers).toHaveLength(2);
+        expect(browsers[1].pages[0].searches).toBe(1);
+        expect(pool.stats()).toMatchObject({ relaunches: 1, errors: 0 });
+
+        // Une fermeture volontaire ne relance rien
+        await pool.close();
+        expect(browsers).toHaveLength(2);
+    });
+});
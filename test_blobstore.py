@@ -0,0 +1,98 @@
+import os
+import time
+
+from langchain_core.messages import ToolMessage
+
+from agents import blobstore
+from agents.blobstore import BLOB_PREFIX, BlobStore
+
+PAYLOAD = '{"status": "success", "flights": [' + ", ".join(["1"] * 400) + "]}"
+
+
+def _later(monkeypatch, seconds: float):
+    """Avance l'horloge du stockage de `seconds`"""
+    now = time.time()
+    monkeypatch.setattr(blobstore.time, "time", lambda: now + seconds)
+
+
+def test_blobstore_dedups_identical_results():
+    """Test du stockage unique d'un résultat partagé par plusieurs threads"""
+    store = BlobStore()
+    first = store.put(PAYLOAD, owner="a")
+    second = store.put(PAYLOAD, owner="b")
+
+    assert first == second and first.startswith(BLOB_PREFIX)
+    assert store.put("small", owner="a") == "small"
+    stats = store.stats()
+    assert (stats["puts"], stats["writes"], stats["blobs"]) == (2, 1, 1)
+    assert stats["dedup_ratio"] == 2.0
+    assert stats["bytes_saved"] > len(PAYLOAD)
+
+
+def test_blobstore_hydrates_tool_messages():
+    """Test de la réhydratation des références dans les ToolMessages"""
+    from agents.agent import Agent
+    from agents.blobstore import BLOB_STORE
+
+    message = ToolMessage(
+        tool_call_id="call_1", content=BLOB_STORE.put(PAYLOAD, owner="hydrate")
+    )
+    assert Agent._hydrate(message).content == PAYLOAD
+    assert message.content.startswith(BLOB_PREFIX)
+
+    BLOB_STORE.release("hydrate")
+    assert "expired" in Agent._hydrate(message).content
+
+
+def test_blobstore_sweep_releases_idle_threads(monkeypatch):
+    """Test de la libération des threads inactifs et de leurs blobs"""
+    store = BlobStore()
+    expired = []
+    store.on_expire(expired.append)
+    ref = store.put(PAYLOAD, owner="idle")
+    store.put(PAYLOAD, owner="active")
+
+    _later(monkeypatch, 100)
+    store.touch("active")
+    assert store.sweep(ttl_seconds=50) == 0
+    assert expired == ["idle"]
+    assert store.get(ref) == PAYLOAD
+
+    _later(monkeypatch, 200)
+    assert store.sweep(ttl_seconds=50) == 1
+    assert expired == ["idle", "active"]
+    assert store.stats()["blobs"] == 0 and store.stats()["threads"] == 0
+
+
+def test_blobstore_collects_files_of_previous_processes(tmp_path):
+    """Test de la suppression au démarrage des fichiers orphelins anciens"""
+    old = BlobStore(str(tmp_path))
+    stale = old.put(PAYLOAD, owner="a")[len(BLOB_PREFIX) :]
+    fresh = old.put(PAYLOAD + " ", owner="b")[len(BLOB_PREFIX) :]
+    hour_ago = time.time() - 3600
+    os.utime(old._path(stale), (hour_ago, hour_ago))
+
+    # Nouveau processus : les propriétaires d'origine sont inconnus
+    store = BlobStore(str(tmp_path))
+    store.start(ttl_seconds=600)
+    store.stop()
+
+    assert not os.path.exists(store._path(stale))
+    assert os.path.exists(store._path(fresh))
+
+
+def test_agent_forgets_expired_threads(monkeypatch):
+    """Test de l'oubli des checkpoints d'un thread expiré par le balayage"""
+    from agents.agent import Agent
+    from agents.blobstore import BLOB_STORE
+    from config import AgentConfig
+
+    config = AgentConfig()
+    config.cache_warmer = False
+    agent = Agent(config)
+    agent._memory.storage["old-thread"] = {}
+    BLOB_STORE.touch("old-thread")
+
+    _later(monkeypatch, config.thread_ttl_seconds + 1)
+    BLOB_STORE.sweep(config.thread_ttl_seconds)
+    assert "old-thread" not in agent._memory.storage
@@ -0,0 +1,111 @@
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES, to_canonical
+from agents.tools.flights_finder import flights_finder
+from agents.tools.hotels_finder import hotels_finder
+from agents.tools.trains_finder import trains_finder
+from benchmarks.stub_servers import sncf_response
+
+HOTELS = {
+    "properties": [
+        {
+            "name": "Roma Termini",
+            "rate_per_night": {"extracted_lowest": 100},
+            "total_rate": {"extracted_lowest": 400},
+        }
+    ]
+}
+FLIGHTS = {"best_flights": [{"flights": [{"flight_number": "AZ 1"}], "price": 120}]}
+HOTEL_SEARCH = {
+    "q": "Rome",
+    "check_in_date": "2025-05-01",
+    "check_out_date": "2025-05-05",
+}
+FLIGHT_SEARCH = {
+    "departure_airport": "CDG",
+    "arrival_airport": "FCO",
+    "outbound_date": "2025-05-01",
+    "search_mode": "shallow",
+}
+
+
+def test_hotel_prices_converted_to_requested_currency(serpapi):
+    """Test de la conversion des prix d'hôtels dans la devise demandée"""
+    calls = serpapi(HOTELS)
+    result = hotels_finder.invoke({"params": {**HOTEL_SEARCH, "currency": "usd"}})
+
+    rate = FX_RATES.rate(CANONICAL_CURRENCY, "USD")
+    (hotel,) = result["hotels"]
+    assert hotel.rate_per_night == round(100 * rate, 2)
+    assert hotel.total_rate == round(400 * rate, 2)
+    assert result["search_parameters"]["currency"] == "USD"
+    assert calls[0]["currency"] == CANONICAL_CURRENCY
+
+
+def test_flight_prices_converted_to_requested_currency(serpapi):
+    """Test de la conversion des prix de vols dans la devise demandée"""
+    calls = serpapi(FLIGHTS)
+    result = flights_finder.invoke({"params": {**FLIGHT_SEARCH, "currency": "GBP"}})
+
+    assert result["currency"] == "GBP"
+    assert result["flights"][0].price == round(
+        120 * FX_RATES.rate(CANONICAL_CURRENCY, "GBP"), 2
+    )
+    assert calls[0]["currency"] == CANONICAL_CURRENCY
+
+
+def test_price_filters_converted_to_canonical_currency(serpapi):
+    """Test des seuils de prix convertis vers la devise canonique"""
+    calls = serpapi(HOTELS)
+    hotels_finder.invoke(
+        {
+            "params": {
+                **HOTEL_SEARCH,
+                "currency": "USD",
+                "min_price": 50,
+                "max_price": 300,
+            }
+        }
+    )
+    assert calls[-1]["min_price"] == str(to_canonical(50, "USD"))
+    assert calls[-1]["max_price"] == str(to_canonical(300, "USD"))
+    assert calls[-1]["max_price"] == str(round(300 / FX_RATES.rate("EUR", "USD")))
+
+    calls = serpapi(FLIGHTS)
+    flights_finder.invoke(
+        {"params": {**FLIGHT_SEARCH, "currency": "JPY", "max_price": 30000}}
+    )
+    assert calls[-1]["max_price"] == to_canonical(30000, "JPY")
+
+
+def test_sncf_centimes_converted(sncf):
+    """Test des montants SNCF en centimes convertis en devise demandée"""
+    assert FX_RATES.convert("4550", "centime", "EUR") == 45.5
+
+    calls = sncf(sncf_response)
+    params = {
+        "origin_city": "75056",
+        "destination_city": "69123",
+        "departure_date": "2025-01-10",
+    }
+    euros = trains_finder.invoke({"params": params})["trains"]
+    dollars = trains_finder.invoke({"params": {**params, "currency": "USD"}})["trains"]
+    assert len(calls) == 1
+
+    fares = [j["fare"] for j in sncf_response(calls[0])["journeys"]]
+    assert euros and len(euros) == len(fares)
+    rate = FX_RATES.rate(CANONICAL_CURRENCY, "USD")
+    for fare, euro, dollar in zip(fares, euros, dollars):
+        assert euro.price == int(fare["total"]["value"]) / 100
+        assert (dollar.price, dollar.currency) == (round(euro.price * rate, 2), "USD")
+
+
+def test_currencies_share_one_cache_entry(serpapi):
+    """Test d'une même entrée de cache pour des devises différentes"""
+    calls = serpapi(HOTELS)
+    euros = hotels_finder.invoke({"params": {**HOTEL_SEARCH, "currency": "EUR"}})
+    pounds = hotels_finder.invoke({"params": {**HOTEL_SEARCH, "currency": "GBP"}})
+
+    assert len(calls) == 1
+    assert euros["hotels"][0].rate_per_night == 100
+    assert pounds["hotels"][0].rate_per_night == round(
+        100 * FX_RATES.rate(CANONICAL_CURRENCY, "GBP"), 2
+    )
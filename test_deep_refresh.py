@@ -0,0 +1,85 @@
+from langchain_core.messages import AIMessage
+
+from agents.tools import flights_finder as flights_module
+from agents.tools.deep_refresh import DEEP_REFRESHER, compare_prices
+from agents.tools.models import Flight
+
+SHALLOW = {
+    "best_flights": [
+        {"flights": [{"flight_number": "AZ 1"}], "price": 120},
+        {"flights": [{"flight_number": "AF 2"}], "price": 150},
+    ]
+}
+DEEP = {
+    "best_flights": [
+        {"flights": [{"flight_number": "AZ 1"}], "price": 110},
+        {"flights": [{"flight_number": "AF 2"}], "price": 150},
+        {"flights": [{"flight_number": "LH 3"}], "price": 95},
+    ]
+}
+SEARCH = {
+    "departure_airport": "CDG",
+    "arrival_airport": "FCO",
+    "outbound_date": "2025-05-01",
+    "search_mode": "two_phase",
+}
+
+
+def _upstream(params):
+    return DEEP if params.get("deep_search") else SHALLOW
+
+
+def test_compare_prices_reports_changes_and_new_options():
+    """Test de la comparaison des prix rapides et approfondis"""
+    diff = compare_prices(SHALLOW, DEEP)
+
+    assert (diff["lowest_before"], diff["lowest_after"]) == (120, 95)
+    assert diff["changed"] == [{"flights": ["AZ 1"], "before": 120, "after": 110}]
+    assert diff["new_options"] == 1
+
+
+def test_two_phase_search_returns_shallow_then_refreshes_cache(serpapi):
+    """Test de la recherche en deux phases : réponse rapide puis cache affiné"""
+    calls = serpapi(_upstream)
+
+    result = flights_module.flights_finder.invoke({"params": SEARCH})
+    assert result["flights"] == [
+        Flight.from_serpapi(f) for f in SHALLOW["best_flights"]
+    ]
+    assert result["refinement"]["status"] == "pending"
+    assert "deep_search" not in calls[0]
+
+    refresh_id = result["refinement"]["refresh_id"]
+    assert DEEP_REFRESHER.wait([refresh_id], timeout=5)
+    assert [bool(c.get("deep_search")) for c in calls] == [False, True]
+    (update,) = DEEP_REFRESHER.collect([refresh_id])
+    assert (update["status"], update["lowest_after"]) == ("done", 95)
+
+    # La même recherche est servie par le résultat approfondi mis en cache
+    again = flights_module.flights_finder.invoke({"params": SEARCH})
+    assert len(calls) == 2
+    assert len(again["flights"]) == 3 and again["refinement"] is None
+
+
+def test_agent_exposes_price_updates_once(serpapi):
+    """Test des écarts de prix exposés à l'interface, convertis, une seule fois"""
+    from agents.agent import Agent
+    from config import AgentConfig
+
+    serpapi(_upstream)
+    config = AgentConfig()
+    config.cache_warmer = False
+    config.prefetch = False
+    config.currency = "USD"
+    agent = Agent(config)
+    call = {"name": "flights_finder", "id": "call_1", "args": {"params": SEARCH}}
+    agent.invoke_tools(
+        {"messages": [AIMessage(content="", tool_calls=[call])]},
+        {"configurable": {"thread_id": "two-phase"}},
+    )
+
+    (update,) = agent.price_updates("two-phase", timeout=5)
+    assert update["currency"] == "USD"
+    assert update["lowest_before"] > update["lowest_after"]
+    assert update["lowest_after"] != 95  # converti depuis l'euro
+    assert agent.price_updates("two-phase") == []
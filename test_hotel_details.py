@@ -0,0 +1,94 @@
+import threading
+import time
+
+from agents.tools.cache import RESULT_CACHE
+from agents.tools.currency import CANONICAL_CURRENCY, FX_RATES
+from agents.tools.hotel_details import DETAILS_CACHE, MAX_PROPERTIES, hotel_details
+from agents.tools.hotels_finder import MAX_HOTELS, hotels_finder
+
+
+def _property(token: str) -> dict:
+    return {
+        "name": f"Hotel {token}",
+        "property_token": token,
+        "rate_per_night": {"lowest": "100 €", "extracted_lowest": 100},
+        "amenities": [f"Amenity {i}" for i in range(12)],
+        "images": [{"thumbnail": f"{token}-{i}.jpg"} for i in range(10)],
+        "prices": [{"source": "Booking", "rate_per_night": {"extracted_lowest": 95}}],
+        "nearby_places": [{"name": f"Place {i}"} for i in range(8)],
+    }
+
+
+DETAILS = {
+    "q": "Rome",
+    "check_in_date": "2025-05-01",
+    "check_out_date": "2025-05-05",
+}
+
+
+def test_hotels_finder_returns_lean_summaries(serpapi):
+    """Test des résumés d'hôtels compacts (le détail passe par hotel_details)"""
+    serpapi({"properties": [_property(f"t{i}") for i in range(8)]})
+    result = hotels_finder.invoke({"params": DETAILS})
+
+    assert result["total_found"] == 8
+    assert len(result["hotels"]) == MAX_HOTELS
+    hotel = result["hotels"][0]
+    assert hotel.property_token == "t0"
+    assert len(hotel.amenities) == 8 and hotel.amenities_count == 12
+    assert hotel.thumbnail == "t0-0.jpg"
+    assert not hasattr(hotel, "prices") and not hasattr(hotel, "nearby_places")
+
+
+def test_hotel_details_fetched_in_parallel_with_own_cache(serpapi):
+    """Test des fiches détaillées : appels parallèles et cache dédié"""
+    DETAILS_CACHE.clear()
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def respond(params):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return _property(params["property_token"])
+
+    calls = serpapi(respond)
+    tokens = ["a", "b", "a", "c", "d", "e", "f", "g"]
+    result = hotel_details.invoke(
+        {"params": {**DETAILS, "property_tokens": tokens, "currency": "USD"}}
+    )
+
+    assert len(calls) == MAX_PROPERTIES and peak[0] > 1
+    assert [h["property_token"] for h in result["hotels"]] == ["a", "b", "c", "d", "e"]
+    detail = result["hotels"][0]
+    assert len(detail["images"]) == 5 and len(detail["nearby_places"]) == 5
+    assert detail["prices"][0]["rate_per_night"]["extracted_lowest"] == round(
+        95 * FX_RATES.rate(CANONICAL_CURRENCY, "USD"), 2
+    )
+
+    # Cache dédié, plus long que celui des listes de prix
+    assert DETAILS_CACHE.ttl_seconds > RESULT_CACHE.ttl_seconds
+    RESULT_CACHE.clear()
+    hotel_details.invoke({"params": {**DETAILS, "property_tokens": ["a", "b"]}})
+    assert len(calls) == MAX_PROPERTIES
+
+
+def test_hotel_details_report_errors_per_token(serpapi):
+    """Test des erreurs par hôtel sans échec de l'ensemble"""
+    DETAILS_CACHE.clear()
+
+    def respond(params):
+        if params["property_token"] == "bad":
+            raise RuntimeError("upstream timeout")
+        return _property(params["property_token"])
+
+    serpapi(respond)
+    result = hotel_details.invoke(
+        {"params": {**DETAILS, "property_tokens": ["ok", "bad"]}}
+    )
+
+    assert result["status"] == "success"
+    assert [h["property_token"] for h in result["hotels"]] == ["ok"]
+    assert result["errors"] == {"bad": "upstream timeout"}
@@ -0,0 +1,38 @@
+import json
+import subprocess
+import sys
+
+
+def test_load_test_runs_conversations_against_stubs():
+    """Test du test de charge de bout en bout sur les bouchons locaux"""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load_test",
+            "--users=2",
+            "--conversations=4",
+            "--email-ratio=1",
+            "--latency-scale=0",
+            "--json=-",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=120,
+    ).stdout
+    report = json.loads(output)
+
+    assert report["conversations"] == 4
+    assert report["errors"]["failed_conversations"] == 0
+    assert report["errors"]["tool_errors"] == 0
+    assert report["nodes"]["call_tools_llm"]["count"] == 8
+    assert report["nodes"]["email_sender"]["count"] == 4
+    assert report["memory"]["emails_sent"] == 4
+    # Une conversation d'échauffement précède la mesure
+    assert report["upstream"]["requests"]["sendgrid"] == 5
+    assert report["email_delivery"]["sent"] == 5
+    assert report["email_delivery"]["pending"] == 0
+    # Préfixe statique (schémas d'outils et instructions) servi par le cache
+    assert report["prompt_cache"]["calls"] == 8
+    assert report["prompt_cache"]["hit_rate"] == 1.0
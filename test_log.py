@@ -0,0 +1,120 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from loguru import logger
+
+from agents.log import cap, redact, sampled, setup_logging
+
+SERPAPI_KEY = "serpapi-secret-0123456789"
+LEAKY = (
+    "GET /search?api_key=abc123secret&q=Rome "
+    f"SERPAPI_API_KEY={SERPAPI_KEY} "
+    "headers={'Authorization': 'Bearer tok.abc-123'} "
+    "retry with bearer eyJhbGciOi.payload.sig"
+)
+SECRETS = ("abc123secret", SERPAPI_KEY, "tok.abc-123", "eyJhbGciOi")
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    """Lignes journalisées, sortie loguru par défaut rétablie après le test"""
+    monkeypatch.setenv("SERPAPI_API_KEY", SERPAPI_KEY)
+    for name in ("LOG_LEVELS", "LOG_SAMPLE_EVERY", "LOG_LEVEL"):
+        monkeypatch.delenv(name, raising=False)
+    lines = []
+    yield lines
+    setup_logging("plain", sink=sys.stderr)
+
+
+def test_redact_masks_secret_params():
+    """Test du masquage des paramètres secrets (imbriqués compris)"""
+    params = {"api_key": "k", "q": "Rome", "headers": {"Authorization": "Bearer t"}}
+    assert redact(params) == {
+        "api_key": "***",
+        "q": "Rome",
+        "headers": {"Authorization": "***"},
+    }
+    assert params["api_key"] == "k"
+
+
+def test_plain_sink_scrubs_secrets(sink):
+    """Test du masquage des secrets dans la sortie texte"""
+    setup_logging("plain", sink=sink.append)
+    logger.info(LEAKY)
+
+    (line,) = sink
+    assert "q=Rome" in line
+    assert not [s for s in SECRETS if s in line]
+
+
+def test_structured_sink_scrubs_secrets(sink):
+    """Test du masquage des secrets dans les lignes JSON"""
+    setup_logging("structured", sink=sink.append)
+    logger.info(LEAKY)
+
+    (line,) = sink
+    record = json.loads(line)["record"]
+    assert "q=Rome" in record["message"]
+    assert not [s for s in SECRETS if s in line]
+
+
+def test_cap_truncates_large_payloads():
+    """Test de la troncature des charges utiles"""
+    assert cap("short", limit=10) == "short"
+    assert cap("x" * 25, limit=10) == "x" * 10 + "… [15 more chars]"
+    assert cap({"k": "v"}, limit=100) == "{'k': 'v'}"
+
+
+def test_sampled_keeps_one_event_in_n(sink, monkeypatch):
+    """Test de l'échantillonnage des évènements verbeux"""
+    monkeypatch.setenv("LOG_SAMPLE_EVERY", "3")
+    setup_logging("structured", sink=sink.append)
+    assert [sampled("test_log_event") for _ in range(7)] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
+
+    # Mode texte : tous les évènements
+    setup_logging("plain", sink=sink.append)
+    assert all(sampled("test_log_event") for _ in range(3))
+
+
+def test_structured_levels_per_module(sink, monkeypatch):
+    """Test des niveaux par sous-système (LOG_LEVELS)"""
+    monkeypatch.setenv("LOG_LEVELS", "agents.tools=WARNING,agents.agent=DEBUG")
+    setup_logging("structured", sink=sink.append)
+
+    def from_module(name):
+        return logger.patch(lambda record: record.update(name=name))
+
+    from_module("agents.tools.flights_finder").info("tool info")
+    from_module("agents.tools.flights_finder").warning("tool warning")
+    from_module("agents.agent").debug("agent debug")
+    from_module("agents.prefetch").debug("prefetch debug")
+
+    messages = [json.loads(line)["record"]["message"] for line in sink]
+    assert messages == ["tool warning", "agent debug"]
+
+
+def test_agent_import_keeps_host_log_sinks():
+    """Test que l'import de l'agent ne retire pas les sinks loguru de l'hôte"""
+    code = (
+        "import sys\n"
+        "from loguru import logger\n"
+        "lines = []\n"
+        "logger.add(lines.append, format='{message}')\n"
+        "import agents.agent\n"
+        "logger.info('host sink')\n"
+        "print(lines)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert "host sink" in output
@@ -0,0 +1,143 @@
+import socket
+import threading
+import time
+
+from agents import clients
+from agents.outbox import FAILED, PENDING, SENDING, SENT, EmailSender, Outbox, SendGridTransport
+from benchmarks.stub_servers import APIS, Latency, serve
+
+
+class FlakyTransport:
+    """Transport en mémoire qui échoue les `failures` premières fois"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.delivered = []
+
+    def send_batch(self, emails):
+        errors = []
+        for email in emails:
+            if self.failures:
+                self.failures -= 1
+                errors.append("503 Service Unavailable")
+            else:
+                self.delivered.append(email)
+                errors.append(None)
+        return errors
+
+
+def _sender(outbox, transport, **kwargs) -> EmailSender:
+    return EmailSender(outbox, transport, base_delay=0.01, poll_interval=0.01, **kwargs)
+
+
+def test_sender_retries_with_backoff_then_delivers(tmp_path):
+    """Test des reprises avec délai puis de la livraison"""
+    transport = FlakyTransport(failures=2)
+    sender = _sender(Outbox(str(tmp_path / "outbox.db")), transport)
+    email_id = sender.submit(
+        "agent@example.com", "a@example.com, b@example.com", "Trip", "<p>Hi</p>", "t-1"
+    )
+    assert sender.drain(timeout=10)
+    sender.stop()
+
+    status = sender.outbox.status(email_id)
+    assert status["status"] == SENT
+    assert status["attempts"] == 3
+    assert status["latency_s"] is not None
+    assert transport.delivered[0].recipients == ["a@example.com", "b@example.com"]
+    assert sender.stats()[SENT] == 1
+
+    # Au-delà de max_attempts, l'email est abandonné avec sa dernière erreur
+    sender = _sender(Outbox(":memory:"), FlakyTransport(failures=10), max_attempts=2)
+    email_id = sender.submit("agent@example.com", "a@example.com", "Trip", "<p>Hi</p>")
+    assert sender.drain(timeout=10)
+    sender.stop()
+    assert sender.outbox.status(email_id)["status"] == FAILED
+    assert sender.outbox.status(email_id)["last_error"] == "503 Service Unavailable"
+
+
+def test_outbox_recovers_interrupted_emails(tmp_path):
+    """Test de la reprise des emails interrompus après un redémarrage"""
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    email_id = outbox.enqueue("agent@example.com", "a@example.com", "Trip", "<p>Hi</p>")
+    assert [email.id for email in outbox.claim(10)] == [email_id]
+
+    # Bail en cours : un autre processus ne le reprend pas
+    other = Outbox(path)
+    assert other.status(email_id)["status"] == SENDING
+    assert other.claim(10) == []
+
+    # Arrêt brutal pendant l'envoi : une fois le bail expiré, l'email repasse en attente
+    assert Outbox(path, lease_seconds=0).status(email_id)["status"] == PENDING
+    transport = FlakyTransport(failures=0)
+    sender = _sender(Outbox(path), transport)
+    sender.start()
+    assert sender.drain(timeout=10)
+    sender.stop()
+    assert [email.id for email in transport.delivered] == [email_id]
+
+
+def test_outbox_claims_each_email_once_across_processes(tmp_path):
+    """Test de la réclamation atomique par plusieurs processus partageant la file"""
+    path = str(tmp_path / "outbox.db")
+    ids = {
+        Outbox(path).enqueue("agent@example.com", f"{i}@example.com", "Trip", "<p>Hi</p>")
+        for i in range(200)
+    }
+    outboxes = [Outbox(path) for _ in range(4)]
+    claimed = [[] for _ in outboxes]
+
+    def worker(index):
+        while True:
+            batch = outboxes[index].claim(7)
+            if not batch:
+                return
+            claimed[index] += [email.id for email in batch]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(outboxes))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(sum(claimed, [])) == sorted(ids)
+
+
+def test_outbox_reclaims_expired_leases(tmp_path):
+    """Test de la reprise d'un email dont le worker a dépassé son bail"""
+    path = str(tmp_path / "outbox.db")
+    crashed = Outbox(path, lease_seconds=0.05)
+    email_id = crashed.enqueue("agent@example.com", "a@example.com", "Trip", "<p>Hi</p>")
+    assert [email.id for email in crashed.claim(10)] == [email_id]
+    assert crashed.claim(10) == []
+
+    time.sleep(0.1)
+    (email,) = crashed.claim(10)
+    assert (email.id, email.attempts) == (email_id, 2)
+
+
+def test_sendgrid_transport_against_local_stub(monkeypatch):
+    """Test de l'envoi SendGrid sur le bouchon HTTP local"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = serve(
+        port,
+        {api: Latency("0") for api in APIS},
+        {api: 0.0 for api in APIS},
+    )
+    monkeypatch.setenv("SENDGRID_HOST", f"http://127.0.0.1:{port}")
+    monkeypatch.setenv("SENDGRID_API_KEY", "stub")
+    clients.sendgrid_client.cache_clear()
+    try:
+        sender = _sender(Outbox(":memory:"), SendGridTransport())
+        email_id = sender.submit(
+            "agent@example.com", "a@example.com", "Trip", "<p>Hi</p>"
+        )
+        assert sender.drain(timeout=10)
+        sender.stop()
+        assert sender.outbox.status(email_id)["status"] == SENT
+    finally:
+        server.shutdown()
+        clients.sendgrid_client.cache_clear()
@@ -0,0 +1,232 @@
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from agents.packages import (
+    HotelOption,
+    TransportOption,
+    build_packages,
+    packages_from_results,
+    result_from_json,
+)
+from agents.places import place_of
+from agents.tools.models import TRAIN_COLUMNS, Flight, Hotel, Train, tool_json
+
+
+def _transport(kind, route, departure, minutes, price, transfers=0, co2=0.0):
+    return TransportOption(
+        kind=kind,
+        route=route,
+        departure=departure,
+        arrival=departure + timedelta(minutes=minutes),
+        duration_minutes=minutes,
+        transfers=transfers,
+        co2_grams=co2,
+        price=price,
+        summary={},
+        destination=place_of(route.split("->")[-1]),
+    )
+
+
+def _hotel(name, check_in, price, rating, location="Lyon"):
+    return HotelOption(
+        name=name,
+        check_in=check_in,
+        price=price,
+        rating=rating,
+        summary=Hotel.from_serpapi({"name": name}),
+        location=location,
+    )
+
+
+def test_packages_respect_connections_and_check_in():
+    """Test des contraintes de correspondance et de check-in"""
+    day = datetime(2025, 5, 1, 8, 0)
+    flight = _transport("flight", "CDG->LYS", day, 60, 100)
+    late_flight = _transport("flight", "CDG->LYS", day + timedelta(days=1), 60, 50)
+    train_ok = _transport("train", "Lyon->Annecy", day + timedelta(hours=3), 120, 30)
+    train_too_early = _transport("train", "Lyon->Annecy", day + timedelta(minutes=70), 120, 20)
+    hotels = [_hotel("Lac", date(2025, 5, 1), 200, 4.5, location="Annecy")]
+
+    packages = build_packages([flight, late_flight, train_ok, train_too_early], hotels)
+
+    assert len(packages) == 1
+    package = packages[0]
+    assert package["total_price"] == 330
+    assert [leg["route"] for leg in package["legs"]] == ["CDG->LYS", "Lyon->Annecy"]
+    assert package["door_to_door_minutes"] == 5 * 60
+
+
+def test_packages_keep_only_pareto_optimal_combinations():
+    """Test de l'élimination des combinaisons dominées"""
+    day = datetime(2025, 5, 1, 8, 0)
+    cheap_slow = _transport("train", "Paris->Lyon", day, 300, 40, transfers=1)
+    fast_pricey = _transport("train", "Paris->Lyon", day, 120, 90)
+    dominated = _transport("train", "Paris->Lyon", day, 310, 95, transfers=2)
+    hotels = [_hotel("A", date(2025, 5, 1), 100, 4.0)]
+
+    packages = build_packages([cheap_slow, fast_pricey, dominated], hotels)
+
+    assert sorted(p["total_price"] for p in packages) == [140, 190]
+
+
+def test_packages_stay_fast_with_hundreds_of_candidates():
+    """Test de performance avec des centaines de candidats par trajet"""
+    day = datetime(2025, 5, 1, 6, 0)
+    flights = [
+        _transport("flight", "CDG->LYS", day + timedelta(minutes=7 * i), 60 + i % 50, 80 + (i * 37) % 200, i % 3, 50000 + i)
+        for i in range(300)
+    ]
+    trains = [
+        _transport("train", "Lyon->Annecy", day + timedelta(hours=2, minutes=5 * i), 100 + i % 40, 20 + (i * 13) % 60, i % 2, 1000 + i)
+        for i in range(300)
+    ]
+    hotels = [_hotel(f"H{i}", date(2025, 5, 1), 100 + (i * 29) % 300, 3 + (i % 20) / 10, "Annecy") for i in range(300)]
+
+    start = time.perf_counter()
+    packages = build_packages(flights + trains, hotels, top_n=5)
+    assert time.perf_counter() - start < 5
+    assert 0 < len(packages) <= 5
+
+
+def test_pruning_keeps_extreme_options_of_large_fronts():
+    """Test que l'élagage d'un grand front garde l'option la plus rapide"""
+    day = datetime(2025, 5, 1, 8, 0)
+    # 40 trains tous Pareto-optimaux : plus cher = plus rapide
+    trains = [
+        _transport("train", "Paris->Lyon", day, 300 - 5 * i, 40 + i) for i in range(40)
+    ]
+    hotels = [_hotel("A", date(2025, 5, 1), 100, 4.0)]
+
+    packages = build_packages(trains, hotels, top_n=100)
+
+    assert min(p["door_to_door_minutes"] for p in packages) == 300 - 5 * 39
+    assert min(p["total_price"] for p in packages) == 140
+
+
+def test_packages_match_hotel_location():
+    """Test que les hôtels sont ceux de la ville d'arrivée du dernier trajet"""
+    flights = {
+        "status": "success",
+        "flights": [
+            Flight.from_serpapi(
+                {
+                    "flights": [
+                        {
+                            "departure_airport": {"id": "CDG", "time": "2025-05-01 08:00"},
+                            "arrival_airport": {"id": "FCO", "time": "2025-05-01 10:00"},
+                        }
+                    ],
+                    "price": 120,
+                }
+            )
+        ],
+    }
+
+    def hotels(location, name):
+        return {
+            "status": "success",
+            "hotels": [Hotel.from_serpapi({"name": name, "total_rate": {"extracted_lowest": 300}})],
+            "search_parameters": {
+                "location": location,
+                "dates": {"check_in": "2025-05-01", "check_out": "2025-05-04"},
+            },
+        }
+
+    packages = packages_from_results(
+        [
+            ("flights_finder", flights),
+            ("hotels_finder", hotels("Florence", "Firenze Centro")),
+            ("hotels_finder", hotels("London", "Soho")),
+            ("hotels_finder", hotels("Rome, Italy", "Roma Termini")),
+        ]
+    )
+
+    assert [p["hotel"]["name"] for p in packages] == ["Roma Termini"]
+
+
+def test_packages_combine_results_across_turns(serpapi):
+    """Test des forfaits construits avec les vols d'un tour et les hôtels du suivant"""
+    from langchain_core.messages import AIMessage, ToolMessage
+
+    from agents.agent import Agent
+    from agents.blobstore import BLOB_STORE
+    from agents.tools.models import to_json
+    from config import AgentConfig
+
+    flight = {
+        "flights": [
+            {
+                "departure_airport": {"id": "CDG", "time": "2025-05-01 08:00"},
+                "arrival_airport": {"id": "FCO", "time": "2025-05-01 10:00"},
+            }
+        ],
+        "price": 120,
+    }
+    earlier = {"status": "success", "flights": [Flight.from_serpapi(flight)]}
+    serpapi({"properties": [{"name": "Roma Termini", "total_rate": {"extracted_lowest": 300}}]})
+
+    config = AgentConfig()
+    config.cache_warmer = False
+    config.prefetch = False
+    agent = Agent(config)
+    hotel_call = {
+        "name": "hotels_finder",
+        "id": "call_2",
+        "args": {"params": {"q": "Rome", "check_in_date": "2025-05-01", "check_out_date": "2025-05-04"}},
+    }
+    state = {
+        "messages": [
+            ToolMessage(tool_call_id="call_1", name="flights_finder", content=BLOB_STORE.put(to_json(earlier), owner="t-2")),
+            AIMessage(content="", tool_calls=[hotel_call]),
+        ]
+    }
+    update = agent.invoke_tools(state, {"configurable": {"thread_id": "t-2"}})
+
+    result = json.loads(BLOB_STORE.get(update["messages"][0].content))
+    assert [p["total_price"] for p in result["packages"]] == [420]
+    assert result["packages"][0]["legs"][0]["route"] == "CDG->FCO"
+
+
+def test_trains_reach_the_llm_as_a_compact_table():
+    """Test de l'encodage des trains en tableau et de sa relecture"""
+    train = Train(
+        "2025-05-01", "08:00", "2025-05-01", "10:00", "Paris Gare de Lyon",
+        "Paris", "Lyon Part-Dieu", "Lyon", "87686006", "87723197", 120, "TGV INOUI",
+        "6603", "SNCF", 0, 1.7, 45.0, "EUR", "api", (("Second", 45.0),),
+    )
+    content = tool_json({"status": "success", "trains": [train], "count": 1})
+
+    table = json.loads(content)["trains"]
+    assert table["columns"] == list(TRAIN_COLUMNS) and table["currency"] == "EUR"
+    assert "87686006" not in content and '"api"' not in content
+    assert table["rows"][0][TRAIN_COLUMNS.index("arrival_date")] is None
+
+    (parsed,) = result_from_json(content)["trains"]
+    assert (parsed.arrival_date, parsed.price, parsed.tickets) == (
+        "2025-05-01",
+        45.0,
+        (("Second", 45.0),),
+    )
+    assert parsed.departure_uic is None and parsed.currency == "EUR"
+
+
+def test_unchainable_route_does_not_break_other_chains():
+    """Test d'un itinéraire sans correspondance à côté d'un vol et d'un train enchaînables"""
+    day = datetime(2025, 5, 1, 8, 0)
+    flight = _transport("flight", "CDG->LYS", day, 60, 100)
+    train = _transport("train", "Lyon->Annecy", day + timedelta(hours=3), 120, 30)
+    # Départ avant l'arrivée du vol comme après le train : jamais enchaînable
+    unrelated = _transport("train", "Paris->Marseille", day + timedelta(minutes=30), 180, 60)
+    hotels = [
+        _hotel("Lac", date(2025, 5, 1), 200, 4.5, location="Annecy"),
+        _hotel("Vieux-Port", date(2025, 5, 1), 150, 4.0, location="Marseille"),
+    ]
+
+    packages = build_packages([flight, train, unrelated], hotels, top_n=10)
+
+    routes = {p["hotel"]["name"]: [leg["route"] for leg in p["legs"]] for p in packages}
+    assert routes == {
+        "Lac": ["CDG->LYS", "Lyon->Annecy"],
+        "Vieux-Port": ["Paris->Marseille"],
+    }
@@ -0,0 +1,111 @@
+from agents.prefetch import Prefetcher
+from agents.tools import hotels_finder as hotels_module
+from config import TOOLS
+
+
+def test_prefetch_warms_hotels_after_round_trip_flight(serpapi):
+    """Test du préchargement de l'hôtel après un vol aller-retour"""
+    upstream_calls = serpapi({"properties": [{"name": "Hotel Roma"}]})
+
+    prefetcher = Prefetcher(TOOLS, lambda call: None)
+    flight_call = {
+        "name": "flights_finder",
+        "args": {
+            "params": {
+                "departure_airport": "CDG",
+                "arrival_airport": "FCO",
+                "outbound_date": "2025-05-01",
+                "return_date": "2025-05-05",
+            }
+        },
+    }
+    prefetcher.schedule([flight_call])
+    prefetcher._executor.shutdown(wait=True)
+
+    assert len(upstream_calls) == 1
+    assert upstream_calls[0]["q"] == "Rome"
+
+    # L'appel suivant du LLM est servi par le cache
+    result = hotels_module.hotels_finder.invoke(
+        {
+            "params": {
+                "q": "Rome",
+                "check_in_date": "2025-05-01",
+                "check_out_date": "2025-05-05",
+            }
+        }
+    )
+    assert result["status"] == "success"
+    assert len(upstream_calls) == 1
+
+    stats = prefetcher.stats()
+    assert stats["issued"] == 1
+    assert stats["hits"] == 1
+    assert stats["hit_ratio"] == 1.0
+
+
+def test_prefetch_skips_unknown_destination():
+    """Test qu'aucun appel n'est prédit pour une destination inconnue"""
+    prefetcher = Prefetcher({}, lambda call: None)
+    flight_call = {
+        "name": "flights_finder",
+        "args": {
+            "params": {
+                "departure_airport": "CDG",
+                "arrival_airport": "XXX",
+                "outbound_date": "2025-05-01",
+                "return_date": "2025-05-05",
+            }
+        },
+    }
+    assert prefetcher.predict([flight_call]) == []
+
+
+def test_prefetch_ignores_malformed_flight_args():
+    """Test qu'un appel incomplet du LLM ne fait pas échouer le préchargement"""
+    prefetcher = Prefetcher({}, lambda call: None)
+    calls = [
+        {
+            "name": "flights_finder",
+            "args": {"params": {"arrival_airport": "FCO", "return_date": "2025-05-05"}},
+        },
+        {"name": "flights_finder", "args": {"params": {"arrival_airport": "LYS"}}},
+        {"name": "flights_finder", "args": {"params": "CDG-FCO"}},
+        {"name": "flights_finder", "args": {}},
+        {"name": "hotels_finder", "args": {"params": {"q": "Nice"}}},
+    ]
+    assert prefetcher.predict(calls) == []
+    prefetcher.schedule(calls)
+    assert prefetcher.stats()["predicted"] == 0
+
+
+def test_prefetch_failure_does_not_fail_the_turn(serpapi):
+    """Test qu'une erreur de préchargement n'interrompt pas l'exécution des outils"""
+    from langchain_core.messages import AIMessage
+
+    from agents.agent import Agent
+    from config import AgentConfig
+
+    serpapi({"properties": [{"name": "Hotel Roma"}]})
+    config = AgentConfig()
+    config.cache_warmer = False
+    agent = Agent(config)
+
+    def broken_schedule(calls):
+        raise KeyError("outbound_date")
+
+    agent._prefetcher.schedule = broken_schedule
+    call = {
+        "name": "hotels_finder",
+        "id": "call_1",
+        "args": {
+            "params": {
+                "q": "Rome",
+                "check_in_date": "2025-05-01",
+                "check_out_date": "2025-05-05",
+            }
+        },
+    }
+    state = {"messages": [AIMessage(content="", tool_calls=[call])]}
+    update = agent.invoke_tools(state, {"configurable": {"thread_id": "t-1"}})
+    assert len(update["messages"]) == 1
@@ -0,0 +1,48 @@
+from datetime import date
+
+from langchain_core.messages import AIMessage
+
+from agents.prompt import (
+    STATIC_INSTRUCTIONS,
+    PromptStats,
+    session_prompt,
+    system_messages,
+)
+
+
+def test_session_block_after_static_prefix():
+    """Test du préfixe statique et du bloc de session sous budget de jetons"""
+    monday = session_prompt(date(2025, 1, 6), "EUR", 5, 5, ("direct flights",))
+    tuesday = session_prompt(date(2025, 1, 7), "USD", 3, 3)
+    first, second = system_messages(monday), system_messages(tuesday)
+    assert first[0].content == second[0].content == STATIC_INSTRUCTIONS
+    assert "2025" not in STATIC_INSTRUCTIONS
+    assert "2025-01-06 (Monday)" in first[1].content
+    assert "Travel preferences: direct flights" in first[1].content
+    assert "USD" in second[1].content and "preferences" not in second[1].content
+
+    preferences = tuple(f"preference number {i} " * 5 for i in range(20))
+    trimmed = session_prompt(date(2025, 1, 6), "EUR", 5, 5, preferences, budget=80)
+    assert "preference number 0" in trimmed
+    assert "preference number 19" not in trimmed
+
+
+def test_prompt_cache_stats():
+    """Test du relevé des jetons de prompt servis par le cache de préfixe"""
+    stats = PromptStats()
+    usage = {"prompt_tokens": 2000, "prompt_tokens_details": {"cached_tokens": 1536}}
+    assert stats.record(AIMessage(content="", response_metadata={"token_usage": usage}))
+    stats.record(
+        AIMessage(
+            content="", response_metadata={"token_usage": {"prompt_tokens": 1000}}
+        )
+    )
+    assert stats.record(AIMessage(content="")) is None
+    assert stats.stats() == {
+        "calls": 2,
+        "prompt_tokens": 3000,
+        "cached_tokens": 1536,
+        "hits": 1,
+        "hit_rate": 0.5,
+        "cached_share": 0.512,
+    }
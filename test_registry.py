@@ -0,0 +1,26 @@
+import subprocess
+import sys
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from config import TOOLS
+
+
+def test_registry_schemas_match_tools():
+    """Test que les schémas du registre sont ceux des outils eux-mêmes"""
+    expected = [convert_to_openai_tool(TOOLS[name]) for name in TOOLS]
+    assert TOOLS.schemas() == expected
+
+
+def test_config_import_does_not_load_tools_or_clients():
+    """Test que l'import de la configuration reste léger"""
+    code = (
+        "import sys, config\n"
+        "heavy = ['agents.tools.flights_finder', 'serpapi', 'langchain_openai', 'sendgrid']\n"
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "[]"
+
@@ -0,0 +1,63 @@
+from agents.tools.flights_finder import flights_finder
+from agents.tools.return_legs import resolve_return_legs
+
+OUTBOUNDS = [
+    {
+        "flights": [{"flight_number": f"AZ {i}"}],
+        "price": 100 + i,
+        "departure_token": f"tok{i}",
+    }
+    for i in range(5)
+]
+SEARCH = {"engine": "google_flights", "departure_id": "CDG", "arrival_id": "FCO"}
+
+
+def _upstream(params):
+    token = params.get("departure_token")
+    if token is None:
+        return {"best_flights": OUTBOUNDS}
+    return {
+        "best_flights": [
+            {"flights": [{"flight_number": f"{token}-back"}], "price": 180},
+            {"flights": [{"flight_number": f"{token}-x"}, {}], "price": 150},
+        ]
+    }
+
+
+def test_return_legs_respect_call_budget_and_cache(serpapi):
+    """Test du budget d'appels et des jetons déjà en cache"""
+    calls = serpapi(_upstream)
+
+    first = resolve_return_legs(SEARCH, OUTBOUNDS, "EUR", top_k=5, call_budget=2)
+    assert first["calls"] == {"upstream": 2, "cached": 0, "skipped": 3}
+    assert [c["departure_token"] for c in calls] == ["tok0", "tok1"]
+    assert len(first["itineraries"]) == 4
+    assert first["itineraries"][0]["total_price"] == 150
+
+    # Les jetons en cache ne consomment pas le budget
+    second = resolve_return_legs(SEARCH, OUTBOUNDS, "EUR", top_k=5, call_budget=2)
+    assert second["calls"] == {"upstream": 2, "cached": 2, "skipped": 1}
+    assert len(calls) == 4
+
+
+def test_refined_round_trip_reuses_cached_return_legs(serpapi):
+    """Test d'un aller-retour raffiné (prix max) servi par les retours en cache"""
+    calls = serpapi(_upstream)
+    search = {
+        "departure_airport": "CDG",
+        "arrival_airport": "FCO",
+        "outbound_date": "2025-05-01",
+        "return_date": "2025-05-08",
+        "search_mode": "deep",
+        "return_top_k": 2,
+    }
+    flights_finder.invoke({"params": search})
+    returns = [c for c in calls if "departure_token" in c]
+    assert len(returns) == 2
+    assert all("deep_search" not in c for c in returns)
+
+    result = flights_finder.invoke({"params": {**search, "max_price": 160}})
+    assert len([c for c in calls if "departure_token" in c]) == 2
+    round_trip = result["round_trip"]
+    assert round_trip["calls"]["cached"] == 2
+    assert {i["total_price"] for i in round_trip["itineraries"]} == {150}
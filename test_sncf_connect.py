@@ -0,0 +1,87 @@
+from agents import clients
+from agents.tools.models import uic_code
+from agents.tools.sncf_connect import parse_price_label, resarail_code
+from agents.tools.trains_finder import trains_finder
+
+
+def _stop_point(name, uic):
+    return {
+        "name": name,
+        "label": name,
+        "stop_area": {
+            "id": f"stop_area:SNCF:{uic}",
+            "codes": [{"type": "uic", "value": uic}],
+        },
+    }
+
+
+def _journey(departure, arrival, fare):
+    return {
+        "departure_date_time": departure,
+        "arrival_date_time": arrival,
+        "duration": 7200,
+        "nb_transfers": 0,
+        "fare": fare,
+        "sections": [
+            {
+                "type": "public_transport",
+                "from": {"stop_point": _stop_point("Paris Gare de Lyon", "87686006")},
+                "to": {"stop_point": _stop_point("Lyon Part Dieu", "87723197")},
+                "display_informations": {"headsign": "6601"},
+            }
+        ],
+    }
+
+
+def test_missing_fares_filled_from_sncf_connect(monkeypatch, sncf):
+    """Test du complément des tarifs manquants via le pool SNCF Connect"""
+    journeys = [
+        _journey("20250110T080000", "20250110T100000", {"found": False}),
+        _journey(
+            "20250110T090000",
+            "20250110T110000",
+            {"found": True, "total": {"value": "4500", "currency": "centime"}},
+        ),
+    ]
+    sncf({"journeys": journeys})
+    batches = []
+
+    def fake_connect(searches):
+        batches.append(searches)
+        trains = [{"departure": {"time": "8h00"}, "price": "Dès 39,90 €"}]
+        return [{"ok": True, "trains": trains, "latencyMs": 5}]
+
+    monkeypatch.setattr(clients, "sncf_connect_search", fake_connect)
+    monkeypatch.setenv("SNCF_CONNECT_URL", "http://127.0.0.1:8790")
+
+    params = {
+        "origin_city": "75056",
+        "destination_city": "69123",
+        "departure_date": "2025-01-10",
+    }
+    result = trains_finder.invoke({"params": params})
+    first, second = result["trains"]
+    assert first.price == 39.9 and first.fare_source == "sncf-connect"
+    assert second.price == 45.0 and second.fare_source == "api"
+    assert batches == [
+        [
+            {
+                "origin": "RESARAIL_STA_8768600",
+                "destination": "RESARAIL_STA_8772319",
+                "date": "2025-01-10T08:00:00",
+            }
+        ]
+    ]
+
+    # Recherche identique : tarifs SNCF Connect servis par le cache
+    trains_finder.invoke({"params": params})
+    assert len(batches) == 1
+
+
+def test_station_code_and_price_label():
+    """Test des codes gares et des libellés de prix"""
+    assert uic_code({"id": "stop_point:SNCF:87686006:Train"}) == "87686006"
+    assert resarail_code("87686006") == "RESARAIL_STA_8768600"
+    assert resarail_code(uic_code({"name": "Gare sans code"})) is None
+    assert parse_price_label("Dès 1 045,50 €") == 1045.5
+    assert parse_price_label("Complet") is None
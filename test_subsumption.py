@@ -0,0 +1,58 @@
+from agents.tools import flights_finder as flights_module
+from agents.tools import hotels_finder as hotels_module
+from agents.tools.models import Flight
+
+
+def _hotel(name, stars, price):
+    return {
+        "name": name,
+        "extracted_hotel_class": stars,
+        "rate_per_night": {"extracted_lowest": price},
+    }
+
+
+HOTELS = [_hotel(f"Hotel {i}", 3 + i % 2, 80 + 20 * i) for i in range(10)]
+
+
+def _search_hotels(**filters):
+    params = {
+        "q": "Rome",
+        "check_in_date": "2025-05-01",
+        "check_out_date": "2025-05-05",
+        **filters,
+    }
+    return hotels_module.hotels_finder.invoke({"params": params})
+
+
+def test_hotel_refinement_served_from_cached_superset(serpapi):
+    """Test d'un raffinement d'hôtels servi par filtrage local"""
+    upstream_calls = serpapi({"properties": HOTELS})
+
+    _search_hotels()
+    result = _search_hotels(hotel_class="4")
+    assert len(upstream_calls) == 1
+    assert result["total_found"] == 5
+    assert all(h.hotel_class == 4 for h in result["hotels"])
+
+    # Trop peu de candidats localement : on interroge l'API
+    _search_hotels(max_price=150)
+    assert len(upstream_calls) == 2
+    assert upstream_calls[1]["max_price"] == "150"
+
+
+def test_direct_flight_refinement_served_from_cached_superset(serpapi):
+    """Test d'un raffinement « vols directs » servi par filtrage local"""
+    direct = {"flights": [{"id": "AZ1"}], "price": 120}
+    connecting = {"flights": [{"id": "LH1"}, {"id": "LH2"}], "price": 90}
+    upstream_calls = serpapi({"best_flights": [connecting, direct]})
+
+    base = {
+        "departure_airport": "CDG",
+        "arrival_airport": "FCO",
+        "outbound_date": "2025-05-01",
+    }
+    flights_module.flights_finder.invoke({"params": base})
+    result = flights_module.flights_finder.invoke({"params": {**base, "stops": 1}})
+
+    assert len(upstream_calls) == 1
+    assert result["flights"] == [Flight.from_serpapi(direct)]
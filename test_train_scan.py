@@ -0,0 +1,54 @@
+from agents.tools.train_scan import parse_windows
+from agents.tools.trains_finder import trains_finder
+from benchmarks.stub_servers import sncf_response
+
+
+def test_scan_dates_and_time_windows(sncf):
+    """Test du balayage multi-jours par créneaux (pages "next", dédoublonnage)"""
+    calls = sncf(sncf_response)
+    params = {
+        "origin_city": "75056",
+        "destination_city": "69123",
+        "departure_date": "2025-01-10",
+        "end_date": "2025-01-12",
+        "time_windows": ["06:00-21:59", "18:00-23:59"],
+    }
+    result = trains_finder.invoke({"params": params})
+
+    assert result["status"] == "success"
+    assert [row["date"] for row in result["matrix"]] == [
+        "2025-01-10",
+        "2025-01-11",
+        "2025-01-12",
+    ]
+    # Une requête par (jour, créneau), puis les pages suivantes du créneau
+    assert result["queries"] == len(calls) > 6
+    assert not result["truncated"]
+    for row in result["matrix"]:
+        evening = row["windows"]["18:00-23:59"]
+        assert evening["count"] > 0 and "18:00" <= evening["last"] <= "23:59"
+        day = [t for t in result["trains"] if t.date == row["date"]]
+        assert min(t.price for t in day) == row["cheapest"]["price"]
+        assert min(t.duration_minutes for t in day) == (
+            row["fastest"]["duration_minutes"]
+        )
+    assert sum(row["count"] for row in result["matrix"]) == result["count"]
+
+    # Balayage identique : servi par le cache
+    trains_finder.invoke({"params": params})
+    assert result["queries"] == len(calls)
+
+
+def test_time_windows_validation():
+    """Test des créneaux horaires"""
+    assert parse_windows(["18:00-23:59", "6:00-9:30", "18:00-23:59"]) == [
+        ("06:00", "09:30"),
+        ("18:00", "23:59"),
+    ]
+    assert parse_windows(None) == [("00:00", "23:59")]
+    for window in ("18:00", "22:00-06:00", "25:00-26:00"):
+        try:
+            parse_windows([window])
+        except ValueError:
+            continue
+        raise AssertionError(f"{window} accepted")
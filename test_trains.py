@@ -26,34 +26,29 @@ def test_train_search():
             for idx, train in enumerate(result["trains"], 1):
                 logger.info(f"\n🚂 Train {idx}:")
                 logger.info(
-                    f"🚉 Départ: {train['departure']['station']} à {train['departure']['time']}"
+                    f"🚉 Départ: {train.departure_station} à {train.departure_time}"
                 )
                 logger.info(
-                    f"🏁 Arrivée: {train['arrival']['station']} à {train['arrival']['time']}"
+                    f"🏁 Arrivée: {train.arrival_station} à {train.arrival_time}"
                 )
-                logger.info(f"⏱️ Durée: {train['duration_minutes']} minutes")
-                logger.info(f"🎫 Type: {train['train_type']} - {train['train_number']}")
-                logger.info(f"🌍 CO2: {train['co2_emission']:.2f} gEC")
+                logger.info(f"⏱️ Durée: {train.duration_minutes} minutes")
+                logger.info(f"🎫 Type: {train.train_type} - {train.train_number}")
+                logger.info(f"🌍 CO2: {train.co2_grams:.2f} gEC")
 
                 # Affichage détaillé des tarifs
-                fare_info = train["price"]
-                if fare_info["found"]:
-                    logger.info(
-                        f"💰 Prix total: {fare_info['total']} {fare_info['currency']}"
-                    )
-                    if fare_info["tickets"]:
+                if train.price is not None:
+                    logger.info(f"💰 Prix total: {train.price} {train.currency}")
+                    if train.tickets:
                         logger.info("📋 Détail des billets:")
-                        for ticket in fare_info["tickets"]:
-                            logger.info(
-                                f"  - {ticket['name']}: {ticket['cost']} {ticket['currency']}"
-                            )
+                        for name, cost in train.tickets:
+                            logger.info(f"  - {name}: {cost} {train.currency}")
                 else:
                     logger.info("💰 Prix: Non disponible")
 
-                if train["transfers"] == 0:
+                if train.transfers == 0:
                     logger.info("✅ Train direct")
                 else:
-                    logger.info(f"🔄 Correspondances: {train['transfers']}")
+                    logger.info(f"🔄 Correspondances: {train.transfers}")
 
                 logger.info("──────────────────────")
         else:
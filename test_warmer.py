@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+
+from agents.quota import QuotaExceeded, TokenBucket, low_priority
+from agents.tools import hotels_finder as hotels_module
+from agents.warmer import CacheWarmer, SearchHistory, upcoming_weekends
+from config import TOOLS
+
+
+def _hotel_call(check_in: str, check_out: str) -> dict:
+    return {"params": {"q": "Lyon", "check_in_date": check_in, "check_out_date": check_out}}
+
+
+def test_warmer_prewarms_hot_destination_for_next_weekend(serpapi, tmp_path):
+    """Test du préchauffage d'une destination populaire pour le week-end"""
+    upstream_calls = serpapi({"properties": [{"name": "Hotel Bellecour"}]})
+
+    # L'historique persisté est relu au redémarrage
+    path = str(tmp_path / "history.jsonl")
+    history = SearchHistory(path)
+    history.record("hotels_finder", _hotel_call("2025-03-07", "2025-03-09"))
+    history.record("hotels_finder", _hotel_call("2025-03-14", "2025-03-16"))
+    history.record("hotels_finder", _hotel_call("2025-03-14", "2025-03-16"))
+    history.record("flights_finder", {"params": {"departure_airport": "CDG"}})
+    warmer = CacheWarmer(SearchHistory(path), weekends=1)
+
+    # Mercredi 2 avril : le week-end suivant commence le vendredi 4
+    warmer.warm_once(TOOLS, today=date(2025, 4, 2))
+    assert len(upstream_calls) == 1
+    assert upstream_calls[0]["check_in_date"] == "2025-04-04"
+
+    result = hotels_module.hotels_finder.invoke(_hotel_call("2025-04-04", "2025-04-06"))
+    assert result["status"] == "success"
+    assert len(upstream_calls) == 1
+
+    stats = warmer.stats()
+    assert stats["warmed"] == 1
+    assert stats["hits"] == 1
+    assert stats["demand_hit_ratio"] == 1.0
+    assert stats["cold_baseline_hit_ratio"] == 0.0
+    assert stats["lift"] == 1.0
+
+
+def test_low_priority_calls_leave_reserve_for_users():
+    """Test que les tâches de fond n'entament pas la réserve du quota"""
+    bucket = TokenBucket(calls_per_minute=0, burst=4, low_priority_reserve=0.5)
+    with low_priority():
+        bucket.acquire()
+        bucket.acquire()
+        with pytest.raises(QuotaExceeded):
+            bucket.acquire()
+    assert not bucket.has_capacity(low=True)
+
+    # Les requêtes utilisateur consomment la réserve
+    bucket.acquire()
+    bucket.acquire()
+    assert bucket.stats()["granted"] == 2
+    assert bucket.stats()["denied_low"] == 1
+
+
+def test_upcoming_weekends_start_at_next_friday():
+    """Test des week-ends à préchauffer selon le jour de la semaine"""
+    first = date(2025, 4, 4), date(2025, 4, 6)
+    following = date(2025, 4, 11), date(2025, 4, 13)
+    # Du lundi au vendredi : le week-end en cours
+    assert upcoming_weekends(2, date(2025, 3, 31)) == [first, following]
+    assert upcoming_weekends(1, date(2025, 4, 4)) == [first]
+    # Samedi et dimanche : son vendredi est passé, on commence au suivant
+    assert upcoming_weekends(1, date(2025, 4, 5)) == [following]
+    assert upcoming_weekends(1, date(2025, 4, 6)) == [following]